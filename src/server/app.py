@@ -1,56 +1,91 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.responses import FileResponse, Response, JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Iterable
-import tempfile, os, uuid, time, re, json
+from dataclasses import dataclass, field
+from array import array
+from collections import OrderedDict
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, BinaryIO, Literal, Callable, Awaitable
+import tempfile, os, sys, uuid, secrets, time, re, json, logging, asyncio, importlib.util, wave, shutil, subprocess
+
+import httpx
 
-from pydub import AudioSegment
 from pydub.utils import which
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+# orjson이 설치되어 있으면 사용 (표준 json보다 빠름), 없으면 표준 json으로 동작.
+# orjson.JSONDecodeError는 json.JSONDecodeError의 하위 클래스라 예외 처리는 그대로 유지된다.
+# API 응답 직렬화도 같은 기준으로 ORJSONResponse / JSONResponse 중에서 고른다.
+try:
+    import orjson
+
+    _DEFAULT_RESPONSE_CLASS: type[Response] = ORJSONResponse
+
+    def _json_loads(raw: str | bytes) -> Any:
+        return orjson.loads(raw)
 
-from src.stt.whisper_client import transcribe_file, _make_client as make_whisper_client
-from src.tts.tts_client import synthesize
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _DEFAULT_RESPONSE_CLASS = JSONResponse
+
+    def _json_loads(raw: str | bytes) -> Any:
+        return json.loads(raw)
+
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+from src.stt.whisper_client import transcribe_file, transcribe_fileobj, _make_client as make_whisper_client
+from src.tts.tts_client import synthesize, tts_cache_path, MAX_TTS_CHARS
 from src.pricing.price import load_configs
 
-app = FastAPI(title="Voice Kiosk API", version="1.0.0")
+app = FastAPI(title="Voice Kiosk API", version="1.0.0", default_response_class=_DEFAULT_RESPONSE_CLASS)
+log = logging.getLogger(__name__)
+# 턴 처리 디버그 로그는 LOG_LEVEL=DEBUG일 때만 출력 (기본 WARNING이면 포맷팅 비용도 없음)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
 
 # ── 세션/보안 가드 ──────────────────────────────────────────────────────────────
-SESSIONS: Dict[str, Dict[str, Any]] = {}   # session_id -> context(dict)
-SESS_META: Dict[str, float] = {}           # session_id -> last_active
+SESSIONS: Dict[str, "SessionCtx"] = {}     # session_id -> SessionCtx
+SESS_META: "OrderedDict[str, float]" = OrderedDict()  # session_id -> last_active (오래된 순)
 SESSION_TTL = 600                          # 10분
 MAX_TURNS = 20                             # 과도한 대화 방지
 ACCEPTED_EXT = {".wav", ".mp3", ".m4a", ".3gp"}    # 업로드 허용 포맷
+_SPOOL_MAX_BYTES = 4 << 20                 # 이 크기까지는 변환 WAV를 메모리에 유지
+_SILENCE_PEAK = 500                        # 16bit PCM 최대 진폭이 이보다 작으면 무음 (약 -36 dBFS)
+
+# OpenAI용 HTTP 커넥션 풀. 연결을 keep-alive로 재사용해 턴마다 TCP/TLS 핸드셰이크를 하지 않는다.
+# HTTP/2는 h2 패키지가 설치된 경우에만 사용 (httpx[http2])
+_OPENAI_HTTP = httpx.AsyncClient(
+    http2=importlib.util.find_spec("h2") is not None,
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=300),
+)
 
-# OpenAI 클라이언트 (환경변수 OPENAI_API_KEY 사용)
-gpt_client = OpenAI()
+# OpenAI 비동기 클라이언트 (환경변수 OPENAI_API_KEY 사용, 이벤트 루프를 막지 않도록 await로 호출)
+gpt_client = AsyncOpenAI(http_client=_OPENAI_HTTP)
 
 def _find_local_ffmpeg() -> str | None:
     tools_dir = os.path.abspath("tools")
     if not os.path.isdir(tools_dir):
         return None
-    for entry in os.listdir(tools_dir):
-        if not entry.lower().startswith("ffmpeg"):
-            continue
-        candidate_bin = os.path.join(tools_dir, entry, "bin")
-        if not os.path.isdir(candidate_bin):
-            continue
-        exe_path = os.path.join(candidate_bin, "ffmpeg.exe")
-        if os.path.isfile(exe_path):
-            return exe_path
-        unix_path = os.path.join(candidate_bin, "ffmpeg")
-        if os.path.isfile(unix_path):
-            return unix_path
+    # scandir의 DirEntry는 파일 종류를 캐시하므로 항목마다 stat을 다시 하지 않음
+    with os.scandir(tools_dir) as it:
+        for entry in it:
+            if not entry.name.lower().startswith("ffmpeg") or not entry.is_dir():
+                continue
+            candidate_bin = os.path.join(entry.path, "bin")
+            if not os.path.isdir(candidate_bin):
+                continue
+            exe_path = os.path.join(candidate_bin, "ffmpeg.exe")
+            if os.path.isfile(exe_path):
+                return exe_path
+            unix_path = os.path.join(candidate_bin, "ffmpeg")
+            if os.path.isfile(unix_path):
+                return unix_path
     return None
 
 
-def _ffprobe_from_ffmpeg(ffmpeg_path: str) -> str:
-    base = os.path.dirname(ffmpeg_path)
-    name = os.path.basename(ffmpeg_path)
-    if name.lower().endswith(".exe"):
-        return os.path.join(base, "ffprobe.exe")
-    return os.path.join(base, "ffprobe")
-
-
 def _resolve_ffmpeg_path() -> str | None:
     # 우선순위: 환경변수 → PATH → tools 폴더 → 일반적인 Windows 설치 경로
     candidates = [
@@ -67,109 +102,330 @@ def _resolve_ffmpeg_path() -> str | None:
 
 
 _FFMPEG_PATH = _resolve_ffmpeg_path()
-if _FFMPEG_PATH:
-    AudioSegment.converter = _FFMPEG_PATH
-    AudioSegment.ffmpeg = _FFMPEG_PATH
-    AudioSegment.ffprobe = _ffprobe_from_ffmpeg(_FFMPEG_PATH)
+# 서버 시작 시 _probe_ffmpeg()로 실제 실행 가능 여부를 확인해 갱신
+_FFMPEG_OK = _FFMPEG_PATH is not None
+_FFMPEG_MISSING_MSG = (
+    "오디오 변환 실패: ffmpeg 실행 파일을 찾을 수 없습니다. "
+    "시스템 PATH에 ffmpeg를 추가하거나 환경변수 FFMPEG_BINARY를 설정해 주세요."
+)
+
+
+def _probe_ffmpeg() -> bool:
+    """ffmpeg -version을 한 번 실행해 바이너리가 실제로 동작하는지 확인."""
+    if not _FFMPEG_PATH:
+        return False
+    try:
+        subprocess.run([_FFMPEG_PATH, "-version"], capture_output=True, timeout=2, check=True)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return True
 
 # ── TTS 파일 제공 관련 ─────────────────────────────────────────────────────────
 TTS_DIR = os.path.abspath(".cache_tts")  # 프로젝트 루트 기준
-_TTS_NAME_RE = re.compile(r"^[a-f0-9]{32}\.mp3$", re.IGNORECASE)
-
+_TTS_NAME_RE = re.compile(r"[a-f0-9]{32}\.mp3")  # md5 hexdigest는 항상 소문자
+# 파일명이 (텍스트+음성 설정)의 md5라 내용이 바뀌지 않으므로 장기 캐시 허용
+_TTS_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 합성 중 스트리밍은 뒤 문장이 실패하면 중간에 끊기므로 캐시 금지 (완성 파일만 장기 캐시)
+_TTS_STREAM_CACHE_CONTROL = "no-store"
 
-def _tts_path_from_name(name: str) -> str:
-    """TTS 캐시 파일 이름 검증 및 경로 확보."""
-    if not _TTS_NAME_RE.match(name):
-        raise HTTPException(status_code=400, detail="잘못된 파일명 형식입니다.")
 
+@lru_cache(maxsize=2048)
+def _tts_abs_path(name: str) -> str | None:
+    """이름 검증 + 절대 경로 계산 (이름만으로 결정되므로 캐시). 형식이 잘못됐으면 None."""
+    if not _TTS_NAME_RE.fullmatch(name):
+        return None
     abs_path = os.path.abspath(os.path.join(TTS_DIR, name))
-
     if not abs_path.startswith(TTS_DIR + os.sep):
-        raise HTTPException(status_code=400, detail="경로가 유효하지 않습니다.")
+        return None
+    return abs_path
+
 
-    if not os.path.exists(abs_path):
+def _tts_path_from_name(name: str) -> tuple[str, os.stat_result]:
+    """TTS 캐시 파일 이름 검증 및 경로 확보. FileResponse 재사용을 위해 stat 결과도 함께 반환."""
+    abs_path = _tts_abs_path(name)
+    if abs_path is None:
+        raise HTTPException(status_code=400, detail="잘못된 파일명 형식입니다.")
+
+    # 파일이 지워졌을 수 있으므로 존재 여부(stat)는 캐시하지 않음
+    try:
+        st = os.stat(abs_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
 
-    return abs_path
+    return abs_path, st
 
 
+# TTS 파일 URL의 서버 주소 (프로세스 동안 바뀌지 않으므로 한 번만 읽음)
+_BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
+
+
+@lru_cache(maxsize=2048)
 def _make_tts_url(tts_path: str) -> str:
-    """프론트에서 재생할 수 있는 절대 URL 생성."""
-    base = os.getenv("BASE_URL", "http://127.0.0.1:8000")
+    """
+    프론트에서 재생할 수 있는 절대 URL 생성.
+    같은 문구는 같은 캐시 경로가 되므로(고정 안내 문구 등) 경로별로 결과를 캐시한다.
+    """
     fname = os.path.basename(tts_path)
-    if not _TTS_NAME_RE.match(fname):
+    if not _TTS_NAME_RE.fullmatch(fname):
         return ""
-    return f"{base}/tts/{fname}"
+    return f"{_BASE_URL}/tts/{fname}"
+
+
+
+# STT/TTS 전용 스레드풀: 기본 풀을 같이 쓰면 음성 업로드가 몰릴 때 서로 대기하므로 분리
+_POOL_WORKERS = min(16, (os.cpu_count() or 1) * 4)
+_STT_POOL = ThreadPoolExecutor(max_workers=_POOL_WORKERS, thread_name_prefix="stt")
+_TTS_POOL = ThreadPoolExecutor(max_workers=_POOL_WORKERS, thread_name_prefix="tts")
+
+
+# 자주 나가는 고정 안내 문구. 서버 시작 시 미리 합성해 .cache_tts에 넣어 둔다.
+CANNED_RESPONSES = (
+    "안녕하세요. AI음성 키오스크 말로입니다. 주문을 도와드릴게요.",
+    "포장해서 가져가시나요, 매장에서 드시나요?",
+    "주문내역을 확인하고 결제를 진행해주세요.",
+    "주문하실 메뉴를 먼저 선택해 주세요.",
+    "주문을 계속 진행해주세요.",
+    "주문을 다시 진행해주세요.",
+    "온도를 다시 선택해주세요.",
+    "사이즈를 다시 선택해주세요.",
+    "죄송해요, 잘 못 들었어요. 다시 한 번 메뉴를 말씀해 주세요.",
+    "죄송해요, 잘 못 들었어요. 다시 한 번 말씀해 주세요.",
+    "결제 수단을 선택해 주세요. 카드결제, 간편결제, 쿠폰 결제 등으로 말씀해 주세요.",
+    "카드를 삽입해주세요.",
+    "아래 바코드기에 핸드폰을 대고 인식시켜주세요.",
+    "결제가 완료되었습니다. 카드를 제거해주세요.",
+    "카드결제를 눌러주세요.",
+    "간편결제를 눌러주세요.",
+    "쿠폰결제를 눌러주세요.",
+    "현금결제를 눌러주세요.",
+    "카드결제, 간편결제, 쿠폰 결제 중에서 선택해주세요.",
+    "결제 수단을 다시 말씀해 주세요. 카드결제, 간편결제, 쿠폰 결제 등으로 말씀해 주세요.",
+    "쿠폰 결제가 완료되었습니다. 주문이 완료되었습니다. 감사합니다.",
+    "주문이 맞으면 '네', 다시 선택하시려면 '아니요'라고 말씀해 주세요.",
+    "알겠습니다. 다시 원하시는 메뉴를 말씀해 주세요.",
+    "메뉴를 다시 말씀해 주세요.",
+    "어떤 메뉴를 장바구니에서 빼드릴까요? 메뉴 이름을 말씀해 주세요.",
+    "따뜻하게 드실지, 차갑게 드실지 말씀해 주세요. 예: '아이스로 주세요'.",
+    "사이즈를 다시 말씀해 주세요. 작은 사이즈, 중간 사이즈, 큰 사이즈 중 하나를 선택해 주세요.",
+    "대화가 길어져서 새로 시작할게요. 처음부터 다시 진행합니다.",
+)
+# 합성 중인 TTS 파일명 -> 스레드풀 Future. /tts/{filename}가 파일이 준비될 때까지 기다리는 데 사용
+_PENDING_TTS: Dict[str, "asyncio.Future[str]"] = {}
+# 여러 문장 응답은 문장별로 합성/캐시한 뒤 이어 붙인다. 고정 문장("사이즈는 ... 선택해 주세요.")은 캐시를 재사용하고,
+# 합성 중에는 /tts/{filename}가 끝난 문장부터 순서대로 스트리밍한다. (파일명 -> 문장별 Future 목록)
+_PENDING_TTS_PARTS: Dict[str, list["asyncio.Future[str]"]] = {}
+_RE_SENTENCE_SPLIT = re.compile(r"(?<=[.?!])\s+")
+
+
+def _join_mp3(parts: list[str], path: str) -> str:
+    """문장별 mp3를 순서대로 이어 붙여 전체 문구 캐시 파일로 저장 (MP3 프레임은 그대로 이어 붙여도 재생됨)."""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out)
+    os.replace(tmp, path)
+    return path
+
+
+async def _synthesize_sentences(name: str, path: str, parts: list["asyncio.Future[str]"]) -> str:
+    """문장별 합성이 모두 끝나면 하나의 파일로 합친다."""
+    try:
+        results = await asyncio.gather(*parts, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return await asyncio.get_running_loop().run_in_executor(_TTS_POOL, _join_mp3, results, path)
+    finally:
+        _PENDING_TTS_PARTS.pop(name, None)
+
+
+def _track_pending(name: str, future: "asyncio.Future[str]") -> "asyncio.Future[str]":
+    """합성 Future를 _PENDING_TTS에 등록하고, 끝나면 (실패 시 로그를 남기고) 제거."""
+    _PENDING_TTS[name] = future
 
+    def _on_done(f: "asyncio.Future[str]") -> None:
+        if _PENDING_TTS.get(name) is f:
+            del _PENDING_TTS[name]
+        if not f.cancelled() and f.exception() is not None:
+            log.warning("[TTS] 합성 실패 (%s): %s", name, f.exception())
 
+    future.add_done_callback(_on_done)
+    return future
 
-def _ensure_wav(path: str) -> tuple[str, list[str]]:
+
+def _sentence_future(loop: asyncio.AbstractEventLoop, sentence: str) -> "asyncio.Future[str]":
+    """
+    문장 하나의 합성 Future. 같은 문장이 이미 합성 중이면 그 Future를 공유하고,
+    캐시 파일이 있으면 바로 완료된 Future를 돌려준다 (문장 파일당 합성 작업은 하나만).
+    """
+    path = tts_cache_path(sentence)
+    name = os.path.basename(path)
+    pending = _PENDING_TTS.get(name)
+    if pending is not None:
+        return pending
+    if os.path.exists(path):
+        done = loop.create_future()
+        done.set_result(path)
+        return done
+    return _track_pending(name, loop.run_in_executor(_TTS_POOL, synthesize, sentence))
+
+
+def _schedule_synthesis(text: str, sid: str) -> str:
+    """
+    TTS 파일 경로(md5 캐시 경로)를 바로 계산해 반환하고, 파일이 아직 없으면 TTS 스레드풀에서 합성을 시작.
+    응답은 합성을 기다리지 않고 나가며, 프론트가 tts_url을 요청하면 /tts/{filename}에서 합성 완료를 기다린다.
+    여러 문장이면 문장별로 나눠 동시에 합성한다.
+    """
+    path = tts_cache_path(text)
+    name = os.path.basename(path)
+    if name in _PENDING_TTS or os.path.exists(path):
+        return path
+
+    loop = asyncio.get_running_loop()
+    stripped = text.strip()
+    sentences = _RE_SENTENCE_SPLIT.split(stripped) if len(stripped) <= MAX_TTS_CHARS else [stripped]
+    if len(sentences) > 1:
+        parts = [_sentence_future(loop, sentence) for sentence in sentences]
+        _PENDING_TTS_PARTS[name] = parts
+        future = asyncio.ensure_future(_synthesize_sentences(name, path, parts))
+    else:
+        future = loop.run_in_executor(_TTS_POOL, partial(synthesize, text, out_path=f"response_{sid}.mp3"))
+    _track_pending(name, future)
+    return path
+
+
+# seek 없이 앞에서부터 디코딩 가능한 업로드 포맷 (ffmpeg stdin으로 바로 전달)
+_PIPE_INPUT_SUFFIXES = frozenset({".mp3"})
+
+
+def _ffmpeg_to_wav(src: BinaryIO, suffix: str, wav_buf: BinaryIO) -> None:
+    """
+    ffmpeg를 직접 실행해 16kHz mono 16bit PCM으로 디코딩하고, wave 모듈로 헤더를 붙여 wav_buf에 기록.
+    pydub처럼 AudioSegment로 읽어 파이썬에서 리샘플/재인코딩하는 단계를 거치지 않는다.
+    """
+    if suffix in _PIPE_INPUT_SUFFIXES:
+        # 스트림 포맷은 임시 파일 없이 stdin으로 바로 넘김
+        proc = subprocess.run(
+            [_FFMPEG_PATH, "-v", "error", "-i", "pipe:0",
+             "-ac", "1", "-ar", "16000", "-f", "s16le", "pipe:1"],
+            input=src.read(),
+            capture_output=True,
+            check=True,
+        )
+    else:
+        # m4a/3gp(mp4 계열)는 디코딩 중 seek가 필요할 수 있어 입력은 파이프 대신 임시 파일로 넘김
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            shutil.copyfileobj(src, tmp, 1 << 16)
+            in_path = tmp.name
+        try:
+            proc = subprocess.run(
+                [_FFMPEG_PATH, "-v", "error", "-nostdin", "-i", in_path,
+                 "-ac", "1", "-ar", "16000", "-f", "s16le", "pipe:1"],
+                capture_output=True,
+                check=True,
+            )
+        finally:
+            try:
+                os.remove(in_path)
+            except OSError:
+                pass
+    # 파이프 출력 WAV는 헤더 길이를 채울 수 없으므로 raw PCM을 받아 헤더는 직접 기록
+    with wave.open(wav_buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(proc.stdout)
+
+
+def _is_wav_data(src: BinaryIO) -> bool:
+    """확장자와 상관없이 내용이 이미 WAV(RIFF....WAVE)인지 앞 12바이트로 확인. 읽은 뒤 위치는 처음으로 되돌린다."""
+    head = src.read(12)
+    src.seek(0)
+    return len(head) == 12 and head[:4] == b"RIFF" and head[8:] == b"WAVE"
+
+
+def _ensure_wav(src: BinaryIO, suffix: str) -> tuple[BinaryIO, list[BinaryIO]]:
     """
     Whisper는 다양한 포맷을 지원하지만, 운영 편의를 위해 서버 내에서는
-    항상 WAV로 변환된 파일 경로를 사용한다.
+    항상 WAV로 변환된 오디오 버퍼를 사용한다.
+    짧은 발화는 디스크를 거치지 않도록 SpooledTemporaryFile(메모리)에 변환한다.
     3gp 파일은 명시적으로 포맷을 지정하여 변환한다.
+    확장자와 상관없이 내용이 이미 WAV면 ffmpeg를 실행하지 않고 그대로 쓰고,
+    .wav라도 내용이 WAV가 아니면 변환한다.
     """
-    cleanup_targets = [path]
-    if path.lower().endswith(".wav"):
-        return path, cleanup_targets
+    src.seek(0)
+    if _is_wav_data(src):
+        return src, []
+    if not _FFMPEG_OK:
+        # 시작 시 ffmpeg 확인에 실패했으면 버퍼를 만들기 전에 바로 실패
+        raise HTTPException(status_code=500, detail=_FFMPEG_MISSING_MSG)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_wav:
-        wav_path = tmp_wav.name
+    wav_buf = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES, suffix=".wav")
 
     try:
-        # 파일 확장자에 따라 포맷 명시
-        file_ext = os.path.splitext(path)[1].lower()
-        
-        # 3gp 파일은 명시적으로 포맷 지정
-        if file_ext == ".3gp":
-            # 3gp는 AMR 또는 AAC 코덱을 사용할 수 있으므로 포맷을 명시
-            audio = AudioSegment.from_file(path, format="3gp")
-        elif file_ext == ".m4a":
-            audio = AudioSegment.from_file(path, format="m4a")
-        elif file_ext == ".mp3":
-            audio = AudioSegment.from_file(path, format="mp3")
-        else:
-            # 기타 포맷은 자동 감지
-            audio = AudioSegment.from_file(path)
-        
-        # WAV로 변환 (16kHz, mono로 정규화하여 Whisper에 최적화)
-        audio = audio.set_frame_rate(16000).set_channels(1)
-        audio.export(wav_path, format="wav")
+        # 직접 16kHz mono로 디코딩 (Whisper에 최적화)
+        _ffmpeg_to_wav(src, suffix, wav_buf)
+        wav_buf.seek(0)
         
     except FileNotFoundError as exc:
-        # 주로 ffmpeg 바이너리를 찾지 못했을 때 발생
-        try:
-            os.remove(wav_path)
-        except OSError:
-            pass
-        err_msg = (
-            "오디오 변환 실패: ffmpeg 실행 파일을 찾을 수 없습니다. "
-            "시스템 PATH에 ffmpeg를 추가하거나 환경변수 FFMPEG_BINARY를 설정해 주세요."
+        # 시작 후 ffmpeg 바이너리가 사라진 경우
+        wav_buf.close()
+        raise HTTPException(status_code=500, detail=_FFMPEG_MISSING_MSG) from exc
+    except subprocess.CalledProcessError as exc:
+        wav_buf.close()
+        stderr = (exc.stderr or b"").decode("utf-8", errors="replace").strip()
+        raise HTTPException(
+            status_code=400,
+            detail=f"오디오 변환 실패 ({suffix}): 오디오 파일이 손상되었거나 지원되지 않는 형식입니다: {stderr}",
         )
-        raise HTTPException(status_code=500, detail=err_msg) from exc
     except Exception as exc:
-        # 생성 실패 시 임시 WAV도 정리
-        try:
-            os.remove(wav_path)
-        except OSError:
-            pass
+        # 생성 실패 시 임시 WAV 버퍼도 정리
+        wav_buf.close()
         # 더 자세한 오류 메시지
         error_detail = str(exc)
         if "Invalid data" in error_detail or "Invalid" in error_detail:
             error_detail = f"오디오 파일이 손상되었거나 지원되지 않는 형식입니다: {error_detail}"
-        raise HTTPException(status_code=400, detail=f"오디오 변환 실패 ({file_ext}): {error_detail}")
+        raise HTTPException(status_code=400, detail=f"오디오 변환 실패 ({suffix}): {error_detail}")
+
+    return wav_buf, [wav_buf]
+
+
+def _is_silent_wav(buf: BinaryIO) -> bool:
+    """
+    16bit PCM WAV의 최대 진폭이 _SILENCE_PEAK 미만이면 무음으로 판단.
+    무음에 Whisper를 부르면 비용만 들고 엉뚱한 문장을 지어내는 경우가 있어 미리 거른다.
+    확인 후 버퍼 위치는 처음으로 되돌린다.
+    """
+    try:
+        with wave.open(buf, "rb") as w:
+            if w.getsampwidth() != 2:
+                return False
+            samples = array("h", w.readframes(w.getnframes()))
+    except (wave.Error, EOFError):
+        return False
+    finally:
+        buf.seek(0)
+    if sys.byteorder == "big":
+        samples.byteswap()  # WAV는 리틀 엔디언
+    return not samples or (max(samples) < _SILENCE_PEAK and min(samples) > -_SILENCE_PEAK)
 
-    cleanup_targets.append(wav_path)
-    return wav_path, cleanup_targets
+
+def _transcribe_wav(wav_buf: BinaryIO) -> str:
+    """변환된 WAV를 STT. 무음이면 Whisper를 호출하지 않고 빈 문자열을 돌려 재질문하게 한다."""
+    if _is_silent_wav(wav_buf):
+        log.debug("[STT] 무음 업로드, Whisper 호출 생략")
+        return ""
+    return transcribe_fileobj(wav_buf, filename="audio.wav", language="ko")
 
 
-def _cleanup_temp_files(paths: Iterable[str]) -> None:
-    """임시 파일 삭제 시 예외를 무시하고 진행."""
-    for path in paths:
-        if not path:
+def _cleanup_temp_files(buffers: Iterable[BinaryIO]) -> None:
+    """임시 버퍼 정리. 메모리에만 있던 버퍼는 close만 하면 되고, 디스크로 넘친 경우 close 시 삭제된다."""
+    for buf in buffers:
+        if buf is None:
             continue
         try:
-            os.remove(path)
+            buf.close()
         except OSError:
             pass
 
@@ -196,84 +452,163 @@ def _now() -> float:
     return time.time()
 
 
-def _expired(ts: float) -> bool:
-    return (_now() - ts) > SESSION_TTL
+def _expired(ts: float, now: float | None = None) -> bool:
+    """now를 넘기면 시각을 다시 읽지 않고 그 값으로 만료 여부를 판단."""
+    return ((_now() if now is None else now) - ts) > SESSION_TTL
 
 
-def _new_session_ctx() -> Dict[str, Any]:
-    """새 세션 기본 상태."""
+def _default_options() -> Dict[str, Any]:
     return {
-        # 대화 단계:
-        # greeting -> dine_type -> menu_item -> temp/size -> options -> add_more -> review -> phone -> payment -> card -> done
-        "step": "greeting",
-        "turns": 0,
-        "dine_type": None,        # takeout / dinein
-        "category": None,         # coffee / ade / tea / dessert
-        "menu_id": None,
-        "menu_name": None,
-        "temp": None,             # hot / ice
-        "size": None,             # tall / grande / venti / ...
-        "options": {
-            "extra_shot": 0,      # 커피: 샷 추가
-            "syrup": False,       # 커피: 시럽 추가
-            "decaf": None,        # 커피: 디카페인 여부
-            "sweetness": None,    # 에이드: low / normal / high
-        },
-        "quantity": 1,
-        "payment_method": None,   # card / cash / kakaopay / ...
+        "extra_shot": 0,      # 커피: 샷 추가
+        "syrup": False,       # 커피: 시럽 추가
+        "decaf": None,        # 커피: 디카페인 여부
+        "sweetness": None,    # 에이드: low / normal / high
     }
 
 
+@dataclass(slots=True)
+class SessionCtx:
+    """세션 상태. 고정 필드만 가지므로 dict 대신 slots 데이터클래스로 보관한다."""
+    # 대화 단계:
+    # greeting -> dine_type -> menu_item -> temp/size -> options -> add_more -> review -> phone -> payment -> card -> done
+    step: str = "greeting"
+    turns: int = 0
+    dine_type: str | None = None        # takeout / dinein
+    category: str | None = None         # coffee / ade / tea / dessert
+    menu_id: str | None = None
+    menu_name: str | None = None
+    temp: str | None = None             # hot / ice
+    size: str | None = None             # tall / grande / venti / ...
+    options: Dict[str, Any] = field(default_factory=_default_options)
+    quantity: int = 1
+    payment_method: str | None = None   # card / cash / kakaopay / ...
+
+    # 턴 처리용 일시 필드 (reset 시에도 유지)
+    add_to_cart: bool = False           # 장바구니 추가 플래그
+    remove_from_cart: bool = False      # 장바구니 제거 플래그
+    remove_menu_category: str | None = None
+    remove_menu_id: str | None = None
+    remove_menu_name: str | None = None
+    target_element_id: str | None = None
+    last_response: Dict[str, Any] | None = None
+
+    def reset(self) -> None:
+        """주문 상태를 새 세션 기본값으로 되돌린다 (일시 필드는 유지)."""
+        fresh = SessionCtx()
+        for name in _ORDER_FIELDS:
+            setattr(self, name, getattr(fresh, name))
+
+
+# reset 대상 필드 (스냅샷에 내려가는 주문 상태 + turns)
+_ORDER_FIELDS = (
+    "step", "turns", "dine_type", "category", "menu_id", "menu_name",
+    "temp", "size", "options", "quantity", "payment_method",
+)
+
+
+def _touch_session(session_id: str, now: float) -> None:
+    """마지막 활동 시각 갱신. 갱신된 세션은 맨 뒤로 보내 SESS_META를 오래된 순으로 유지."""
+    SESS_META[session_id] = now
+    SESS_META.move_to_end(session_id)
+
+
+def _evict_expired_sessions(now: float) -> None:
+    """만료된 세션을 앞(가장 오래된 것)에서부터 제거. 만료되지 않은 세션을 만나면 바로 멈춘다."""
+    while SESS_META:
+        sid, ts = next(iter(SESS_META.items()))
+        if not _expired(ts, now):
+            break
+        SESS_META.popitem(last=False)
+        SESSIONS.pop(sid, None)
+
+
 def _ensure_session(session_id: str | None = None):
-    if session_id and session_id in SESSIONS and not _expired(SESS_META.get(session_id, 0)):
+    now = _now()
+    _evict_expired_sessions(now)
+    if session_id and session_id in SESSIONS and not _expired(SESS_META.get(session_id, 0), now):
         ctx = SESSIONS[session_id]
     else:
-        session_id = session_id or uuid.uuid4().hex
-        ctx = _new_session_ctx()
+        session_id = session_id or secrets.token_hex(16)
+        ctx = SessionCtx()
         SESSIONS[session_id] = ctx
-    SESS_META[session_id] = _now()
+    _touch_session(session_id, now)
     return session_id, ctx
 
 
-def _ctx_snapshot(ctx: Dict[str, Any]) -> dict:
+def _ctx_snapshot(ctx: SessionCtx) -> dict:
     """프론트/백엔드에 내려줄 현재 상태 요약."""
     snapshot = {
-        "step": ctx.get("step"),
-        "dine_type": ctx.get("dine_type"),
-        "category": ctx.get("category"),
-        "menu_id": ctx.get("menu_id"),
-        "menu_name": ctx.get("menu_name"),
-        "temp": ctx.get("temp"),
-        "size": ctx.get("size"),
-        "options": ctx.get("options"),
-        "quantity": ctx.get("quantity"),
-        "payment_method": ctx.get("payment_method"),
+        "step": ctx.step,
+        "dine_type": ctx.dine_type,
+        "category": ctx.category,
+        "menu_id": ctx.menu_id,
+        "menu_name": ctx.menu_name,
+        "temp": ctx.temp,
+        "size": ctx.size,
+        "options": ctx.options,
+        "quantity": ctx.quantity,
+        "payment_method": ctx.payment_method,
     }
     # 최근 응답 정보가 있으면 포함
-    if "last_response" in ctx:
-        snapshot["last_response"] = ctx.get("last_response")
+    if ctx.last_response is not None:
+        snapshot["last_response"] = ctx.last_response
     return snapshot
 
 
+def _turn_response(
+    sid: str,
+    ctx: SessionCtx,
+    stt_text: str | None,
+    resp_text: str,
+    target_element_id: str | None = None,
+    **extra: Any,
+) -> dict:
+    """
+    /session/text, /session/voice 공통 응답 생성 후 세션에 최근 응답으로 저장.
+    TTS는 백그라운드로 합성하고 미리 계산된 경로/URL만 담아 바로 응답한다.
+    """
+    tts_path = _schedule_synthesis(resp_text, sid)
+    now = _now()
+    _touch_session(sid, now)
+
+    response = {
+        "stt_text": stt_text,
+        "response_text": resp_text,
+        "tts_path": tts_path,
+        "tts_url": _make_tts_url(tts_path) or None,
+        "context": _ctx_snapshot(ctx),
+        "backend_payload": _build_backend_payload(ctx),
+        "target_element_id": target_element_id,  # 프론트에서 하이라이트 용도로 사용
+        **extra,
+    }
+    # 저장본의 context에서는 이전 last_response를 빼서 턴마다 응답이 중첩되며 커지지 않게 함
+    context = {k: v for k, v in response["context"].items() if k != "last_response"}
+    ctx.last_response = {**response, "context": context, "processed_at": now}
+    return response
+
+
 def _reprompt_if_empty(text: str | None) -> str | None:
-    """완전 공백일 때만 재질문. '네', '응' 같은 한 글자는 허용."""
-    if text is None or not text.strip():
+    """
+    공백이거나 글자/숫자 없이 구두점·기호뿐인 발화(STT 잡음 "...", "♪" 등)면 재질문.
+    '네', '응' 같은 한 글자와 숫자("2")는 허용.
+    """
+    if text is None or not any(ch.isalnum() for ch in text):
         return "죄송해요, 잘 못 들었어요. 다시 한 번 말씀해 주세요."
     return None
 
 
-def _maybe_close_if_too_long(sid: str, ctx: Dict[str, Any]):
-    """턴 수가 많아지면 세션 정리."""
-    ctx["turns"] = ctx.get("turns", 0) + 1
-    if ctx["turns"] > MAX_TURNS:
+def _maybe_close_if_too_long(sid: str, ctx: SessionCtx):
+    """턴 수가 많아지면 세션 정리. 세션이 없어지므로 종료 응답은 /session/result로 조회할 수 없다."""
+    ctx.turns += 1
+    if ctx.turns > MAX_TURNS:
         resp = "대화가 길어져서 새로 시작할게요. 처음부터 다시 진행합니다."
-        tts = synthesize(resp, out_path=f"response_{sid}.mp3")
+        tts = _schedule_synthesis(resp, sid)
         SESSIONS.pop(sid, None)
         SESS_META.pop(sid, None)
         return {
             "response_text": resp,
             "tts_path": tts,
-            "tts_url": _make_tts_url(tts),
+            "tts_url": _make_tts_url(tts) or None,
             "context": None,
             "backend_payload": None,
             "target_element_id": None,
@@ -284,9 +619,41 @@ def _maybe_close_if_too_long(sid: str, ctx: Dict[str, Any]):
 # ───────────────────────────────────────────────
 # 파싱 함수들 (dine_type, category, menu, temp, size, options, payment)
 # ───────────────────────────────────────────────
+# 공백/구두점 제거용 변환 테이블 (replace 연쇄 대신 한 번의 translate로 처리)
+_STRIP_TABLE = str.maketrans("", "", " .,\t\n")
+
+
+@lru_cache(maxsize=1024)
+def _norm(s: str) -> str:
+    """
+    파서 공통 정규화: 공백·마침표·쉼표 제거 후 소문자 변환.
+    한 턴에 여러 파서가 같은 발화로 부르고, 한글 문자열의 translate는 글자마다 테이블 조회라 결과를 캐시한다.
+    """
+    return s.translate(_STRIP_TABLE).lower()
+
+
+_SPACE_TABLE = str.maketrans("", "", " \t\n\r")
+
+
+@lru_cache(maxsize=1024)
+def _compact(s: str) -> str:
+    """의도 키워드 판별용 정규화: 공백만 제거 후 소문자 변환 (구두점은 유지). _norm과 같은 이유로 캐시."""
+    return s.translate(_SPACE_TABLE).lower()
+
+
+def _keyword_pattern(words: Iterable[str]) -> re.Pattern:
+    """
+    키워드 포함 여부(search) 판별용 정규식.
+    다른 키워드를 품고 있는 긴 키워드("결제하기" ⊃ "결제")는 판별 결과에 영향이 없으므로 빼고 컴파일한다.
+    """
+    words = set(words)
+    kept = sorted(w for w in words if not any(o != w and o in w for o in words))
+    return re.compile("|".join(map(re.escape, kept)))
+
+
 def _parse_dine_type(text: str) -> str | None:
-    t = text.replace(" ", "")
-    if "포장" in t or "들고갈" in t or "가져갈" in t:
+    t = _norm(text)
+    if "포장" in t or "들고갈" in t or "가져갈" in t or "테이크아웃" in t:
         return "takeout"
     if "매장" in t or "먹고갈" in t or "여기서" in t:
         return "dinein"
@@ -294,7 +661,7 @@ def _parse_dine_type(text: str) -> str | None:
 
 
 def _parse_category(text: str) -> str | None:
-    t = text.replace(" ", "")
+    t = _norm(text)
     if "커피" in t:
         return "coffee"
     if "에이드" in t or "음료" in t:
@@ -339,50 +706,41 @@ def _menu_choices_for_category(cat: str):
     return []
 
 
+_MENU_CATEGORIES = ("coffee", "ade", "tea", "dessert")
+
+# 카테고리별 (정규화된 메뉴명 key, menu_id, menu_name) 인덱스 (모듈 로드 시 1회 생성)
+# key: 메뉴명에서 공백과 "티" 제거 (예: "캐모마일 티" -> "캐모마일")
+_MENU_INDEX_BY_CAT: Dict[str, tuple[tuple[str, str, str], ...]] = {
+    cat: tuple(
+        (name.replace(" ", "").replace("티", "").lower(), mid, name)
+        for mid, name in _menu_choices_for_category(cat)
+    )
+    for cat in _MENU_CATEGORIES
+}
+
+
+@lru_cache(maxsize=2048)
 def _parse_menu_item(category: str | None, text: str) -> tuple[str, str, str] | None:
     """
     사용자 발화에서 메뉴를 찾아 (category, menu_id, menu_name) 반환.
-    category가 지정되어 있어도, 해당 카테고리에서 찾지 못하면 전체 카테고리에서 검색.
+    category가 지정되어 있으면 해당 카테고리를 먼저 보고, 없으면 나머지 카테고리를 한 번씩만 검색.
+    같은 턴에서 엔드포인트(메뉴+액션 판별)와 _handle_turn 폴백이 같은 인자로 다시 부르므로 결과를 캐시한다.
     """
     # 공백 제거 및 소문자 변환 (한글은 소문자 변환이 없지만 일관성을 위해)
-    t = text.replace(" ", "").replace(".", "").replace(",", "").lower()
+    t = _norm(text)
     
-    print(f"[메뉴 파싱] 입력 텍스트: '{text}' (정규화: '{t}'), 카테고리: {category or '전체'}")
+    log.debug("[메뉴 파싱] 입력 텍스트: %r (정규화: %r), 카테고리: %s", text, t, category or "전체")
     
-    # 1단계: category가 지정되어 있으면 먼저 해당 카테고리에서 검색
     if category:
-        categories_to_search = [category]
-        for cat in categories_to_search:
-            # 정확한 메뉴명 매칭 (공백 제거 후 포함 여부 확인)
-            for mid, name in _menu_choices_for_category(cat):
-                # 메뉴명에서 공백과 "티" 제거 (예: "캐모마일 티" -> "캐모마일")
-                key = name.replace(" ", "").replace("티", "").lower()
-                # 메뉴명이 텍스트에 포함되어 있는지 확인
-                if key in t:
-                    print(f"[메뉴 파싱] 정확한 메뉴명 매칭 성공: {name} (key='{key}' in t='{t}')")
-                    return cat, mid, name
-            
-            # 별칭 처리 (발음 변형 포함)
-            result = _try_parse_menu_alias(cat, t)
-            if result:
-                return result
-        
-        # 지정된 카테고리에서 찾지 못했으면 전체 카테고리에서 검색
-        print(f"[메뉴 파싱] 카테고리 '{category}'에서 찾지 못함, 전체 카테고리에서 검색 시작")
-        categories_to_search = ["coffee", "ade", "tea", "dessert"]
+        categories_to_search = (category,) + tuple(c for c in _MENU_CATEGORIES if c != category)
     else:
-        # category가 None이면 전체 카테고리에서 검색
-        categories_to_search = ["coffee", "ade", "tea", "dessert"]
+        categories_to_search = _MENU_CATEGORIES
     
-    # 2단계: 전체 카테고리에서 검색
     for cat in categories_to_search:
-        # 정확한 메뉴명 매칭 (공백 제거 후 포함 여부 확인)
-        for mid, name in _menu_choices_for_category(cat):
-            # 메뉴명에서 공백과 "티" 제거 (예: "캐모마일 티" -> "캐모마일")
-            key = name.replace(" ", "").replace("티", "").lower()
-            # 메뉴명이 텍스트에 포함되어 있는지 확인
+        # 정확한 메뉴명 매칭 (메뉴명 key가 텍스트에 포함되어 있는지 확인)
+        for key, mid, name in _MENU_INDEX_BY_CAT.get(cat, ()):
             if key in t:
-                print(f"[메뉴 파싱] 정확한 메뉴명 매칭 성공: {name} (key='{key}' in t='{t}')")
+                log.debug("[메뉴 파싱] 정확한 메뉴명 매칭 성공: %s (key=%r in t=%r)", name, key, t)
                 return cat, mid, name
         
         # 별칭 처리 (발음 변형 포함)
@@ -393,70 +751,93 @@ def _parse_menu_item(category: str | None, text: str) -> tuple[str, str, str] |
     return None
 
 
-def _try_parse_menu_alias(cat: str, t: str) -> tuple[str, str, str] | None:
-    """별칭 처리 (발음 변형 포함)"""
-    if cat == "coffee":
+def _parse_menu_item_exact(text: str) -> tuple[str, str, str] | None:
+    """
+    발화에 정확한 메뉴명이 딱 하나만 들어 있으면 (category, menu_id, menu_name) 반환.
+    별칭(발음 변형)만 맞거나 여러 메뉴가 함께 나오면("아메리카노 말고 라떼") None을 돌려 LLM 판단에 맡긴다.
+    """
+    t = _norm(text)
+    hit = None
+    for cat in _MENU_CATEGORIES:
+        for key, mid, name in _MENU_INDEX_BY_CAT[cat]:
+            if key in t:
+                if hit is not None:
+                    return None
+                hit = (cat, mid, name)
+    return hit
+
+
+# 카테고리별 메뉴 별칭(발음 변형 포함) 패턴. 메뉴마다 별칭들을 하나의 정규식으로 미리 컴파일
+_MENU_ALIAS_WORDS: Dict[str, tuple[tuple[str, str, list[str]], ...]] = {
+    "coffee": (
         # 아메리카노: 아메리카노, 아메리까노, 아메레카노, 아메리코노, 아메르카노, 아메리카노우, 아메라고, 아메르가노, 아메니카노, 아메리카루, 아메리노
-        if any(x in t for x in ["아메리카노", "아메리까노", "아메레카노", "아메리코노", "아메르카노", "아메리카노우", "아메라고", "아메르가노", "아메니카노", "아메리카루", "아메리노", "아메"]):
-            return "coffee", "COFFEE_AMERICANO", "아메리카노"
+        ("COFFEE_AMERICANO", "아메리카노", ["아메리카노", "아메리까노", "아메레카노", "아메리코노", "아메르카노", "아메리카노우", "아메라고", "아메르가노", "아메니카노", "아메리카루", "아메리노", "아메"]),
         # 에스프레소: 에스프레소, 에스뿌레소, 에스쁘레소, 에스프래소, 에스프라쏘, 에스플레소, 에스프레수, 에스프레쏘오, 에스프로소, 에스뿌레쏘
-        if any(x in t for x in ["에스프레소", "에스뿌레소", "에스쁘레소", "에스프래소", "에스프라쏘", "에스플레소", "에스프레수", "에스프레쏘오", "에스프로소", "에스뿌레쏘"]) or \
-           (("에스프" in t or "애스프" in t or "에스뿌" in t or "에스쁘" in t) and any(x in t for x in ["레소", "라소", "래소", "래쏘", "레쏘", "레쏘오", "로소", "레수"])):
-            return "coffee", "COFFEE_ESPRESSO", "에스프레소"
+        ("COFFEE_ESPRESSO", "에스프레소", ["에스프레소", "에스뿌레소", "에스쁘레소", "에스프래소", "에스프라쏘", "에스플레소", "에스프레수", "에스프레쏘오", "에스프로소", "에스뿌레쏘"]),
         # 카페 라떼: 라떼이, 라테이, 라떼요, 라테요, 라떼우, 라테우, 카페라떼, 카페라테, 카페라뗴, 카페라떼이
-        if any(x in t for x in ["라떼이", "라테이", "라떼요", "라테요", "라떼우", "라테우", "카페라떼", "카페라테", "카페라뗴", "카페라떼이", "라떼", "라테"]):
-            return "coffee", "COFFEE_LATTE", "카페 라떼"
+        ("COFFEE_LATTE", "카페 라떼", ["라떼이", "라테이", "라떼요", "라테요", "라떼우", "라테우", "카페라떼", "카페라테", "카페라뗴", "카페라떼이", "라떼", "라테"]),
         # 카푸치노: 카푸치노우, 카푸치노오, 카푸찌노, 카푸치노어, 카프치노, 카뿌치노
-        if any(x in t for x in ["카푸치노우", "카푸치노오", "카푸찌노", "카푸치노어", "카프치노", "카뿌치노", "카푸치노", "카푸"]):
-            return "coffee", "COFFEE_CAPPUCCINO", "카푸치노"
-    elif cat == "ade":
+        ("COFFEE_CAPPUCCINO", "카푸치노", ["카푸치노우", "카푸치노오", "카푸찌노", "카푸치노어", "카프치노", "카뿌치노", "카푸치노", "카푸"]),
+    ),
+    "ade": (
         # 레몬에이드: 레몬에이, 레몬에이두, 레몬에이더, 레몬애이드, 레몬네이드, 레몬네이, 레몽에이드, 레멍에이드
-        if any(x in t for x in ["레몬에이", "레몬에이두", "레몬에이더", "레몬애이드", "레몬네이드", "레몬네이", "레몽에이드", "레멍에이드", "레몬", "레몽"]):
-            return "ade", "ADE_LEMON", "레몬에이드"
+        ("ADE_LEMON", "레몬에이드", ["레몬에이", "레몬에이두", "레몬에이더", "레몬애이드", "레몬네이드", "레몬네이", "레몽에이드", "레멍에이드", "레몬", "레몽"]),
         # 자몽에이드: 자몽에이, 자몽에이더, 자몽애이드, 자몽네이드, 자몽네이, 자몽에이두, 자몽에두, 자뭉에이드
-        if any(x in t for x in ["자몽에이", "자몽에이더", "자몽애이드", "자몽네이드", "자몽네이", "자몽에이두", "자몽에두", "자뭉에이드", "자몽"]):
-            return "ade", "ADE_GRAPEFRUIT", "자몽에이드"
+        ("ADE_GRAPEFRUIT", "자몽에이드", ["자몽에이", "자몽에이더", "자몽애이드", "자몽네이드", "자몽네이", "자몽에이두", "자몽에두", "자뭉에이드", "자몽"]),
         # 청포도 에이드: 청포도에이, 청포도에이더, 청포도네이드, 청포도네이, 청포도에이두, 청포도에두, 쳥포도 에이드, 청포도에듀
-        if any(x in t for x in ["청포도에이", "청포도에이더", "청포도네이드", "청포도네이", "청포도에이두", "청포도에두", "쳥포도", "청포도에듀", "청포도"]):
-            return "ade", "ADE_GREEN_GRAPE", "청포도 에이드"
+        ("ADE_GREEN_GRAPE", "청포도 에이드", ["청포도에이", "청포도에이더", "청포도네이드", "청포도네이", "청포도에이두", "청포도에두", "쳥포도", "청포도에듀", "청포도"]),
         # 오렌지 에이드: 오렌지에이, 오렌지에이더, 오렌지네이드, 오렌지네이, 오렌지애이드, 오랜지 에이드, 오렌지에두, 오렌지두
-        if any(x in t for x in ["오렌지에이", "오렌지에이더", "오렌지네이드", "오렌지네이", "오렌지애이드", "오랜지", "오렌지에두", "오렌지두", "오렌지"]):
-            return "ade", "ADE_ORANGE", "오렌지 에이드"
-    elif cat == "tea":
+        ("ADE_ORANGE", "오렌지 에이드", ["오렌지에이", "오렌지에이더", "오렌지네이드", "오렌지네이", "오렌지애이드", "오랜지", "오렌지에두", "오렌지두", "오렌지"]),
+    ),
+    "tea": (
         # 캐모마일: 카모마일, 카모마일티, 카모, 캐모마일티, 캐모마일트, 캐모말, 캐모마, 케모마일, 카모메일
-        if any(x in t for x in ["카모마일", "카모마일티", "카모", "캐모마일티", "캐모마일트", "캐모말", "캐모마", "케모마일", "카모메일", "캐모마일", "캐모"]):
-            return "tea", "TEA_CHAMOMILE", "캐모마일 티"
+        ("TEA_CHAMOMILE", "캐모마일 티", ["카모마일", "카모마일티", "카모", "캐모마일티", "캐모마일트", "캐모말", "캐모마", "케모마일", "카모메일", "캐모마일", "캐모"]),
         # 얼그레이: 얼그레이이, 얼그레, 얼그레잉, 얼그레잇, 얼그레에, 얼그레어, 얼그레오, 얼그레히, 얼글레이, 얼끌레이
-        if any(x in t for x in ["얼그레이이", "얼그레", "얼그레잉", "얼그레잇", "얼그레에", "얼그레어", "얼그레오", "얼그레히", "얼글레이", "얼끌레이", "얼그레이", "얼그"]):
-            return "tea", "TEA_EARL_GREY", "얼그레이 티"
+        ("TEA_EARL_GREY", "얼그레이 티", ["얼그레이이", "얼그레", "얼그레잉", "얼그레잇", "얼그레에", "얼그레어", "얼그레오", "얼그레히", "얼글레이", "얼끌레이", "얼그레이", "얼그"]),
         # 유자차: 유자챠, 유자차이, 유자차우, 유자타, 유자자, 유자티, 유자차
-        if any(x in t for x in ["유자챠", "유자차이", "유자차우", "유자타", "유자자", "유자티", "유자차", "유자"]):
-            return "tea", "TEA_YUJA", "유자차"
+        ("TEA_YUJA", "유자차", ["유자챠", "유자차이", "유자차우", "유자타", "유자자", "유자티", "유자차", "유자"]),
         # 녹차: 녹챠, 녹차이, 녹차우, 녹차어, 눅차, 녹타, 록차
-        if any(x in t for x in ["녹챠", "녹차이", "녹차우", "녹차어", "눅차", "녹타", "록차", "녹차"]):
-            return "tea", "TEA_GREEN", "녹차"
-    elif cat == "dessert":
+        ("TEA_GREEN", "녹차", ["녹챠", "녹차이", "녹차우", "녹차어", "눅차", "녹타", "록차", "녹차"]),
+    ),
+    "dessert": (
         # 치즈케이크: 치즈케키, 치즈케잌, 치즈케익, 치즈케잌크, 치즈케에크, 치케, 치즈케이, 치즈케에익, 지즈케이크, 치츠케이크
-        if any(x in t for x in ["치즈케키", "치즈케잌", "치즈케익", "치즈케잌크", "치즈케에크", "치케", "치즈케이", "치즈케에익", "지즈케이크", "치츠케이크", "치즈케이크", "치즈케", "치즈"]):
-            return "dessert", "DESSERT_CHEESECAKE", "치즈케이크"
+        ("DESSERT_CHEESECAKE", "치즈케이크", ["치즈케키", "치즈케잌", "치즈케익", "치즈케잌크", "치즈케에크", "치케", "치즈케이", "치즈케에익", "지즈케이크", "치츠케이크", "치즈케이크", "치즈케", "치즈"]),
         # 티라미수: 티라미슈, 티라미스, 티람이수, 티라미쑤우, 티라미소, 티라미쓰, 티라미슈우, 디라미수
-        if any(x in t for x in ["티라미슈", "티라미스", "티람이수", "티라미쑤우", "티라미소", "티라미쓰", "티라미슈우", "디라미수", "티라미수", "티라미쑤", "티라"]):
-            return "dessert", "DESSERT_TIRAMISU", "티라미수"
+        ("DESSERT_TIRAMISU", "티라미수", ["티라미슈", "티라미스", "티람이수", "티라미쑤우", "티라미소", "티라미쓰", "티라미슈우", "디라미수", "티라미수", "티라미쑤", "티라"]),
         # 브라우니: 브라운니, 브라오니, 브라우니이, 브라우니우, 브라우닝, 브라오니, 브라운이
-        if any(x in t for x in ["브라운니", "브라오니", "브라우니이", "브라우니우", "브라우닝", "브라운이", "브라우니", "브라우"]):
-            return "dessert", "DESSERT_BROWNIE", "초코 브라우니"
+        ("DESSERT_BROWNIE", "초코 브라우니", ["브라운니", "브라오니", "브라우니이", "브라우니우", "브라우닝", "브라운이", "브라우니", "브라우"]),
         # 크루아상: 크루와상, 크로와상, 크로아상, 크루아쌍, 크루아쌍그, 크루아송, 크루아샹, 크로와쌍
-        if any(x in t for x in ["크루와상", "크로와상", "크로아상", "크루아쌍", "크루아쌍그", "크루아송", "크루아샹", "크로와쌍", "크루아상", "크루아"]):
-            return "dessert", "DESSERT_CROISSANT", "크루아상"
+        ("DESSERT_CROISSANT", "크루아상", ["크루와상", "크로와상", "크로아상", "크루아쌍", "크루아쌍그", "크루아송", "크루아샹", "크로와쌍", "크루아상", "크루아"]),
         # 마카롱: 마카론, 마까롱, 마카롱, 마카롱우, 마카롬, 마카롤, 마까론
-        if any(x in t for x in ["마카론", "마까롱", "마카롱", "마카롱우", "마카롬", "마카롤", "마까론", "마카", "마까"]):
-            return "dessert", "DESSERT_MACARON", "마카롱"
-    
+        ("DESSERT_MACARON", "마카롱", ["마카론", "마까롱", "마카롱", "마카롱우", "마카롬", "마카롤", "마까론", "마카", "마까"]),
+    ),
+}
+
+# 별칭 목록 외에 추가로 허용하는 패턴.
+# 에스프레소는 앞부분(에스프/애스프/에스뿌/에스쁘)과 뒷부분(레소/라소 등)이 따로 인식돼도 매칭
+_MENU_ALIAS_EXTRA = {
+    "COFFEE_ESPRESSO": r"^(?=.*(?:에스프|애스프|에스뿌|에스쁘))(?=.*(?:레소|라소|래소|래쏘|레쏘|레쏘오|로소|레수))",
+}
+
+_MENU_ALIAS_PATTERNS: Dict[str, tuple[tuple[re.Pattern, str, str], ...]] = {
+    cat: tuple(
+        (re.compile("|".join([*map(re.escape, words), *filter(None, [_MENU_ALIAS_EXTRA.get(mid)])])), mid, name)
+        for mid, name, words in aliases
+    )
+    for cat, aliases in _MENU_ALIAS_WORDS.items()
+}
+
+
+def _try_parse_menu_alias(cat: str, t: str) -> tuple[str, str, str] | None:
+    """별칭 처리 (발음 변형 포함)"""
+    for pattern, mid, name in _MENU_ALIAS_PATTERNS.get(cat, ()):
+        if pattern.search(t):
+            return cat, mid, name
     return None
 
 
 def _parse_temp(text: str) -> str | None:
-    t = text.replace(" ", "")
+    t = _norm(text)
     if "아이스" in t or "차갑" in t:
         return "ice"
     if "뜨겁" in t or "뜨거" in t or "따뜻" in t or "핫" in t:
@@ -465,7 +846,7 @@ def _parse_temp(text: str) -> str | None:
 
 
 def _parse_size(text: str) -> str | None:
-    t = text.replace(" ", "").lower()
+    t = _norm(text)
     # 작은사이즈 그대로 반환
     if "작은사이즈" in t or ("작은" in t and "사이즈" in t):
         return "작은사이즈"
@@ -492,7 +873,7 @@ def _parse_size(text: str) -> str | None:
 
 
 def _parse_options(category: str, text: str, options: dict):
-    t = text.replace(" ", "").lower()
+    t = _norm(text)
 
     if category == "coffee":
         # 디카페인
@@ -521,8 +902,56 @@ def _parse_options(category: str, text: str, options: dict):
     return options
 
 
+# 옵션 키워드 → (옵션 키, 값). 이 표와 샷 패턴만으로 해석되는 발화는 LLM 없이 처리
+_OPTION_KW = {
+    "디카페인": ("decaf", True),
+    "디카": ("decaf", True),
+    "시럽": ("syrup", True),
+    "연하게": ("sweetness", "low"),
+    "적게": ("sweetness", "low"),
+    "보통": ("sweetness", "normal"),
+    "기본": ("sweetness", "normal"),
+    "달달하게": ("sweetness", "high"),
+    "달게": ("sweetness", "high"),
+}
+_CATEGORY_OPTION_KEYS = {
+    "coffee": frozenset(("decaf", "syrup", "extra_shot")),
+    "ade": frozenset(("sweetness",)),
+}
+_RE_OPTION_KW = re.compile("|".join(map(re.escape, sorted(_OPTION_KW, key=len, reverse=True))))
+# '샷추가', '샷두번추가', '샷2개' 등 (_norm 이후 공백 없는 형태)
+_RE_SHOT = re.compile(r"샷(?:을)?(1|2|3|한|하나|두|둘|세|셋)?(?:개|번|잔)?")
+_SHOT_COUNT = {"1": 1, "한": 1, "하나": 1, "2": 2, "두": 2, "둘": 2, "3": 3, "세": 3, "셋": 3}
+# 옵션 키워드를 지운 뒤 남아도 되는 어미/조사
+_RE_OPTION_FILLER = re.compile(r"추가|해주세요|해줘요|해줘|해요|넣어주세요|넣어줘|주세요|으로|로|하고|그리고|랑|도|좀|요|[?!~]")
+
+
+def _parse_options_rule(category: str, text: str, options: dict) -> dict | None:
+    """
+    키워드 규칙만으로 확실히 해석되는 옵션 발화면 갱신된 options를 반환.
+    키워드 밖의 말이 남거나, 카테고리에 없는 옵션이거나, 값이 충돌하면 None (LLM으로 넘김).
+    """
+    allowed = _CATEGORY_OPTION_KEYS.get(category)
+    if not allowed:
+        return None
+    t = _norm(text)
+
+    updates: dict = {}
+    found = [_OPTION_KW[m.group()] for m in _RE_OPTION_KW.finditer(t)]
+    found += [("extra_shot", _SHOT_COUNT.get(m.group(1), 1)) for m in _RE_SHOT.finditer(t)]
+    for key, value in found:
+        if key not in allowed or updates.get(key, value) != value:
+            return None
+        updates[key] = value
+
+    rest = _RE_SHOT.sub("", _RE_OPTION_KW.sub("", t))
+    if not updates or _RE_OPTION_FILLER.sub("", rest):
+        return None
+    return {**options, **updates}
+
+
 def _parse_payment(text: str) -> str | None:
-    t = text.replace(" ", "").lower()
+    t = _norm(text)
     # 쿠폰 체크는 다른 키워드보다 먼저 (쿠폰 사용할게 등)
     if "쿠폰" in t:
         return "coupon"
@@ -530,9 +959,9 @@ def _parse_payment(text: str) -> str | None:
         return "card"
     if "현금" in t:
         return "cash"
-    if "카카오페이" in t:
+    if "카카오" in t:
         return "kakaopay"
-    if "페이" in t:
+    if "페이" in t or "간편결제" in t:
         return "pay"
     return None
 
@@ -540,660 +969,362 @@ def _parse_payment(text: str) -> str | None:
 # ───────────────────────────────────────────────
 # LLM 기반 파싱 함수들
 # ───────────────────────────────────────────────
-def _parse_dine_type_llm(text: str) -> str | None:
+# Structured Outputs 응답 스키마: 모델이 스키마에 맞는 JSON만 생성하므로
+# 프롬프트에 JSON 형식 설명을 넣거나 코드펜스 제거/json.loads를 할 필요가 없다.
+class DineTypeOut(BaseModel):
+    dine_type: Literal["takeout", "dinein"] | None
+
+
+class MenuOut(BaseModel):
+    category: Literal["coffee", "ade", "tea", "dessert"] | None
+    menu_id: str | None
+    menu_name: str | None
+
+
+class CartActionOut(BaseModel):
+    remove_menu: MenuOut
+    add_menu: MenuOut
+
+
+class TempOut(BaseModel):
+    temp: Literal["hot", "ice"] | None
+
+
+class SizeOut(BaseModel):
+    size: Literal["작은사이즈", "중간사이즈", "큰사이즈"] | None
+
+
+class OptionsOut(BaseModel):
+    extra_shot: int
+    syrup: bool
+    decaf: bool | None
+    sweetness: Literal["low", "normal", "high"] | None
+
+
+class PaymentOut(BaseModel):
+    payment_method: Literal["card", "cash", "kakaopay", "coupon", "pay"] | None
+
+
+class _LRUCache:
+    """프로세스 내 LRU 캐시. 짧고 반복적인 발화("카드로", "아이스")의 LLM 결과 재사용용."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+# (스키마, 정규화된 user 메시지) -> parsed. 스키마마다 시스템 프롬프트가 하나뿐이라 키에서 생략
+_LLM_PARSE_CACHE = _LRUCache()
+# 같은 키로 진행 중인 호출. 여러 키오스크가 동시에 같은 발화("카드로")를 보내면 요청 1건을 공유한다.
+_LLM_INFLIGHT: Dict[tuple, "asyncio.Future"] = {}
+
+
+async def _llm_parse(system_prompt: str, user_text: str, schema: type[BaseModel], max_tokens: int):
+    """Structured Outputs 공통 호출. 스키마 인스턴스(parsed)를 반환하고, 거절 시 None.
+    같은 발화(공백/구두점 무시)는 캐시에서 바로 반환하며, 거절/오류는 캐시하지 않는다.
+    동시에 들어온 같은 발화는 진행 중인 요청 하나에 합류한다."""
+    key = (schema, _norm(user_text))
+    cached = _LLM_PARSE_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    task = _LLM_INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_llm_parse_request(key, system_prompt, user_text, schema, max_tokens))
+        _LLM_INFLIGHT[key] = task
+        task.add_done_callback(lambda _t: _LLM_INFLIGHT.pop(key, None))
+    # 한 호출자가 취소돼도 공유 요청은 끝까지 진행되도록 shield
+    return await asyncio.shield(task)
+
+
+async def _llm_parse_request(key: tuple, system_prompt: str, user_text: str, schema: type[BaseModel], max_tokens: int):
+    completion = await gpt_client.beta.chat.completions.parse(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_text},
+        ],
+        response_format=schema,
+        temperature=0.1,
+        max_tokens=max_tokens,
+    )
+    parsed = completion.choices[0].message.parsed
+    if parsed is not None:
+        _LLM_PARSE_CACHE.put(key, parsed)
+    return parsed
+
+
+# 시스템 프롬프트는 모두 모듈 상수로 고정한다.
+# 호출마다 바이트 단위로 동일한 prefix가 되어 OpenAI 자동 프롬프트 캐시가 적용되며,
+# 카테고리/기존 옵션 등 가변 정보는 마지막 user 메시지로만 전달한다.
+
+# LLM 프롬프트용 전체 메뉴 목록 ("- coffee: COFFEE_AMERICANO (아메리카노)" 형식)
+_MENU_LIST_PROMPT = "\n".join(
+    f"- {cat}: {menu_id} ({menu_name})"
+    for cat in _MENU_CATEGORIES
+    for menu_id, menu_name in _menu_choices_for_category(cat)
+)
+
+
+DINE_TYPE_SYSTEM_PROMPT = """
+사용자 발화에서 포장/매장 선택 의도를 파싱하세요.
+- takeout: 포장, 들고가기, 가져가기, 테이크아웃 등
+- dinein: 매장, 먹고가기, 여기서 먹을래, 매장에서 등
+- null: 의도 파악 불가
+예: 포장해서 가져갈게요→takeout / 여기서 먹고갈게요→dinein
+""".strip()
+
+
+async def _parse_dine_type_llm(text: str) -> str | None:
     """LLM을 사용해 포장/매장 선택 의도 파싱"""
-    DINE_TYPE_SYSTEM_PROMPT = """
-    사용자 발화에서 포장/매장 선택 의도를 파싱하세요.
-    
-    가능한 값:
-    - "takeout": 포장, 들고가기, 가져가기, 포장할게, 들고갈래, 포장해서 가져갈게, 테이크아웃, 들고가기로, 포장으로 등
-    - "dinein": 매장, 먹고가기, 여기서 먹을래, 매장에서 먹을게, 여기서 먹을게, 먹고갈래, 여기서 드실래요, 매장에서, 여기서 등
-    - null: 의도 파악 불가
-    
-    JSON 형식으로만 반환:
-    {"dine_type": "takeout" | "dinein" | null}
-    """
-    
-    DINE_TYPE_FEW_SHOTS = """
-    예시 1)
-    사용자: 포장할게
-    응답: {"dine_type": "takeout"}
-    
-    예시 2)
-    사용자: 매장에서 먹을래
-    응답: {"dine_type": "dinein"}
-    
-    예시 3)
-    사용자: 들고가기로 해줘
-    응답: {"dine_type": "takeout"}
-    
-    예시 4)
-    사용자: 여기서 먹고갈게요
-    응답: {"dine_type": "dinein"}
-    
-    예시 5)
-    사용자: 포장해서 가져갈게요
-    응답: {"dine_type": "takeout"}
-    
-    예시 6)
-    사용자: 매장에서 먹을래요
-    응답: {"dine_type": "dinein"}
-    """
-    
     try:
-        completion = gpt_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": DINE_TYPE_SYSTEM_PROMPT},
-                {"role": "user", "content": DINE_TYPE_FEW_SHOTS},
-                {"role": "user", "content": f"사용자: {text}\n응답:"},
-            ],
-            temperature=0.1,
-            max_tokens=50,
-        )
-        
-        raw = completion.choices[0].message.content.strip()
-        
-        # 마크다운 코드 블록 제거
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            raw = "\n".join(lines[1:-1]) if len(lines) > 2 else raw
-            raw = raw.strip().rstrip("```").strip()
-        
-        print(f"[_parse_dine_type_llm] LLM raw 응답: {raw}")
-        
-        data = json.loads(raw)
-        dine_type = data.get("dine_type")
-        print(f"[_parse_dine_type_llm] 파싱된 dine_type: {dine_type}")
+        parsed = await _llm_parse(DINE_TYPE_SYSTEM_PROMPT, text, DineTypeOut, max_tokens=20)
+        dine_type = parsed.dine_type if parsed else None
+        log.debug("[_parse_dine_type_llm] 파싱된 dine_type: %s", dine_type)
         return dine_type
     except Exception as e:
-        print(f"[_parse_dine_type_llm] 오류: {e}")
+        log.warning("[_parse_dine_type_llm] 오류: %s", e)
         return None
 
 
-def _parse_menu_item_llm(text: str, category: str | None) -> tuple[str, str, str] | None:
+MENU_SYSTEM_PROMPT = f"""
+사용자 발화에서 메뉴 선택 의도를 파싱하세요.
+
+가능한 메뉴 목록:
+{_MENU_LIST_PROMPT}
+
+UI 위치 질문("어디있어", "어딨어" 등)이 아닌 메뉴 주문 의도만 처리하세요.
+메뉴를 찾으면 category, menu_id, menu_name을 모두 채우고, 찾지 못하면 모두 null.
+예: 아메리카노 하나 주세요→coffee/COFFEE_AMERICANO/아메리카노
+""".strip()
+
+
+async def _parse_menu_item_llm(text: str, category: str | None) -> tuple[str, str, str] | None:
     """LLM을 사용해 메뉴 선택 의도 파싱"""
-    # 모든 메뉴 목록 생성
-    all_menus = []
-    for cat in ["coffee", "ade", "tea", "dessert"]:
-        for menu_id, menu_name in _menu_choices_for_category(cat):
-            all_menus.append(f"- {cat}: {menu_id} ({menu_name})")
-    
-    menu_list = "\n".join(all_menus)
-    
-    MENU_SYSTEM_PROMPT = f"""
-    사용자 발화에서 메뉴 선택 의도를 파싱하세요.
-    
-    가능한 메뉴 목록:
-    {menu_list}
-    
-    사용자가 메뉴를 선택하려는 의도인지 판단하고, 메뉴명을 추출하세요.
-    UI 위치 질문("어디있어", "어딨어" 등)이 아닌 메뉴 주문 의도만 처리하세요.
-    
-    JSON 형식으로 반환:
-    {{
-        "category": "coffee" | "ade" | "tea" | "dessert" | null,
-        "menu_id": "COFFEE_AMERICANO" | ... | null,
-        "menu_name": "아메리카노" | ... | null
-    }}
-    
-    - 메뉴를 찾으면 category, menu_id, menu_name 모두 반환
-    - 찾지 못하면 모두 null 반환
-    """
-    
-    MENU_FEW_SHOTS = """
-    예시 1)
-    사용자: 아메리카노 먹을래
-    응답: {"category": "coffee", "menu_id": "COFFEE_AMERICANO", "menu_name": "아메리카노"}
-    
-    예시 2)
-    사용자: 아메리카노 선택할게
-    응답: {"category": "coffee", "menu_id": "COFFEE_AMERICANO", "menu_name": "아메리카노"}
-    
-    예시 3)
-    사용자: 아메리카노로 줘
-    응답: {"category": "coffee", "menu_id": "COFFEE_AMERICANO", "menu_name": "아메리카노"}
-    
-    예시 4)
-    사용자: 레몬에이드 주문할래
-    응답: {"category": "ade", "menu_id": "ADE_LEMON", "menu_name": "레몬에이드"}
-    
-    예시 5)
-    사용자: 치즈케이크 주세요
-    응답: {"category": "dessert", "menu_id": "DESSERT_CHEESECAKE", "menu_name": "치즈케이크"}
-    
-    예시 6)
-    사용자: 아메리카노 하나 주세요
-    응답: {"category": "coffee", "menu_id": "COFFEE_AMERICANO", "menu_name": "아메리카노"}
-    
-    예시 7)
-    사용자: 아메리카노 시킬게
-    응답: {"category": "coffee", "menu_id": "COFFEE_AMERICANO", "menu_name": "아메리카노"}
-    """
-    
-    context = f"현재 지정된 카테고리: {category or '없음'}\n" if category else ""
-    
+    context = f"현재 지정된 카테고리: {category}\n" if category else ""
+
     try:
-        completion = gpt_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": MENU_SYSTEM_PROMPT},
-                {"role": "user", "content": MENU_FEW_SHOTS},
-                {"role": "user", "content": f"{context}사용자: {text}\n응답:"},
-            ],
-            temperature=0.1,
-            max_tokens=100,
-        )
-        
-        raw = completion.choices[0].message.content.strip()
-        
-        # 마크다운 코드 블록 제거
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            raw = "\n".join(lines[1:-1]) if len(lines) > 2 else raw
-            raw = raw.strip().rstrip("```").strip()
-        
-        print(f"[_parse_menu_item_llm] LLM raw 응답: {raw}")
-        
-        data = json.loads(raw)
-        category_val = data.get("category")
-        menu_id = data.get("menu_id")
-        menu_name = data.get("menu_name")
-        
-        if category_val and menu_id and menu_name:
-            print(f"[_parse_menu_item_llm] 파싱 성공: category={category_val}, menu_id={menu_id}, menu_name={menu_name}")
-            return (category_val, menu_id, menu_name)
+        parsed = await _llm_parse(MENU_SYSTEM_PROMPT, f"{context}{text}", MenuOut, max_tokens=50)
+        if parsed and parsed.category and parsed.menu_id and parsed.menu_name:
+            log.debug("[_parse_menu_item_llm] 파싱 성공: category=%s, menu_id=%s, menu_name=%s", parsed.category, parsed.menu_id, parsed.menu_name)
+            return (parsed.category, parsed.menu_id, parsed.menu_name)
     except Exception as e:
-        print(f"[_parse_menu_item_llm] 오류: {e}")
-    
+        log.warning("[_parse_menu_item_llm] 오류: %s", e)
+
     return None
 
 
-def _parse_cart_action_llm(text: str) -> dict | None:
+CART_ACTION_SYSTEM_PROMPT = f"""
+사용자 발화에서 장바구니 제거 및 추가 액션을 파싱하세요.
+
+가능한 메뉴 목록:
+{_MENU_LIST_PROMPT}
+
+- 제거할 메뉴는 remove_menu, 추가할 메뉴는 add_menu에 채우고, 해당 없는 쪽은 모두 null
+- "장바구니" 키워드가 없어도 "빼", "빼줘", "제거" 등이 있으면 제거 의도로 판단
+- 메뉴 목록에 있으면 정확한 menu_id를, 없으면 menu_name만 채우고 category와 menu_id는 null
+예: 치즈케이크 빼고 마카롱 담아줘→remove=DESSERT_CHEESECAKE, add=DESSERT_MACARON
+""".strip()
+
+
+async def _parse_cart_action_llm(text: str) -> dict | None:
     """LLM을 사용해 장바구니 복합 액션(제거+추가) 파싱"""
-    # 모든 메뉴 목록 생성
-    all_menus = []
-    for cat in ["coffee", "ade", "tea", "dessert"]:
-        for menu_id, menu_name in _menu_choices_for_category(cat):
-            all_menus.append(f"- {cat}: {menu_id} ({menu_name})")
-    
-    menu_list = "\n".join(all_menus)
-    
-    CART_ACTION_SYSTEM_PROMPT = f"""
-    사용자 발화에서 장바구니 제거 및 추가 액션을 파싱하세요.
-    
-    가능한 메뉴 목록:
-    {menu_list}
-    
-    "치즈케이크 빼고 마카롱 담아줘"처럼 제거할 메뉴와 추가할 메뉴가 함께 있는 경우를 처리하세요.
-    
-    JSON 형식으로 반환:
-    {{
-        "remove_menu": {{
-            "category": "dessert" | null,
-            "menu_id": "DESSERT_CHEESECAKE" | null,
-            "menu_name": "치즈케이크" | null
-        }},
-        "add_menu": {{
-            "category": "dessert" | null,
-            "menu_id": "DESSERT_MACARON" | null,
-            "menu_name": "마카롱" | null
-        }}
-    }}
-    
-    - 제거할 메뉴만 있으면 remove_menu만 채우고 add_menu는 모두 null
-    - 추가할 메뉴만 있으면 add_menu만 채우고 remove_menu는 모두 null
-    - 둘 다 있으면 둘 다 채움
-    - "티라미수 빼줘", "치즈케이크 제거해줘"처럼 "장바구니" 키워드가 없어도 "빼", "빼줘", "제거" 등의 키워드가 있으면 제거 의도로 판단
-    - 메뉴 목록에 없는 메뉴도 사용자가 말했다면 menu_name만 추출하고, category와 menu_id는 null로 반환
-    - 찾지 못하면 null 반환
-    
-    중요: 메뉴 목록에 정확히 일치하는 메뉴가 있으면 정확한 menu_id를 반환하되, 없어도 사용자가 말한 메뉴 이름(menu_name)은 추출하세요.
-    """
-    
-    CART_ACTION_FEW_SHOTS = """
-    예시 1)
-    사용자: 치즈케이크 빼고 마카롱 담아줘
-    응답: {"remove_menu": {"category": "dessert", "menu_id": "DESSERT_CHEESECAKE", "menu_name": "치즈케이크"}, "add_menu": {"category": "dessert", "menu_id": "DESSERT_MACARON", "menu_name": "마카롱"}}
-    
-    예시 2)
-    사용자: 티라미수 빼고 아메리카노 담아줘
-    응답: {"remove_menu": {"category": "dessert", "menu_id": "DESSERT_TIRAMISU", "menu_name": "티라미수"}, "add_menu": {"category": "coffee", "menu_id": "COFFEE_AMERICANO", "menu_name": "아메리카노"}}
-    
-    예시 3)
-    사용자: 치즈케이크 담아줘
-    응답: {"remove_menu": {"category": null, "menu_id": null, "menu_name": null}, "add_menu": {"category": "dessert", "menu_id": "DESSERT_CHEESECAKE", "menu_name": "치즈케이크"}}
-    
-    예시 4)
-    사용자: 티라미수 장바구니에서 빼줘
-    응답: {"remove_menu": {"category": "dessert", "menu_id": "DESSERT_TIRAMISU", "menu_name": "티라미수"}, "add_menu": {"category": null, "menu_id": null, "menu_name": null}}
-    
-    예시 5)
-    사용자: 티라미수 빼줘
-    응답: {"remove_menu": {"category": "dessert", "menu_id": "DESSERT_TIRAMISU", "menu_name": "티라미수"}, "add_menu": {"category": null, "menu_id": null, "menu_name": null}}
-    
-    예시 6)
-    사용자: 치즈케이크 제거해줘
-    응답: {"remove_menu": {"category": "dessert", "menu_id": "DESSERT_CHEESECAKE", "menu_name": "치즈케이크"}, "add_menu": {"category": null, "menu_id": null, "menu_name": null}}
-    """
-    
     try:
-        completion = gpt_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": CART_ACTION_SYSTEM_PROMPT},
-                {"role": "user", "content": CART_ACTION_FEW_SHOTS},
-                {"role": "user", "content": f"사용자: {text}\n응답:"},
-            ],
-            temperature=0.1,
-            max_tokens=200,
-        )
-        
-        raw = completion.choices[0].message.content.strip()
-        
-        # 마크다운 코드 블록 제거
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            raw = "\n".join(lines[1:-1]) if len(lines) > 2 else raw
-            raw = raw.strip().rstrip("```").strip()
-        
-        print(f"[_parse_cart_action_llm] LLM raw 응답: {raw}")
-        
-        data = json.loads(raw)
-        return data
+        parsed = await _llm_parse(CART_ACTION_SYSTEM_PROMPT, text, CartActionOut, max_tokens=100)
+        log.debug("[_parse_cart_action_llm] 파싱 결과: %s", parsed)
+        return parsed.model_dump() if parsed else None
     except Exception as e:
-        print(f"[_parse_cart_action_llm] 오류: {e}")
-    
+        log.warning("[_parse_cart_action_llm] 오류: %s", e)
+
+    return None
+
+
+def _cart_menu_tuple(menu: dict | None) -> tuple[str, str, str] | None:
+    """장바구니 액션 결과의 메뉴 dict를 (category, menu_id, menu_name)으로 변환. 불완전하면 None."""
+    if menu and menu.get("category") and menu.get("menu_id") and menu.get("menu_name"):
+        return menu["category"], menu["menu_id"], menu["menu_name"]
     return None
 
 
-def _parse_temp_llm(text: str) -> str | None:
+TEMP_SYSTEM_PROMPT = """
+사용자 발화에서 온도 선택 의도를 파싱하세요.
+- hot: 따뜻하게, 뜨겁게, 핫 등
+- ice: 차갑게, 아이스, 시원하게 등
+- null: 의도 파악 불가
+예: 따뜻한 걸로→hot / 차갑게 할게→ice
+""".strip()
+
+
+async def _parse_temp_llm(text: str) -> str | None:
     """LLM을 사용해 온도 선택 의도 파싱"""
-    TEMP_SYSTEM_PROMPT = """
-    사용자 발화에서 온도 선택 의도를 파싱하세요.
-    
-    가능한 값:
-    - "hot": 따뜻하게, 뜨겁게, 핫, 따뜻하게 주세요, 뜨겁게 해줘, 따뜻한 걸로, 핫으로 등
-    - "ice": 차갑게, 아이스, 차갑게 주세요, 아이스로 해줘, 차가운 걸로, 아이스로, 시원하게 등
-    - null: 의도 파악 불가
-    
-    JSON 형식으로만 반환:
-    {"temp": "hot" | "ice" | null}
-    """
-    
-    TEMP_FEW_SHOTS = """
-    예시 1)
-    사용자: 따뜻하게 주세요
-    응답: {"temp": "hot"}
-    
-    예시 2)
-    사용자: 아이스로 해줘
-    응답: {"temp": "ice"}
-    
-    예시 3)
-    사용자: 차갑게 할게
-    응답: {"temp": "ice"}
-    
-    예시 4)
-    사용자: 뜨겁게 주세요
-    응답: {"temp": "hot"}
-    
-    예시 5)
-    사용자: 핫으로 해줘
-    응답: {"temp": "hot"}
-    """
-    
     try:
-        completion = gpt_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": TEMP_SYSTEM_PROMPT},
-                {"role": "user", "content": TEMP_FEW_SHOTS},
-                {"role": "user", "content": f"사용자: {text}\n응답:"},
-            ],
-            temperature=0.1,
-            max_tokens=50,
-        )
-        
-        raw = completion.choices[0].message.content.strip()
-        
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            raw = "\n".join(lines[1:-1]) if len(lines) > 2 else raw
-            raw = raw.strip().rstrip("```").strip()
-        
-        print(f"[_parse_temp_llm] LLM raw 응답: {raw}")
-        
-        data = json.loads(raw)
-        temp = data.get("temp")
-        print(f"[_parse_temp_llm] 파싱된 temp: {temp}")
+        parsed = await _llm_parse(TEMP_SYSTEM_PROMPT, text, TempOut, max_tokens=20)
+        temp = parsed.temp if parsed else None
+        log.debug("[_parse_temp_llm] 파싱된 temp: %s", temp)
         return temp
     except Exception as e:
-        print(f"[_parse_temp_llm] 오류: {e}")
+        log.warning("[_parse_temp_llm] 오류: %s", e)
         return None
 
 
-def _parse_size_llm(text: str) -> str | None:
+SIZE_SYSTEM_PROMPT = """
+사용자 발화에서 사이즈 선택 의도를 파싱하세요.
+- 작은사이즈: 작은, 스몰, 톨 등
+- 중간사이즈: 중간, 미디엄, 그란데, 보통 등
+- 큰사이즈: 큰, 라지, 벤티 등
+예: 그란데로 주세요→중간사이즈 / 벤티로 해줘→큰사이즈
+""".strip()
+
+
+async def _parse_size_llm(text: str) -> str | None:
     """LLM을 사용해 사이즈 선택 의도 파싱"""
-    SIZE_SYSTEM_PROMPT = """
-    사용자 발화에서 사이즈 선택 의도를 파싱하세요.
-    
-    가능한 값:
-    - "작은사이즈": 작은, 작은 사이즈, 스몰, 톨, 작은 걸로, 작은 사이즈로 등
-    - "중간사이즈": 중간, 중간 사이즈, 미디엄, 그란데, 중간 걸로, 중간 사이즈로, 보통 등
-    - "큰사이즈": 큰, 큰 사이즈, 라지, 벤티, 큰 걸로, 큰 사이즈로 등
-    
-    JSON 형식으로만 반환:
-    {"size": "작은사이즈" | "중간사이즈" | "큰사이즈" | null}
-    """
-    
-    SIZE_FEW_SHOTS = """
-    예시 1)
-    사용자: 작은 사이즈 주세요
-    응답: {"size": "작은사이즈"}
-    
-    예시 2)
-    사용자: 중간 사이즈로 해줘
-    응답: {"size": "중간사이즈"}
-    
-    예시 3)
-    사용자: 큰 사이즈 할게
-    응답: {"size": "큰사이즈"}
-    
-    예시 4)
-    사용자: 그란데로 주세요
-    응답: {"size": "중간사이즈"}
-    
-    예시 5)
-    사용자: 스몰 사이즈
-    응답: {"size": "작은사이즈"}
-    
-    예시 6)
-    사용자: 벤티로 해줘
-    응답: {"size": "큰사이즈"}
-    """
-    
     try:
-        completion = gpt_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SIZE_SYSTEM_PROMPT},
-                {"role": "user", "content": SIZE_FEW_SHOTS},
-                {"role": "user", "content": f"사용자: {text}\n응답:"},
-            ],
-            temperature=0.1,
-            max_tokens=50,
-        )
-        
-        raw = completion.choices[0].message.content.strip()
-        
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            raw = "\n".join(lines[1:-1]) if len(lines) > 2 else raw
-            raw = raw.strip().rstrip("```").strip()
-        
-        print(f"[_parse_size_llm] LLM raw 응답: {raw}")
-        
-        data = json.loads(raw)
-        size = data.get("size")
-        print(f"[_parse_size_llm] 파싱된 size: {size}")
+        parsed = await _llm_parse(SIZE_SYSTEM_PROMPT, text, SizeOut, max_tokens=20)
+        size = parsed.size if parsed else None
+        log.debug("[_parse_size_llm] 파싱된 size: %s", size)
         return size
     except Exception as e:
-        print(f"[_parse_size_llm] 오류: {e}")
+        log.warning("[_parse_size_llm] 오류: %s", e)
         return None
 
 
-def _parse_options_llm(category: str, text: str, options: dict) -> dict:
+OPTIONS_SYSTEM_PROMPT = """
+사용자 발화에서 옵션 선택 의도를 파싱하세요. 현재 카테고리와 기존 옵션은 사용자 메시지로 주어집니다.
+
+커피(coffee) 옵션: decaf(디카페인 true), syrup(시럽 추가 true), extra_shot(샷 추가 횟수, 기본 0)
+예: 샷 두 개 추가→extra_shot=2 / 디카페인으로 해줘→decaf=true
+에이드(ade) 옵션: sweetness(low | normal | high)
+예: 연하게 해줘→low / 달게 해줘→high
+
+사용자가 선택한 옵션만 반영하고, 언급하지 않은 옵션은 기존 값을 유지해 전체 options를 반환하세요.
+""".strip()
+
+
+async def _parse_options_llm(category: str, text: str, options: dict) -> dict:
     """LLM을 사용해 옵션 선택 의도 파싱"""
-    OPTIONS_SYSTEM_PROMPT = f"""
-    사용자 발화에서 옵션 선택 의도를 파싱하세요.
-    
-    현재 카테고리: {category}
-    
-    {category == "coffee" and """
-    커피 옵션:
-    - 디카페인: "decaf": true
-    - 시럽 추가: "syrup": true
-    - 샷 추가: "extra_shot": 0 (기본), 1, 2, 3 등
-    """ or ""}
-    
-    {category == "ade" and """
-    에이드 옵션:
-    - 당도 조절: "sweetness": "low" | "normal" | "high"
-    """ or ""}
-    
-    기존 옵션: {json.dumps(options, ensure_ascii=False)}
-    
-    사용자가 선택한 옵션만 반영하세요. 언급하지 않은 옵션은 기존 값을 유지하세요.
-    
-    JSON 형식으로 반환 (전체 options 객체):
-    {json.dumps({
-        "extra_shot": 0,
-        "syrup": False,
-        "decaf": None,
-        "sweetness": None
-    } if category == "coffee" else {
-        "extra_shot": 0,
-        "syrup": False,
-        "decaf": None,
-        "sweetness": "normal"
-    }, ensure_ascii=False)}
-    """
-    
-    OPTIONS_FEW_SHOTS_COFFEE = """
-    예시 1)
-    사용자: 디카페인으로 해줘
-    기존: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": None}
-    응답: {"extra_shot": 0, "syrup": False, "decaf": True, "sweetness": None}
-    
-    예시 2)
-    사용자: 시럽 추가해줘
-    기존: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": None}
-    응답: {"extra_shot": 0, "syrup": True, "decaf": None, "sweetness": None}
-    
-    예시 3)
-    사용자: 샷 하나 추가해줘
-    기존: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": None}
-    응답: {"extra_shot": 1, "syrup": False, "decaf": None, "sweetness": None}
-    
-    예시 4)
-    사용자: 샷 두 개 추가
-    기존: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": None}
-    응답: {"extra_shot": 2, "syrup": False, "decaf": None, "sweetness": None}
-    """
-    
-    OPTIONS_FEW_SHOTS_ADE = """
-    예시 1)
-    사용자: 연하게 해줘
-    기존: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": "normal"}
-    응답: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": "low"}
-    
-    예시 2)
-    사용자: 달게 해줘
-    기존: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": "normal"}
-    응답: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": "high"}
-    
-    예시 3)
-    사용자: 보통으로 해줘
-    기존: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": "normal"}
-    응답: {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": "normal"}
-    """
-    
-    few_shots = OPTIONS_FEW_SHOTS_COFFEE if category == "coffee" else OPTIONS_FEW_SHOTS_ADE
-    
     try:
-        completion = gpt_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": OPTIONS_SYSTEM_PROMPT},
-                {"role": "user", "content": few_shots},
-                {"role": "user", "content": f"기존: {json.dumps(options, ensure_ascii=False)}\n사용자: {text}\n응답:"},
-            ],
-            temperature=0.1,
-            max_tokens=150,
+        parsed = await _llm_parse(
+            OPTIONS_SYSTEM_PROMPT,
+            f"현재 카테고리: {category}\n기존: {_json_dumps(options)}\n사용자: {text}",
+            OptionsOut,
+            max_tokens=60,
         )
-        
-        raw = completion.choices[0].message.content.strip()
-        
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            raw = "\n".join(lines[1:-1]) if len(lines) > 2 else raw
-            raw = raw.strip().rstrip("```").strip()
-        
-        print(f"[_parse_options_llm] LLM raw 응답: {raw}")
-        
-        data = json.loads(raw)
-        print(f"[_parse_options_llm] 파싱된 options: {data}")
-        # 파싱된 데이터가 유효한지 확인 (dict이고 필수 필드 존재)
-        if isinstance(data, dict) and "extra_shot" in data:
-            return data
-        else:
-            print(f"[_parse_options_llm] 유효하지 않은 데이터, 기존 options 반환")
+        if parsed is None:
+            log.debug("[_parse_options_llm] 응답 거절, 기존 options 반환")
             return options
+        data = parsed.model_dump()
+        log.debug("[_parse_options_llm] 파싱된 options: %s", data)
+        return data
     except Exception as e:
-        print(f"[_parse_options_llm] 오류: {e}, 기존 options 반환")
+        log.warning("[_parse_options_llm] 오류: %s, 기존 options 반환", e)
         return options
 
 
-def _parse_payment_llm(text: str) -> str | None:
+PAYMENT_SYSTEM_PROMPT = """
+사용자 발화에서 결제 수단 선택 의도를 파싱하세요.
+- card: 카드, 카드결제, 신용카드 등
+- cash: 현금, 현금 결제 등
+- kakaopay: 카카오페이 등
+- coupon: 쿠폰, 쿠폰 사용, 쿠폰으로 결제 등
+- pay: 간편결제, 페이 (구체적 수단 불명확)
+- null: 의도 파악 불가
+예: 카드로 할게→card / 쿠폰 사용할래→coupon
+""".strip()
+
+
+async def _parse_payment_llm(text: str) -> str | None:
     """LLM을 사용해 결제 수단 선택 의도 파싱"""
-    PAYMENT_SYSTEM_PROMPT = """
-    사용자 발화에서 결제 수단 선택 의도를 파싱하세요.
-    
-    가능한 값:
-    - "card": 카드, 카드결제, 카드로, 카드로 결제할게, 카드 결제해줘, 신용카드, 카드로 할게 등
-    - "cash": 현금, 현금으로, 현금 결제, 현금으로 할게 등
-    - "kakaopay": 카카오페이, 카카오페이로, 카카오페이 결제 등
-    - "coupon": 쿠폰, 쿠폰으로, 쿠폰 결제, 쿠폰으로 할게, 쿠폰 사용할게, 쿠폰 사용할래, 쿠폰으로 결제할게 등
-    - "pay": 간편결제, 페이, 페이로 (구체적 수단 불명확)
-    - null: 의도 파악 불가
-    
-    JSON 형식으로만 반환:
-    {"payment_method": "card" | "cash" | "kakaopay" | "coupon" | "pay" | null}
-    """
-    
-    PAYMENT_FEW_SHOTS = """
-    예시 1)
-    사용자: 카드결제할게
-    응답: {"payment_method": "card"}
-    
-    예시 2)
-    사용자: 카드로 결제해줘
-    응답: {"payment_method": "card"}
-    
-    예시 3)
-    사용자: 쿠폰으로 할게요
-    응답: {"payment_method": "coupon"}
-    
-    예시 4)
-    사용자: 쿠폰 사용할게
-    응답: {"payment_method": "coupon"}
-    
-    예시 5)
-    사용자: 쿠폰 결제할게
-    응답: {"payment_method": "coupon"}
-    
-    예시 6)
-    사용자: 쿠폰 사용할래
-    응답: {"payment_method": "coupon"}
-    
-    예시 7)
-    사용자: 카카오페이로 주세요
-    응답: {"payment_method": "kakaopay"}
-    
-    예시 8)
-    사용자: 현금 결제할래
-    응답: {"payment_method": "cash"}
-    
-    예시 9)
-    사용자: 카드로 할게
-    응답: {"payment_method": "card"}
-    """
-    
     try:
-        completion = gpt_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": PAYMENT_SYSTEM_PROMPT},
-                {"role": "user", "content": PAYMENT_FEW_SHOTS},
-                {"role": "user", "content": f"사용자: {text}\n응답:"},
-            ],
-            temperature=0.1,
-            max_tokens=50,
-        )
-        
-        raw = completion.choices[0].message.content.strip()
-        
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            raw = "\n".join(lines[1:-1]) if len(lines) > 2 else raw
-            raw = raw.strip().rstrip("```").strip()
-        
-        print(f"[_parse_payment_llm] LLM raw 응답: {raw}")
-        
-        data = json.loads(raw)
-        payment_method = data.get("payment_method")
-        print(f"[_parse_payment_llm] 파싱된 payment_method: {payment_method}")
+        parsed = await _llm_parse(PAYMENT_SYSTEM_PROMPT, text, PaymentOut, max_tokens=20)
+        payment_method = parsed.payment_method if parsed else None
+        log.debug("[_parse_payment_llm] 파싱된 payment_method: %s", payment_method)
         return payment_method
     except Exception as e:
-        print(f"[_parse_payment_llm] 오류: {e}")
+        log.warning("[_parse_payment_llm] 오류: %s", e)
         return None
 
 
+_YES = frozenset(("네", "응", "예", "맞아", "맞아요", "그래", "좋아요"))
+_NO = frozenset(("아니", "아니요", "싫어", "싫어요", "다시"))
+
+
 def _yes_no(text: str) -> str | None:
     t = text.replace(" ", "")
-    if t in ("네", "응", "예", "맞아", "맞아요", "그래", "좋아요"):
+    if t in _YES:
         return "yes"
-    if t in ("아니", "아니요", "싫어", "싫어요", "다시"):
+    if t in _NO:
         return "no"
     return None
 
 
+_GREETING_START_KEYWORDS = ("주문", "시작")
+
+
+def _step_fast_path(step: str, text: str) -> bool:
+    """
+    현재 단계의 저렴한 규칙(문자열 포함/집합 조회)이 바로 맞는 발화인지 확인.
+    True이면 UI 도움말/일반 질문 정규식 감지를 건너뛰고 단계 처리로 보낸다.
+    """
+    if step == "greeting":
+        return any(k in text for k in _GREETING_START_KEYWORDS)
+    if step == "dine_type":
+        return _parse_dine_type(text) is not None
+    if step == "confirm":
+        return _yes_no(text) is not None
+    return False
+
+
 # ───────────────────────────────────────────────
 # backend_payload 생성
 # ───────────────────────────────────────────────
-def _build_backend_payload(ctx: Dict[str, Any]) -> dict | None:
+# 카테고리만 정해지고 메뉴가 아직 없을 때 쓰는 (menu_id, menu_name) 디폴트
+_CATEGORY_DEFAULTS: Dict[str, tuple[str, str]] = {
+    "coffee": ("COFFEE_DEFAULT", "커피"),
+    "ade": ("ADE_DEFAULT", "에이드"),
+    "tea": ("TEA_DEFAULT", "차"),
+    "dessert": ("DESSERT_DEFAULT", "디저트"),
+}
+
+
+def _build_backend_payload(ctx: SessionCtx) -> dict | None:
     """
     현재까지의 선택을 기반으로 백엔드에 넘길 주문 JSON 예시 생성.
     """
-    category = ctx.get("category")
-    temp = ctx.get("temp")
-    size = ctx.get("size")
-    quantity = ctx.get("quantity", 1)
-    options = ctx.get("options", {}) or {}
-    dine_type = ctx.get("dine_type")
-    payment_method = ctx.get("payment_method")
-    add_to_cart = ctx.get("add_to_cart", False)  # 장바구니 추가 플래그
-    remove_from_cart = ctx.get("remove_from_cart", False)  # 장바구니 제거 플래그
-
-    if not category and not ctx.get("menu_id"):
+    # 주문 정보가 없으면 아무것도 만들지 않고 바로 반환
+    category = ctx.category
+    if not category and not ctx.menu_id:
         return None
 
-    menu_id = ctx.get("menu_id")
-    menu_name = ctx.get("menu_name")
+    menu_id = ctx.menu_id
+    menu_name = ctx.menu_name
 
     # menu_id/menu_name이 아직 없으면 카테고리 디폴트로 세팅
-    if not menu_id or not menu_name:
-        if category == "coffee":
-            menu_id = "COFFEE_DEFAULT"
-            menu_name = "커피"
-        elif category == "ade":
-            menu_id = "ADE_DEFAULT"
-            menu_name = "에이드"
-        elif category == "tea":
-            menu_id = "TEA_DEFAULT"
-            menu_name = "차"
-        elif category == "dessert":
-            menu_id = "DESSERT_DEFAULT"
-            menu_name = "디저트"
+    if (not menu_id or not menu_name) and category in _CATEGORY_DEFAULTS:
+        menu_id, menu_name = _CATEGORY_DEFAULTS[category]
 
+    options = ctx.options or {}
     payload = {
         "category": category,
         "menu_id": menu_id,
         "menu_name": menu_name,
-        "temp": temp,
-        "size": size,
-        "quantity": quantity,
+        "temp": ctx.temp,
+        "size": ctx.size,
+        "quantity": ctx.quantity,
         "base_price": None,  # 가격은 pricing 모듈과 연동되면 채우기
         "options": {
             "extra_shot": options.get("extra_shot", 0),
@@ -1201,30 +1332,30 @@ def _build_backend_payload(ctx: Dict[str, Any]) -> dict | None:
             "decaf": options.get("decaf"),
             "sweetness": options.get("sweetness"),
         },
-        "dine_type": dine_type,
-        "payment_method": payment_method,
+        "dine_type": ctx.dine_type,
+        "payment_method": ctx.payment_method,
     }
     
     # 장바구니 추가 플래그가 설정되어 있으면 추가하고 초기화
-    if add_to_cart:
+    if ctx.add_to_cart:
         payload["add_to_cart"] = True
-        ctx["add_to_cart"] = False  # 사용 후 초기화
+        ctx.add_to_cart = False  # 사용 후 초기화
     
     # 장바구니 제거 플래그가 설정되어 있으면 추가하고 초기화
-    if remove_from_cart:
+    if ctx.remove_from_cart:
         payload["remove_from_cart"] = True
         # 제거할 메뉴 정보가 별도로 저장되어 있으면 포함
-        if ctx.get("remove_menu_category") and ctx.get("remove_menu_id") and ctx.get("remove_menu_name"):
+        if ctx.remove_menu_category and ctx.remove_menu_id and ctx.remove_menu_name:
             payload["remove_menu"] = {
-                "category": ctx.get("remove_menu_category"),
-                "menu_id": ctx.get("remove_menu_id"),
-                "menu_name": ctx.get("remove_menu_name"),
+                "category": ctx.remove_menu_category,
+                "menu_id": ctx.remove_menu_id,
+                "menu_name": ctx.remove_menu_name,
             }
             # 사용 후 초기화
-            ctx["remove_menu_category"] = None
-            ctx["remove_menu_id"] = None
-            ctx["remove_menu_name"] = None
-        ctx["remove_from_cart"] = False  # 사용 후 초기화
+            ctx.remove_menu_category = None
+            ctx.remove_menu_id = None
+            ctx.remove_menu_name = None
+        ctx.remove_from_cart = False  # 사용 후 초기화
     
     return payload
 
@@ -1318,192 +1449,227 @@ JSON 형식:
 """.strip()
 
 UI_FEW_SHOTS = """
-예시 1)
 사용자: 결제 버튼 어딨어?
-응답:
-{
-  "target_element_id": "menu_pay_button",
-  "answer_text": "메뉴 선택을 다 하셨으면, 화면 오른쪽 아래 파란색 '결제하기' 버튼을 눌러 주세요."
-}
+응답: {"target_element_id": "menu_pay_button", "answer_text": "메뉴 선택을 다 하셨으면, 화면 오른쪽 아래 파란색 '결제하기' 버튼을 눌러 주세요."}
 
-예시 2)
 사용자: 장바구니는 어디 있어?
-응답:
-{
-  "target_element_id": "menu_cart_area",
-  "answer_text": "화면 아래쪽 가운데에 있는 '장바구니' 영역에서 주문하신 메뉴를 보실 수 있습니다."
-}
+응답: {"target_element_id": "menu_cart_area", "answer_text": "화면 아래쪽 가운데에 있는 '장바구니' 영역에서 주문하신 메뉴를 보실 수 있습니다."}
 
-예시 3)
 사용자: 처음으로 돌아가는 거 어디야?
-응답:
-{
-  "target_element_id": "menu_home_button",
-  "answer_text": "화면 오른쪽 상단에 있는 동그란 '홈' 버튼을 눌러 주세요."
-}
+응답: {"target_element_id": "menu_home_button", "answer_text": "화면 오른쪽 상단에 있는 동그란 '홈' 버튼을 눌러 주세요."}
 
-예시 4)
 사용자: 아메리카노 어딨어?
-응답:
-{
-  "target_element_id": "menu_item_coffee_americano",
-  "answer_text": "아메리카노는 메뉴판 상단 커피 섹션에 있습니다."
-}
+응답: {"target_element_id": "menu_item_coffee_americano", "answer_text": "아메리카노는 메뉴판 상단 커피 섹션에 있습니다."}
 
-예시 5)
 사용자: 유자차는 어디 있나요?
-응답:
-{
-  "target_element_id": "menu_item_tea_yuja",
-  "answer_text": "유자차는 메뉴판 차 섹션에 있습니다."
-}
+응답: {"target_element_id": "menu_item_tea_yuja", "answer_text": "유자차는 메뉴판 차 섹션에 있습니다."}
 
-예시 6)
 사용자: 레몬에이드 어디에 있어?
-응답:
-{
-  "target_element_id": "menu_item_ade_lemon",
-  "answer_text": "레몬에이드는 메뉴판 에이드 섹션에 있습니다."
-}
+응답: {"target_element_id": "menu_item_ade_lemon", "answer_text": "레몬에이드는 메뉴판 에이드 섹션에 있습니다."}
 
-예시 7)
 사용자: 이전으로 갈려면 어떻게 해?
 현재 대화 단계: temp
-응답:
-{
-  "target_element_id": "temp_prev_button",
-  "answer_text": "지금 키오스크 왼쪽 하단에 있는 이전으로 버튼을 눌러주시면 됩니다."
-}
+응답: {"target_element_id": "temp_prev_button", "answer_text": "지금 키오스크 왼쪽 하단에 있는 이전으로 버튼을 눌러주시면 됩니다."}
 
-예시 8)
 사용자: 뒤로 가려면 뭐 눌러야 해?
 현재 대화 단계: size
-응답:
-{
-  "target_element_id": "size_prev_button",
-  "answer_text": "지금 키오스크 왼쪽 하단에 있는 이전으로 버튼을 눌러주시면 됩니다."
-}
+응답: {"target_element_id": "size_prev_button", "answer_text": "지금 키오스크 왼쪽 하단에 있는 이전으로 버튼을 눌러주시면 됩니다."}
 
-예시 9)
 사용자: 다음으로 가려면 어떻게 해?
 현재 대화 단계: temp
-응답:
-{
-  "target_element_id": "temp_next_button",
-  "answer_text": "화면 오른쪽에 있는 '다음' 버튼을 눌러주세요."
-}
-
-예시 10)
-사용자: 이전으로 가려면 어떻게해?
-현재 대화 단계: size
-응답:
-{
-  "target_element_id": "size_prev_button",
-  "answer_text": "지금 키오스크 왼쪽 하단에 있는 이전으로 버튼을 눌러주시면 됩니다."
-}
+응답: {"target_element_id": "temp_next_button", "answer_text": "화면 오른쪽에 있는 '다음' 버튼을 눌러주세요."}
 
-예시 11)
 사용자: 다음으로 갈려면 어떻게해?
 현재 대화 단계: size
-응답:
-{
-  "target_element_id": "size_next_button",
-  "answer_text": "화면 오른쪽에 있는 '다음' 버튼을 눌러주세요."
-}
+응답: {"target_element_id": "size_next_button", "answer_text": "화면 오른쪽에 있는 '다음' 버튼을 눌러주세요."}
 """.strip()
 
+# 시스템 지시와 few-shot을 하나의 고정 system 메시지로 합쳐 캐시 가능한 prefix를 최대화
+UI_SYSTEM_MESSAGE = UI_SYSTEM_PROMPT + "\n\n" + UI_FEW_SHOTS
+
+
+# 메뉴 ID -> 프론트 메뉴 버튼 target_element_id
+_MENU_ID_TO_ELEMENT: Dict[str, str] = {
+    "COFFEE_AMERICANO": "menu_item_coffee_americano",
+    "COFFEE_ESPRESSO": "menu_item_coffee_espresso",
+    "COFFEE_LATTE": "menu_item_coffee_latte",
+    "COFFEE_CAPPUCCINO": "menu_item_coffee_cappuccino",
+    "ADE_LEMON": "menu_item_ade_lemon",
+    "ADE_GRAPEFRUIT": "menu_item_ade_grapefruit",
+    "ADE_GREEN_GRAPE": "menu_item_ade_green_grape",
+    "ADE_ORANGE": "menu_item_ade_orange",
+    "TEA_CHAMOMILE": "menu_item_tea_chamomile",
+    "TEA_EARL_GREY": "menu_item_tea_earl_grey",
+    "TEA_YUJA": "menu_item_tea_yuja",
+    "TEA_GREEN": "menu_item_tea_green",
+    "DESSERT_CHEESECAKE": "menu_item_dessert_cheesecake",
+    "DESSERT_TIRAMISU": "menu_item_dessert_tiramisu",
+    "DESSERT_BROWNIE": "menu_item_dessert_brownie",
+    "DESSERT_CROISSANT": "menu_item_dessert_croissant",
+    "DESSERT_MACARON": "menu_item_dessert_macaron",
+}
+
 
 def _menu_id_to_target_element_id(menu_id: str) -> str | None:
     """
     메뉴 ID를 target_element_id로 변환.
     예: "COFFEE_AMERICANO" -> "menu_item_coffee_americano"
     """
-    mapping = {
-        "COFFEE_AMERICANO": "menu_item_coffee_americano",
-        "COFFEE_ESPRESSO": "menu_item_coffee_espresso",
-        "COFFEE_LATTE": "menu_item_coffee_latte",
-        "COFFEE_CAPPUCCINO": "menu_item_coffee_cappuccino",
-        "ADE_LEMON": "menu_item_ade_lemon",
-        "ADE_GRAPEFRUIT": "menu_item_ade_grapefruit",
-        "ADE_GREEN_GRAPE": "menu_item_ade_green_grape",
-        "ADE_ORANGE": "menu_item_ade_orange",
-        "TEA_CHAMOMILE": "menu_item_tea_chamomile",
-        "TEA_EARL_GREY": "menu_item_tea_earl_grey",
-        "TEA_YUJA": "menu_item_tea_yuja",
-        "TEA_GREEN": "menu_item_tea_green",
-        "DESSERT_CHEESECAKE": "menu_item_dessert_cheesecake",
-        "DESSERT_TIRAMISU": "menu_item_dessert_tiramisu",
-        "DESSERT_BROWNIE": "menu_item_dessert_brownie",
-        "DESSERT_CROISSANT": "menu_item_dessert_croissant",
-        "DESSERT_MACARON": "menu_item_dessert_macaron",
-    }
-    return mapping.get(menu_id)
+    return _MENU_ID_TO_ELEMENT.get(menu_id)
+
+
+# looks_like_ui_help 키워드 그룹. 그룹별로 하나의 정규식 alternation으로 컴파일해
+# 발화당 그룹마다 C 레벨 스캔 한 번으로 포함 여부를 판단한다.
+_UI_HELP_KEYWORDS = {
+    # 위치 질문 키워드가 있으면 메뉴명이 있어도 UI 도움말로 처리
+    "location": ["어디", "어딨어", "어디있", "어디있어", "어디에", "어디에있", "있어", "있나", "있는지", "있어요", "있나요"],
+    # 결제 의도가 명확한 경우 (예: "결제하기", "결제할게요")는 UI 도움말이 아님
+    "payment_intent": [
+        "결제하기", "결제할게요", "결제하겠어요", "결제하겠습니다",
+        "결제할게", "결제하자", "결제해줘", "결제해주세요",
+    ],
+    "question": ["어떻게", "어디", "뭐", "무엇", "방법", "어떡해", "어떻게해", "뭐눌러", "뭐눌러야"],
+    "back_button": ["이전", "뒤로", "돌아가", "이전으로", "뒤로가", "돌아가기"],
+    "simple_back": ["이전", "뒤로", "돌아가", "취소", "back", "prev"],
+    "menu": [
+        "아메리카노", "아메", "에스프레소", "라떼", "카푸치노", "카푸",
+        "레몬에이드", "레몬", "자몽에이드", "자몽", "청포도에이드", "청포도", "오렌지에이드", "오렌지",
+        "캐모마일", "얼그레이", "유자차", "유자", "녹차",
+        "치즈케이크", "티라미수", "브라우니", "크루아상",
+    ],
+    "action": ["담아", "담아줘", "주세요", "주문", "하나", "한잔", "추가"],
+    "next_button": ["다음", "다음으로", "다음단계", "계속"],
+    # UI 도움말 키워드
+    "ui": [
+        "버튼", "어디", "어딨어", "다음", "홈",
+        "장바구니", "결제", "처음으로", "전송", "qr", "큐알",
+    ],
+}
+_UI_HELP_PATTERNS = {
+    group: _keyword_pattern(words)
+    for group, words in _UI_HELP_KEYWORDS.items()
+}
 
 
+@lru_cache(maxsize=2048)
 def looks_like_ui_help(text: str) -> bool:
     """
     화면에서 버튼/영역 위치를 묻는 발화인지 간단 키워드로 감지.
+    키오스크 발화는 반복이 많아 같은 문장은 결과를 캐시한다.
     단, 메뉴명이 포함된 경우(예: "아메리카노 장바구니에 담아줘")는 False 반환.
     단, 결제 의도가 명확한 경우(예: "결제하기", "결제할게요")는 False 반환.
     단, 위치 질문 키워드("어디", "어딨어")가 있으면 메뉴명이 있어도 UI 도움말로 처리.
     """
-    t = text.replace(" ", "").lower()
+    t = _compact(text)
+    # 발화에 포함된 키워드 그룹을 한 번에 계산
+    hits = {group for group, pattern in _UI_HELP_PATTERNS.items() if pattern.search(t)}
     
-    # 위치 질문 키워드가 있으면 메뉴명이 있어도 UI 도움말로 처리
-    location_question_keywords = ["어디", "어딨어", "어디있", "어디있어", "어디에", "어디에있", "있어", "있나", "있는지", "있어요", "있나요"]
-    if any(keyword in t for keyword in location_question_keywords):
-        return True  # 위치 질문이면 무조건 UI 도움말
+    # 위치 질문이면 무조건 UI 도움말
+    if "location" in hits:
+        return True
     
-    # 결제 의도가 명확한 경우 (예: "결제하기", "결제할게요")는 UI 도움말이 아님
-    payment_intent_keywords = [
-        "결제하기", "결제할게요", "결제하겠어요", "결제하겠습니다", 
-        "결제할게", "결제하자", "결제해줘", "결제해주세요"
-    ]
-    if any(keyword in t for keyword in payment_intent_keywords):
-        return False  # 결제 의도가 명확하면 UI 도움말이 아님
+    # 결제 의도가 명확하면 UI 도움말이 아님
+    if "payment_intent" in hits:
+        return False
     
-    # 이전/뒤로 버튼 위치를 물어보는 경우는 UI 도움말로 처리
+    # 이전/뒤로 버튼 위치 질문은 UI 도움말
     # 예: "이전으로 갈려면 어떻게 해?", "뒤로 가려면 뭐 눌러야 해?" 등
-    question_keywords = ["어떻게", "어디", "뭐", "무엇", "방법", "어떡해", "어떻게해", "뭐눌러", "뭐눌러야"]
-    back_button_keywords = ["이전", "뒤로", "돌아가", "이전으로", "뒤로가", "돌아가기"]
-    if any(q in t for q in question_keywords) and any(b in t for b in back_button_keywords):
-        return True  # 이전/뒤로 버튼 위치 질문은 UI 도움말
+    if "question" in hits and "back_button" in hits:
+        return True
     
     # 단순 액션 의도("이전", "뒤로"만 있는 경우)는 UI 도움말이 아님
     # 이들은 규칙 기반으로 각 step에서 처리됨
-    simple_back_keywords = ["이전", "뒤로", "돌아가", "취소", "back", "prev"]
-    if any(keyword in t for keyword in simple_back_keywords) and not any(q in t for q in question_keywords):
-        return False  # 단순 이전 액션이면 UI 도움말이 아님
-    
-    # 메뉴명이 포함되어 있고 액션 키워드("담아줘", "주세요" 등)가 있으면 메뉴 선택 의도
-    menu_keywords = [
-        "아메리카노", "아메", "에스프레소", "라떼", "카푸치노", "카푸",
-        "레몬에이드", "레몬", "자몽에이드", "자몽", "청포도에이드", "청포도", "오렌지에이드", "오렌지",
-        "캐모마일", "얼그레이", "유자차", "유자", "녹차",
-        "치즈케이크", "티라미수", "브라우니", "크루아상"
-    ]
-    action_keywords = ["담아", "담아줘", "주세요", "주문", "하나", "한잔", "추가"]
+    if "simple_back" in hits and "question" not in hits:
+        return False
     
-    # 메뉴명이 있고 액션 키워드도 있으면 메뉴 선택 의도 (UI 도움말 아님)
-    has_menu = any(menu in t for menu in menu_keywords)
-    has_action = any(action in t for action in action_keywords)
-    if has_menu and has_action:
-        return False  # 메뉴명 + 액션 = 메뉴 선택 의도
+    # 메뉴명 + 액션 키워드("담아줘", "주세요" 등) = 메뉴 선택 의도 (UI 도움말 아님)
+    if "menu" in hits and "action" in hits:
+        return False
     
-    # 다음 버튼 위치를 물어보는 경우도 UI 도움말로 처리
-    next_button_keywords = ["다음", "다음으로", "다음단계", "계속"]
-    if any(q in t for q in question_keywords) and any(n in t for n in next_button_keywords):
-        return True  # 다음 버튼 위치 질문은 UI 도움말
+    # 다음 버튼 위치 질문은 UI 도움말
+    if "question" in hits and "next_button" in hits:
+        return True
     
     # UI 도움말 키워드 체크
-    keywords = [
-        "버튼", "어디", "어딨어", "다음", "홈",
-        "장바구니", "결제", "처음으로", "전송", "qr", "큐알"
-    ]
-    return any(k in t for k in keywords)
+    return "ui" in hits
+
+
+# 여는 펜스(```json + 줄바꿈)와 닫는 펜스(```)
+_RE_FENCE = re.compile(r"^```[a-zA-Z]*\n?|\n?```$")
+
+
+def _strip_code_fence(raw: str) -> str:
+    """LLM 응답에서 ```json ... ``` 마크다운 코드 블록 표기를 제거."""
+    raw = raw.strip()
+    if "```" not in raw:  # 대부분의 응답은 펜스 없음 → 정규식 생략
+        return raw
+    return _RE_FENCE.sub("", raw).strip()
+
+
+# JSON 파싱 실패 시 raw 응답에서 메뉴 target_element_id를 건지기 위한 패턴
+_RE_MENU_ITEM = re.compile(r'"menu_item_\w+"')
+
+# (정규화된 발화, 대화 단계) -> UI 안내 응답
+_UI_TARGET_CACHE = _LRUCache()
+_UI_TARGET_INFLIGHT: Dict[tuple, "asyncio.Future[dict]"] = {}
+
+# 자주 나오는 UI 위치 질문은 규칙으로 바로 답하고 LLM을 부르지 않는다 (안내 문구는 few-shot 예시와 동일)
+_UI_PREV_BUTTONS = {
+    "temp": "temp_prev_button",
+    "size": "size_prev_button",
+    "options": "option_prev_button",
+    "confirm": "payment_prev_button",
+    "payment": "payment_prev_button",
+}
+_UI_NEXT_BUTTONS = {
+    "temp": "temp_next_button",
+    "size": "size_next_button",
+    "options": "option_next_button",
+}
+_UI_PREV_ANSWER = "지금 키오스크 왼쪽 하단에 있는 이전으로 버튼을 눌러주시면 됩니다."
+_UI_NEXT_ANSWER = "화면 오른쪽에 있는 '다음' 버튼을 눌러주세요."
+# 메뉴 리스트 화면 버튼: (target_element_id, 키워드 정규식, 안내 문구)
+_UI_MENU_SCREEN_RULES = (
+    ("menu_cart_area", re.compile("장바구니"), "화면 아래쪽 가운데에 있는 '장바구니' 영역에서 주문하신 메뉴를 보실 수 있습니다."),
+    ("menu_home_button", re.compile("처음으로|홈"), "화면 오른쪽 상단에 있는 동그란 '홈' 버튼을 눌러 주세요."),
+)
+_UI_MENU_SECTION = {"coffee": "상단 커피", "ade": "에이드", "tea": "차", "dessert": "디저트"}
+
+
+def _topic_particle(word: str) -> str:
+    """마지막 글자에 받침이 있으면 '은', 없으면 '는' (한글이 아니면 '는')."""
+    code = ord(word[-1]) - 0xAC00 if word else -1
+    return "은" if 0 <= code < 11172 and code % 28 else "는"
 
 
-def classify_ui_target(user_text: str, current_step: str | None = None) -> dict:
+def _classify_ui_target_rule(user_text: str, current_step: str | None) -> dict | None:
+    """
+    UI 위치 질문을 규칙으로 분류. 후보가 정확히 하나일 때만 결과를 반환하고,
+    애매하거나 규칙에 없는 발화는 None (LLM으로 넘김).
+    """
+    t = _compact(user_text)
+    candidates = []
+    menu = _parse_menu_item_exact(user_text)
+    if menu is not None:
+        cat, mid, name = menu
+        target = _menu_id_to_target_element_id(mid)
+        if target:
+            candidates.append((target, f"{name}{_topic_particle(name)} 메뉴판 {_UI_MENU_SECTION[cat]} 섹션에 있습니다."))
+    if current_step in _UI_PREV_BUTTONS and _UI_HELP_PATTERNS["back_button"].search(t):
+        candidates.append((_UI_PREV_BUTTONS[current_step], _UI_PREV_ANSWER))
+    if current_step in _UI_NEXT_BUTTONS and _UI_HELP_PATTERNS["next_button"].search(t):
+        candidates.append((_UI_NEXT_BUTTONS[current_step], _UI_NEXT_ANSWER))
+    if current_step in (None, "menu_item"):
+        for target, pattern, answer in _UI_MENU_SCREEN_RULES:
+            if pattern.search(t):
+                candidates.append((target, answer))
+    if len(candidates) != 1:
+        return None
+    target, answer = candidates[0]
+    return {"target_element_id": target, "answer_text": answer}
+
+
+async def classify_ui_target(user_text: str, current_step: str | None = None) -> dict:
     """
     OpenAI에 UI용 프롬프트로 물어보고
     { "target_element_id": ..., "answer_text": ... } 형태로 반환.
@@ -1512,6 +1678,25 @@ def classify_ui_target(user_text: str, current_step: str | None = None) -> dict:
         user_text: 사용자 발화 텍스트
         current_step: 현재 대화 단계 (선택적, 이전/다음 버튼 판단에 사용)
     """
+    rule = _classify_ui_target_rule(user_text, current_step)
+    if rule is not None:
+        return rule
+
+    cache_key = (_norm(user_text), current_step)
+    cached = _UI_TARGET_CACHE.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
+    # 같은 질문이 동시에 들어오면 진행 중인 LLM 호출 하나에 합류 (_llm_parse와 같은 방식)
+    task = _UI_TARGET_INFLIGHT.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(_classify_ui_target_request(cache_key, user_text, current_step))
+        _UI_TARGET_INFLIGHT[cache_key] = task
+        task.add_done_callback(lambda _t: _UI_TARGET_INFLIGHT.pop(cache_key, None))
+    return dict(await asyncio.shield(task))
+
+
+async def _classify_ui_target_request(cache_key: tuple, user_text: str, current_step: str | None) -> dict:
     # 현재 step 정보를 프롬프트에 포함
     step_context = ""
     if current_step:
@@ -1527,34 +1712,44 @@ def classify_ui_target(user_text: str, current_step: str | None = None) -> dict:
     
     user_prompt = f"사용자: {user_text}{step_context}\n응답:"
     
-    completion = gpt_client.chat.completions.create(
+    # 스트리밍으로 받다가 JSON 객체가 완성되면 남은 토큰(닫는 코드펜스 등)을 기다리지 않고 종료
+    stream = await gpt_client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
-            {"role": "system", "content": UI_SYSTEM_PROMPT},
-            {"role": "user", "content": UI_FEW_SHOTS},
+            {"role": "system", "content": UI_SYSTEM_MESSAGE},
             {"role": "user", "content": user_prompt},
         ],
         temperature=0.1,
-        max_tokens=150,
+        max_tokens=100,
+        stream=True,
     )
+    raw = ""
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            raw += chunk.choices[0].delta.content or ""
+            if raw.rstrip().endswith("}"):
+                try:
+                    _json_loads(_strip_code_fence(raw))
+                    break
+                except json.JSONDecodeError:
+                    pass
+    finally:
+        await stream.close()
 
-    raw = completion.choices[0].message.content.strip()
-    
-    # 마크다운 코드 블록 제거 (```json ... ``` 형식)
-    if raw.startswith("```"):
-        # 첫 번째 ``` 이후부터 마지막 ``` 이전까지 추출
-        lines = raw.split("\n")
-        raw = "\n".join(lines[1:-1]) if len(lines) > 2 else raw
-        # 마지막 ``` 제거
-        raw = raw.strip().rstrip("```").strip()
+    # 마크다운 코드 블록 제거 (```json ... ``` 형식, 조기 종료 시 닫는 펜스가 없을 수 있음)
+    raw = _strip_code_fence(raw)
     
     # 디버깅을 위한 로깅
-    print(f"[classify_ui_target] LLM raw 응답: {raw}")
+    log.debug("[classify_ui_target] LLM raw 응답: %s", raw)
 
     try:
-        data = json.loads(raw)
+        data = _json_loads(raw)
+        parsed_ok = isinstance(data, dict)
     except json.JSONDecodeError as e:
-        print(f"[classify_ui_target] JSON 파싱 실패: {e}, raw: {raw}")
+        parsed_ok = False
+        log.warning("[classify_ui_target] JSON 파싱 실패: %s, raw: %s", e, raw)
         # JSON 파싱 실패 시에도 텍스트에서 target_element_id 찾기 시도
         data = {
             "target_element_id": None,
@@ -1562,11 +1757,10 @@ def classify_ui_target(user_text: str, current_step: str | None = None) -> dict:
         }
         
         # raw 텍스트에서 "menu_item_" 패턴 찾기
-        import re
-        menu_item_match = re.search(r'"menu_item_\w+"', raw)
+        menu_item_match = _RE_MENU_ITEM.search(raw)
         if menu_item_match:
             data["target_element_id"] = menu_item_match.group(0).strip('"')
-            print(f"[classify_ui_target] 텍스트에서 추출한 target_element_id: {data['target_element_id']}")
+            log.debug("[classify_ui_target] 텍스트에서 추출한 target_element_id: %s", data["target_element_id"])
 
     # 방어적 필드 정리
     if "target_element_id" not in data:
@@ -1574,42 +1768,53 @@ def classify_ui_target(user_text: str, current_step: str | None = None) -> dict:
     if "answer_text" not in data:
         data["answer_text"] = "어느 버튼을 찾으시는지 다시 한번 말씀해 주세요."
     
-    print(f"[classify_ui_target] 파싱된 데이터: {data}")
+    log.debug("[classify_ui_target] 파싱된 데이터: %s", data)
 
+    # 정상 JSON 응답만 캐시 (폴백 응답은 다음 호출에서 다시 시도)
+    if parsed_ok:
+        _UI_TARGET_CACHE.put(cache_key, dict(data))
     return data
 
 
 # ───────────────────────────────────────────────
 # OpenAI helper mode (대화형 자유 질문 답변)
 # ───────────────────────────────────────────────
+# 일반 질문 감지/응답용 정규식 (모듈 로드 시 1회 컴파일)
+# "(텍스트|..).*크기.*(키워|..)" 형태는 "(텍스트|..).*(키워|..)"에 포함되므로 후자만 사용
+_TEXT_SIZE_SUBJECT = r"(텍스트|글자|글씨|폰트).*"
+_RE_TEXT_SIZE_UP = re.compile(_TEXT_SIZE_SUBJECT + r"(키워|크게|늘려)")
+_RE_TEXT_SIZE_DOWN = re.compile(_TEXT_SIZE_SUBJECT + r"(줄여|작게)")
+_RE_TEXT_SIZE_RESET = re.compile(_TEXT_SIZE_SUBJECT + r"(리셋|원래|초기화|되돌리)")
+_RE_TEXT_SIZE_ANY = re.compile(_TEXT_SIZE_SUBJECT + r"(키워|크게|늘려|줄여|작게|리셋|원래|초기화|되돌리)")
+_RE_BARCODE_HOWTO = re.compile(r"(바코드|qr|큐알).*(어떻게|방법|인식|스캔)")
+_RE_PAYMENT_QUESTION = re.compile(r"(현금|카드|결제)\s*(되|가능|돼)")
+_RE_GENERAL_KEYWORDS = re.compile("|".join(map(re.escape, ["어떻게", "방법", "추천", "맛있", "뭐먹", "뭐가"])))
+
+
+@lru_cache(maxsize=2048)
 def looks_like_general_question(text: str) -> bool:
     """
     사용자가 메뉴/단계 외 일반 질문을 하는 상황 감지.
     예: '현금 돼?', '현금으로도 결제 돼?', '텍스트 크기 키워줘'
     (UI 위치 질문은 looks_like_ui_help가 먼저 처리함)
+    엔드포인트와 _handle_turn이 같은 턴에 같은 문장으로 다시 부르므로 결과를 캐시한다.
     """
     t = text.strip().lower()
 
     # 텍스트 크기 관련 요청
-    if re.search(r"(텍스트|글자|글씨|폰트).*크기.*(키워|크게|늘려|줄여|작게|리셋|원래|초기화|되돌리)", t) or \
-       re.search(r"(텍스트|글자|글씨|폰트).*(키워|크게|늘려|줄여|작게|리셋|원래|초기화|되돌리)", t):
+    if _RE_TEXT_SIZE_ANY.search(t):
         return True
 
     # 바코드 관련 질문
-    if re.search(r"바코드.*(어떻게|방법|인식|스캔)", t) or \
-       re.search(r"(바코드|qr|큐알).*(어떻게|방법|인식|스캔)", t):
+    if _RE_BARCODE_HOWTO.search(t):
         return True
 
     # 결제 관련 질문
-    if re.search(r"(현금|카드|결제)\s*(되|가능|돼)", t):
-        return True
-
-    # 안내 요청
-    if "어떻게" in t or "방법" in t:
+    if _RE_PAYMENT_QUESTION.search(t):
         return True
 
-    # '메뉴 추천해줘', '뭐가 맛있어?' 등
-    if re.search(r"(추천|맛있|뭐먹|뭐가)", t):
+    # 안내 요청 ('어떻게', '방법') / '메뉴 추천해줘', '뭐가 맛있어?' 등
+    if _RE_GENERAL_KEYWORDS.search(t):
         return True
 
     # '?' 체크는 제거 - UI 위치 질문과 구분하기 위해
@@ -1618,7 +1823,7 @@ def looks_like_general_question(text: str) -> bool:
     return False
 
 
-def answer_general_question(text: str) -> tuple[str, str | None]:
+async def answer_general_question(text: str) -> tuple[str, str | None]:
     """
     OpenAI API를 사용해 kiosk 안내 톤으로 대답 생성.
     특정 요청(텍스트 크기 등)은 규칙 기반으로 처리.
@@ -1629,22 +1834,18 @@ def answer_general_question(text: str) -> tuple[str, str | None]:
     t = text.strip().lower()
     
     # 텍스트 크기 관련 요청 처리
-    if re.search(r"(텍스트|글자|글씨|폰트).*크기.*(키워|크게|늘려)", t) or \
-       re.search(r"(텍스트|글자|글씨|폰트).*(키워|크게|늘려)", t):
+    if _RE_TEXT_SIZE_UP.search(t):
         return "텍스트 크기를 키워드리겠습니다.", "text_size_increase"
     
-    if re.search(r"(텍스트|글자|글씨|폰트).*크기.*(줄여|작게)", t) or \
-       re.search(r"(텍스트|글자|글씨|폰트).*(줄여|작게)", t):
+    if _RE_TEXT_SIZE_DOWN.search(t):
         return "텍스트 크기를 줄여드리겠습니다.", "text_size_decrease"
     
     # 텍스트 크기 리셋 처리
-    if re.search(r"(텍스트|글자|글씨|폰트).*크기.*(리셋|원래|초기화|되돌리)", t) or \
-       re.search(r"(텍스트|글자|글씨|폰트).*(리셋|원래|초기화|되돌리)", t):
+    if _RE_TEXT_SIZE_RESET.search(t):
         return "텍스트 크기를 원래 크기로 되돌리겠습니다.", "text_size_reset"
     
     # 바코드 인식 방법 안내
-    if re.search(r"바코드.*(어떻게|방법|인식|스캔)", t) or \
-       re.search(r"(바코드|qr|큐알).*(어떻게|방법|인식|스캔)", t):
+    if _RE_BARCODE_HOWTO.search(t):
         return "아래 바코드기에 핸드폰을 대고 인식시켜주세요.", None
     
     # 그 외는 OpenAI로 답변 생성
@@ -1658,7 +1859,7 @@ def answer_general_question(text: str) -> tuple[str, str | None]:
 - 존댓말 사용.
 """
 
-    completion = gpt_client.chat.completions.create(
+    completion = await gpt_client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": prompt}],
         max_tokens=80,
@@ -1671,754 +1872,756 @@ def answer_general_question(text: str) -> tuple[str, str | None]:
 # ───────────────────────────────────────────────
 # 주문 요약 문장 생성
 # ───────────────────────────────────────────────
-def _order_summary_sentence(ctx: Dict[str, Any]) -> str:
-    category = ctx.get("category")
-    menu_name = ctx.get("menu_name") or {
-        "coffee": "커피",
-        "ade": "에이드",
-        "tea": "차",
-        "dessert": "디저트",
-    }.get(category, "메뉴")
-
-    temp = ctx.get("temp")
-    size = ctx.get("size")
-    qty = ctx.get("quantity", 1)
-    options = ctx.get("options", {}) or {}
-
-    temp_str = ""
-    if temp == "ice":
-        temp_str = "아이스 "
-    elif temp == "hot":
-        temp_str = "뜨거운 "
-
-    size_str = {
-        "tall": "톨 ",
-        "grande": "그란데 ",
-        "venti": "벤티 ",
-        "small": "스몰 ",
-        "medium": "미디엄 ",
-        "large": "라지 ",
-    }.get(size, "")
+# 메뉴명이 없을 때 쓰는 카테고리 기본 이름
+_CATEGORY_DEFAULT_NAME = {cat: name for cat, (_, name) in _CATEGORY_DEFAULTS.items()}
+
+_SIZE_LABEL = {
+    "tall": "톨",
+    "grande": "그란데",
+    "venti": "벤티",
+    "small": "스몰",
+    "medium": "미디엄",
+    "large": "라지",
+}
 
-    # 잔/개 단위
-    if category in ("coffee", "ade", "tea"):
-        unit = "잔"
-    else:
-        unit = "개"
+_SWEETNESS_LABEL = {
+    "low": "당도 낮게",
+    "normal": "당도 보통",
+    "high": "당도 높게",
+}
 
-    opt_parts: list[str] = []
 
+def _render_order_parts(
+    ctx: SessionCtx,
+    temp_labels: Dict[str, str],
+    syrup_label: str = "시럽 추가",
+) -> tuple[str, str, str, list[str]]:
+    """
+    주문 문장 공통 요소 (menu_name, temp_str, size_str, opt_parts) 생성.
+    온도 표현은 문장마다 달라 호출 측에서 temp_labels로 넘긴다.
+    """
+    category = ctx.category
+    menu_name = ctx.menu_name or _CATEGORY_DEFAULT_NAME.get(category, "메뉴")
+    temp_str = temp_labels.get(ctx.temp, "")
+    size_str = _SIZE_LABEL.get(ctx.size, "")
+    options = ctx.options or {}
+
+    opt_parts: list[str] = []
     if category == "coffee":
         if options.get("decaf"):
             opt_parts.append("디카페인")
         if options.get("extra_shot", 0) > 0:
             opt_parts.append(f"샷 {options['extra_shot']}번 추가")
         if options.get("syrup"):
-            opt_parts.append("시럽 추가")
+            opt_parts.append(syrup_label)
     elif category == "ade":
-        sweetness = options.get("sweetness")
-        if sweetness == "low":
-            opt_parts.append("당도 낮게")
-        elif sweetness == "normal":
-            opt_parts.append("당도 보통")
-        elif sweetness == "high":
-            opt_parts.append("당도 높게")
+        sweetness_label = _SWEETNESS_LABEL.get(options.get("sweetness"))
+        if sweetness_label:
+            opt_parts.append(sweetness_label)
+
+    return menu_name, temp_str, size_str, opt_parts
+
+
+def _order_summary_sentence(ctx: SessionCtx) -> str:
+    menu_name, temp_str, size_str, opt_parts = _render_order_parts(ctx, {"ice": "아이스", "hot": "뜨거운"})
 
+    # 잔/개 단위
+    unit = "잔" if ctx.category in ("coffee", "ade", "tea") else "개"
+    prefix = "".join(f"{x} " for x in (temp_str, size_str) if x)
     opt_str = ", ".join(opt_parts) if opt_parts else "옵션 없이"
 
-    return f"{temp_str}{size_str}{menu_name} {qty}{unit}, {opt_str}로 주문하실 건가요?"
+    return f"{prefix}{menu_name} {ctx.quantity}{unit}, {opt_str}로 주문하실 건가요?"
 
 
-def _order_confirmation_sentence(ctx: Dict[str, Any]) -> str:
+def _order_confirmation_sentence(ctx: SessionCtx) -> str:
     """
     옵션 선택 완료 후 확인 메시지 생성
     형식: "주문하신 음료가 [메뉴명] [온도]/[사이즈]/[옵션]가 맞으신가요?"
     """
-    category = ctx.get("category")
-    menu_name = ctx.get("menu_name") or {
-        "coffee": "커피",
-        "ade": "에이드",
-        "tea": "차",
-        "dessert": "디저트",
-    }.get(category, "메뉴")
-
-    temp = ctx.get("temp")
-    size = ctx.get("size")
-    options = ctx.get("options", {}) or {}
-
-    # 온도 문자열
-    temp_str = ""
-    if temp == "ice":
-        temp_str = "아이스"
-    elif temp == "hot":
-        temp_str = "따뜻하게"
-
-    # 사이즈 문자열
-    size_str = {
-        "tall": "톨",
-        "grande": "그란데",
-        "venti": "벤티",
-        "small": "스몰",
-        "medium": "미디엄",
-        "large": "라지",
-    }.get(size, "")
-
-    # 옵션 문자열
-    opt_parts: list[str] = []
-    if category == "coffee":
-        if options.get("decaf"):
-            opt_parts.append("디카페인")
-        if options.get("extra_shot", 0) > 0:
-            opt_parts.append(f"샷 {options['extra_shot']}번 추가")
-        if options.get("syrup"):
-            opt_parts.append("시럽 추가")
-    elif category == "ade":
-        sweetness = options.get("sweetness")
-        if sweetness == "low":
-            opt_parts.append("당도 낮게")
-        elif sweetness == "normal":
-            opt_parts.append("당도 보통")
-        elif sweetness == "high":
-            opt_parts.append("당도 높게")
+    menu_name, temp_str, size_str, opt_parts = _render_order_parts(ctx, {"ice": "아이스", "hot": "따뜻하게"})
 
     # 슬래시로 구분된 정보 조합
-    parts: list[str] = [menu_name]
-    if temp_str:
-        parts.append(temp_str)
-    if size_str:
-        parts.append(size_str)
-    if opt_parts:
-        parts.extend(opt_parts)
-
-    order_info = "/".join(parts)
+    order_info = "/".join([menu_name, *(x for x in (temp_str, size_str) if x), *opt_parts])
     return f"주문하신 음료가 {order_info}가 맞으신가요?"
 
 
-def _cart_added_sentence(ctx: Dict[str, Any]) -> str:
+def _cart_added_sentence(ctx: SessionCtx) -> str:
     """
     장바구니 담김 메시지 생성
     형식: "에스프레소, 차갑게/벤티/시럽추가가 장바구니에 담겼습니다..."
     """
-    category = ctx.get("category")
-    menu_name = ctx.get("menu_name") or {
-        "coffee": "커피",
-        "ade": "에이드",
-        "tea": "차",
-        "dessert": "디저트",
-    }.get(category, "메뉴")
-
-    temp = ctx.get("temp")
-    size = ctx.get("size")
-    options = ctx.get("options", {}) or {}
-
-    # 온도 문자열
-    temp_str = ""
-    if temp == "ice":
-        temp_str = "차갑게"
-    elif temp == "hot":
-        temp_str = "따뜻하게"
-
-    # 사이즈 문자열
-    size_str = {
-        "tall": "톨",
-        "grande": "그란데",
-        "venti": "벤티",
-        "small": "스몰",
-        "medium": "미디엄",
-        "large": "라지",
-    }.get(size, "")
-
-    # 옵션 문자열
-    opt_parts: list[str] = []
-    if category == "coffee":
-        if options.get("decaf"):
-            opt_parts.append("디카페인")
-        if options.get("extra_shot", 0) > 0:
-            opt_parts.append(f"샷 {options['extra_shot']}번 추가")
-        if options.get("syrup"):
-            opt_parts.append("시럽추가")
-    elif category == "ade":
-        sweetness = options.get("sweetness")
-        if sweetness == "low":
-            opt_parts.append("당도 낮게")
-        elif sweetness == "normal":
-            opt_parts.append("당도 보통")
-        elif sweetness == "high":
-            opt_parts.append("당도 높게")
+    menu_name, temp_str, size_str, opt_parts = _render_order_parts(
+        ctx, {"ice": "차갑게", "hot": "따뜻하게"}, syrup_label="시럽추가"
+    )
 
     # 메뉴명과 옵션 정보 조합 (쉼표로 메뉴명 구분, 슬래시로 옵션 구분)
-    parts: list[str] = []
-    if temp_str:
-        parts.append(temp_str)
-    if size_str:
-        parts.append(size_str)
-    if opt_parts:
-        parts.extend(opt_parts)
-
-    if parts:
-        order_info = f"{menu_name}, {"/".join(parts)}"
-    else:
-        order_info = menu_name
+    parts = [*(x for x in (temp_str, size_str) if x), *opt_parts]
+    order_info = f"{menu_name}, {'/'.join(parts)}" if parts else menu_name
 
     return f"{order_info}가 장바구니에 담겼습니다. 이어서 주문을 진행하시거나 결제하기 버튼을 눌러주세요."
 
 
-def _handle_turn(ctx: Dict[str, Any], user_text: str) -> str:
-    """대화 턴 처리. /session/text와 /session/voice 모두 이 함수를 사용합니다."""
-    print(f"[_handle_turn] 호출: text='{user_text}', step={ctx.get('step')}, category={ctx.get('category')}")
-    text = (user_text or "").strip()
-    step = ctx.get("step", "greeting")
-    category = ctx.get("category")
+def _after_size_reply(ctx: SessionCtx, lead: str) -> str:
+    """
+    사이즈까지 정해진 뒤 다음 단계로 이동하고 안내 문장 반환.
+    커피/에이드는 옵션 선택, 그 외(차 등)는 주문 확인으로. lead는 앞에 붙일 확인 문구.
+    """
+    if ctx.category in ("coffee", "ade"):
+        ctx.step = "options"
+        return f"{lead} 옵션을 선택해주세요."
+    ctx.step = "confirm"
+    return _order_summary_sentence(ctx)
+
+
+# 턴 처리에서 쓰는 의도 키워드 그룹 (공백 제거·소문자 텍스트 기준).
+# 그룹마다 하나의 정규식으로 미리 컴파일해 발화당 한 번의 스캔으로 판별한다.
+_TURN_KEYWORDS = {
+    "back": ["이전", "뒤로", "취소", "돌아가", "back", "prev"],
+    "payment": [
+        "결제하기", "결제", "결제할게요", "결제하겠어요", "결제하겠습니다",
+        "결제할게", "결제하자", "결제해줘", "결제해주세요",
+    ],
+    "remove": ["빼", "빼줘", "빼달라", "빼달라고", "제거", "제거해줘", "삭제", "삭제해줘", "없애", "없애줘"],
+    "complex_remove": ["빼", "빼줘", "빼고", "빼고나서"],
+    "add": ["담아", "담아줘", "담아달라", "담아달래", "담아달라고", "담아주", "추가", "넣어", "넣어줘"],
+    "cart": ["장바구니", "카트"],
+    "confirm_add": ["장바구니", "담아", "담아줘", "담아주", "추가", "넣어", "넣어줘"],
+    "help_question": ["어디", "어떻게", "뭐", "무엇", "어떤", "방법", "어디에", "어디서", "어떡해", "어떻게해"],
+    "payment_word": ["쿠폰", "카드", "결제", "현금", "페이", "카카오"],
+    "card_complete": ["완료", "됐", "넣었", "삽입", "결제", "다됐"],
+    "coupon_complete": ["완료", "됐", "인식", "스캔", "결제", "다됐"],
+}
 
+_TURN_PATTERNS = {
+    group: _keyword_pattern(words)
+    for group, words in _TURN_KEYWORDS.items()
+}
 
-    # 0) 인사 단계
-    if step == "greeting":
-        # "주문" 키워드 확인
-        if "주문" in text or "시작" in text or "시작할게" in text:
-            ctx["step"] = "dine_type"
-            return "포장해서 가져가시나요, 매장에서 드시나요?"
-        # 주문 버튼을 누르지 않았으면 인사 메시지 반환
-        return "안녕하세요. AI음성 키오스크 말로입니다. 주문을 도와드릴게요."
 
-    # 1) 먹고가기 / 들고가기
+async def _step_greeting(ctx: SessionCtx, text: str, t: str) -> str:
+    """인사 단계: '주문'/'시작'이면 포장/매장 선택으로."""
+    # "주문" 키워드 확인
+    if any(k in text for k in _GREETING_START_KEYWORDS):
+        ctx.step = "dine_type"
+        return "포장해서 가져가시나요, 매장에서 드시나요?"
+    # 주문 버튼을 누르지 않았으면 인사 메시지 반환
+    return "안녕하세요. AI음성 키오스크 말로입니다. 주문을 도와드릴게요."
 
-    # 일반 질문 감지 → OpenAI로 답변 (UI 위치 질문은 상위에서 이미 처리)
-    if looks_like_general_question(text):
-        resp_text, _ = answer_general_question(text)
-        return resp_text
 
-    # 1) 먹고가기 / 매장에서
-    if step == "dine_type":
-        # LLM 파싱 시도, 실패 시 규칙 기반 폴백
-        dine = _parse_dine_type_llm(text) or _parse_dine_type(text)
-        if dine is None:
-            return "포장해서 가져가시나요, 매장에서 드시나요?"
-        ctx["dine_type"] = dine
-        
-        # 선택한 옵션을 한국어로 변환
-        dine_name = "포장" if dine == "takeout" else "매장"
-        
-        ctx["step"] = "menu_item"
-        return f"{dine_name}을 선택하셨습니다. 원하시는 메뉴를 말씀해주세요."
-
-    # 2) 세부 메뉴 선택 (아메리카노, 레몬에이드, 치즈케이크 등)
-    if step == "menu_item":
-        # 결제하기 버튼 클릭 체크
-        t = text.replace(" ", "").lower()
-        is_payment_intent = any(x in t for x in ["결제하기", "결제", "결제할게요", "결제하겠어요", "결제하겠습니다"])
-        
-        if is_payment_intent:
-            # 주문 내역이 있는지 확인
-            if ctx.get("menu_name") and ctx.get("category"):
-                # 주문 내역이 있으면 확인 단계로
-                ctx["step"] = "confirm"
-                return "주문내역을 확인하고 결제를 진행해주세요."
-            else:
-                # 주문 내역이 없으면 메뉴 선택 요청
-                return "주문하실 메뉴를 먼저 선택해 주세요."
-        
-        # 복합 액션 체크 ("치즈케이크 빼고 마카롱 담아줘" 등)
-        is_complex_action = any(x in t for x in ["빼", "빼줘", "빼고", "빼고나서"]) and any(x in t for x in ["담아", "담아줘", "담아달라", "추가", "넣어", "넣어줘"])
-        
-        if is_complex_action:
-            # 복합 액션 파싱 (제거 + 추가)
-            cart_action = _parse_cart_action_llm(text)
-            if cart_action:
-                remove_menu = cart_action.get("remove_menu", {})
-                add_menu = cart_action.get("add_menu", {})
-                
-                remove_category = remove_menu.get("category")
-                remove_menu_id = remove_menu.get("menu_id")
-                remove_menu_name = remove_menu.get("menu_name")
-                
-                add_category = add_menu.get("category")
-                add_menu_id = add_menu.get("menu_id")
-                add_menu_name = add_menu.get("menu_name")
-                
-                response_parts = []
-                
-                # 제거 처리
-                if remove_category and remove_menu_id and remove_menu_name:
-                    ctx["remove_from_cart"] = True
-                    ctx["remove_menu_category"] = remove_category
-                    ctx["remove_menu_id"] = remove_menu_id
-                    ctx["remove_menu_name"] = remove_menu_name
-                    response_parts.append(f"{remove_menu_name}를 장바구니에서 제거했습니다")
-                
-                # 추가 처리
-                if add_category and add_menu_id and add_menu_name:
-                    ctx["add_to_cart"] = True
-                    # 추가할 메뉴 정보 저장
-                    ctx["category"] = add_category
-                    ctx["menu_id"] = add_menu_id
-                    ctx["menu_name"] = add_menu_name
-                    ctx["temp"] = None
-                    ctx["size"] = None
-                    ctx["options"] = {
-                        "extra_shot": 0,
-                        "syrup": False,
-                        "decaf": None,
-                        "sweetness": None,
-                    }
-                    
-                    # 디저트는 바로 추가 가능
-                    if add_category == "dessert":
-                        response_parts.append(f"{add_menu_name}를 장바구니에 담았습니다")
-                    else:
-                        # 커피/차/에이드는 온도/사이즈 선택 필요
-                        ctx["step"] = "temp" if add_category in ("coffee", "tea") else "size"
-                        return f"{add_menu_name}를 선택하셨어요. " + ("따뜻하게 드실까요, 차갑게 드실까요?" if add_category in ("coffee", "tea") else "사이즈는 작은 사이즈, 중간 사이즈, 큰 사이즈 중에서 선택해 주세요.")
-                
-                ctx["step"] = "menu_item"
-                
-                if response_parts:
-                    return ". ".join(response_parts) + "."
-                else:
-                    return "메뉴를 다시 말씀해 주세요."
-        
-        # 장바구니 제거 의도 LLM 감지 ("티라미수 빼줘", "티라미수 장바구니에서 빼줘" 등)
-        # "빼", "빼줘", "제거" 등의 키워드가 있으면 LLM으로 제거 의도 확인
-        has_remove_keyword = any(x in t for x in ["빼", "빼줘", "빼달라", "빼달라고", "제거", "제거해줘", "삭제", "삭제해줘", "없애", "없애줘"])
-        is_remove_from_cart_intent = False
-        remove_menu_info = None
-        
-        if has_remove_keyword:
-            # LLM으로 복합 액션 파싱 시도 (제거 의도 확인)
-            cart_action = _parse_cart_action_llm(text)
-            if cart_action:
-                remove_menu = cart_action.get("remove_menu", {})
-                # 제거할 메뉴가 있고, 추가할 메뉴가 없는 경우 (순수 제거 의도)
-                if remove_menu.get("category") and remove_menu.get("menu_id") and remove_menu.get("menu_name"):
-                    add_menu = cart_action.get("add_menu", {})
-                    if not add_menu.get("category") or not add_menu.get("menu_id"):
-                        is_remove_from_cart_intent = True
-                        remove_menu_info = remove_menu
-        
-        # LLM 감지 실패 시, 규칙 기반 폴백 (장바구니/카트 키워드 필수)
-        if not is_remove_from_cart_intent:
-            is_remove_from_cart_intent = has_remove_keyword and any(x in t for x in ["장바구니", "카트"])
-        
-        if is_remove_from_cart_intent:
-            # LLM으로 파싱된 정보 사용 또는 메뉴 파싱
-            if remove_menu_info:
-                parsed_category = remove_menu_info.get("category")
-                menu_id = remove_menu_info.get("menu_id")
-                menu_name = remove_menu_info.get("menu_name")
-            else:
-                # 규칙 기반 감지인 경우 메뉴 파싱
-                parsed = _parse_menu_item_llm(text, category) or _parse_menu_item(category, text)
-                if not parsed:
-                    return "어떤 메뉴를 장바구니에서 빼드릴까요? 메뉴 이름을 말씀해 주세요."
-                parsed_category, menu_id, menu_name = parsed
+async def _step_dine_type(ctx: SessionCtx, text: str, t: str) -> str:
+    """포장/매장 선택 단계."""
+    # 규칙 기반 키워드 매칭 우선, 실패 시에만 LLM 호출
+    dine = _parse_dine_type(text) or await _parse_dine_type_llm(text)
+    if dine is None:
+        return "포장해서 가져가시나요, 매장에서 드시나요?"
+    ctx.dine_type = dine
+    
+    # 선택한 옵션을 한국어로 변환
+    dine_name = "포장" if dine == "takeout" else "매장"
+    
+    ctx.step = "menu_item"
+    return f"{dine_name}을 선택하셨습니다. 원하시는 메뉴를 말씀해주세요."
+
+
+async def _step_menu_item(ctx: SessionCtx, text: str, t: str) -> str:
+    """세부 메뉴 선택 단계 (아메리카노, 레몬에이드, 치즈케이크 등). 장바구니 추가/제거와 결제 진입도 처리."""
+    category = ctx.category
+    # 결제하기 버튼 클릭 체크
+    is_payment_intent = bool(_TURN_PATTERNS["payment"].search(t))
+    
+    if is_payment_intent:
+        return _pay_from_menu_item(ctx)
+    
+    # 제거 키워드가 있을 때만 장바구니 액션(제거+추가)을 LLM으로 한 번 파싱하고,
+    # 아래 복합 액션/제거/메뉴 선택 분기에서 같은 결과를 재사용한다.
+    has_remove_keyword = bool(_TURN_PATTERNS["remove"].search(t))
+    cart_action = await _parse_cart_action_llm(text) if has_remove_keyword else None
+    
+    # 복합 액션 체크 ("치즈케이크 빼고 마카롱 담아줘" 등)
+    is_complex_action = bool(_TURN_PATTERNS["complex_remove"].search(t) and _TURN_PATTERNS["add"].search(t))
+    
+    if is_complex_action:
+        # 복합 액션 처리 (제거 + 추가)
+        if cart_action:
+            remove_menu = cart_action.get("remove_menu", {})
+            add_menu = cart_action.get("add_menu", {})
             
-            # 장바구니에서 제거 플래그 설정
-            ctx["remove_from_cart"] = True
-            ctx["remove_menu_category"] = parsed_category
-            ctx["remove_menu_id"] = menu_id
-            ctx["remove_menu_name"] = menu_name
-            ctx["category"] = parsed_category
-            ctx["menu_id"] = menu_id
-            ctx["menu_name"] = menu_name
-            ctx["temp"] = None
-            ctx["size"] = None
-            ctx["options"] = {
-                "extra_shot": 0,
-                "syrup": False,
-                "decaf": None,
-                "sweetness": None,
-            }
-            ctx["step"] = "menu_item"
+            remove_category = remove_menu.get("category")
+            remove_menu_id = remove_menu.get("menu_id")
+            remove_menu_name = remove_menu.get("menu_name")
             
-            # target_element_id 생성 및 context에 저장
-            target_element_id = _menu_id_to_target_element_id(menu_id)
-            ctx["target_element_id"] = target_element_id
+            add_category = add_menu.get("category")
+            add_menu_id = add_menu.get("menu_id")
+            add_menu_name = add_menu.get("menu_name")
             
-            # 응답 텍스트 생성
-            resp_text = f"{menu_name}를 장바구니에서 제거하겠습니다."
+            response_parts = []
             
-            return resp_text
-        
-        # LLM 파싱 시도, 실패 시 규칙 기반 폴백
-        parsed = _parse_menu_item_llm(text, category) or _parse_menu_item(category, text)
-        if not parsed:
-            print(f"[메뉴 파싱 실패] step={step}, category={category}, text='{text}'")
-            return "죄송해요, 잘 못 들었어요. 다시 한 번 메뉴를 말씀해 주세요."
-        parsed_category, menu_id, menu_name = parsed
-        print(f"[메뉴 파싱 성공] category={parsed_category}, menu_id={menu_id}, menu_name={menu_name}")
-        ctx["category"] = parsed_category
-        ctx["menu_id"] = menu_id
-        ctx["menu_name"] = menu_name
-        ctx["temp"] = None
-        ctx["size"] = None
-        ctx["options"] = {
-            "extra_shot": 0,
-            "syrup": False,
-            "decaf": None,
-            "sweetness": None,
-        }
-
-        # 카테고리별로 다음 단계 분기
-        category = parsed_category
-        
-        # 메뉴 선택과 함께 장바구니 추가 의도가 있는지 체크 ("담아줘", "담아달라" 등)
-        t = text.replace(" ", "").lower()
-        is_add_to_cart_intent = any(x in t for x in ["담아", "담아줘", "담아달라", "담아달래", "담아달라고", "담아주", "추가", "넣어", "넣어줘"])
-        
-        if category in ("coffee", "tea"):
-            ctx["step"] = "temp"
-            return f"{menu_name}를 선택하셨어요. 따뜻하게 드실까요, 차갑게 드실까요?"
-        if category == "ade":
-            ctx["step"] = "size"
-            return f"{menu_name}를 선택하셨어요. 사이즈는 작은 사이즈, 중간 사이즈, 큰 사이즈 중에서 선택해 주세요."
-        if category == "dessert":
-            # 디저트는 온도/사이즈 선택이 없으므로, "담아줘" 같은 의도가 있으면 바로 장바구니에 추가
-            if is_add_to_cart_intent:
-                ctx["add_to_cart"] = True
-                ctx["step"] = "menu_item"
-                return _cart_added_sentence(ctx)
+            # 제거 처리
+            if remove_category and remove_menu_id and remove_menu_name:
+                ctx.remove_from_cart = True
+                ctx.remove_menu_category = remove_category
+                ctx.remove_menu_id = remove_menu_id
+                ctx.remove_menu_name = remove_menu_name
+                response_parts.append(f"{remove_menu_name}를 장바구니에서 제거했습니다")
+            
+            # 추가 처리
+            if add_category and add_menu_id and add_menu_name:
+                ctx.add_to_cart = True
+                # 추가할 메뉴 정보 저장
+                ctx.category = add_category
+                ctx.menu_id = add_menu_id
+                ctx.menu_name = add_menu_name
+                ctx.temp = None
+                ctx.size = None
+                ctx.options = _default_options()
+                
+                # 디저트는 바로 추가 가능
+                if add_category == "dessert":
+                    response_parts.append(f"{add_menu_name}를 장바구니에 담았습니다")
+                else:
+                    # 커피/차/에이드는 온도/사이즈 선택 필요
+                    ctx.step = "temp" if add_category in ("coffee", "tea") else "size"
+                    return f"{add_menu_name}를 선택하셨어요. " + ("따뜻하게 드실까요, 차갑게 드실까요?" if add_category in ("coffee", "tea") else "사이즈는 작은 사이즈, 중간 사이즈, 큰 사이즈 중에서 선택해 주세요.")
+            
+            ctx.step = "menu_item"
+            
+            if response_parts:
+                return ". ".join(response_parts) + "."
             else:
-                ctx["step"] = "confirm"
-                return _order_summary_sentence(ctx)
-
-    # 4) 온도 선택
-    if step == "temp":
-        # 이전 버튼 클릭 체크
-        t = text.replace(" ", "").lower()
-        is_back = any(x in t for x in ["이전", "뒤로", "취소", "돌아가", "back", "prev"])
-        
-        if is_back:
-            ctx["step"] = "menu_item"
-            return "주문을 다시 진행해주세요."
+                return "메뉴를 다시 말씀해 주세요."
+    
+    # 장바구니 제거 의도 LLM 감지 ("티라미수 빼줘", "티라미수 장바구니에서 빼줘" 등)
+    # "빼", "빼줘", "제거" 등의 키워드가 있으면 위에서 파싱한 장바구니 액션으로 제거 의도 확인
+    is_remove_from_cart_intent = False
+    remove_menu_info = None
+    
+    if has_remove_keyword:
+        if cart_action:
+            remove_menu = cart_action.get("remove_menu", {})
+            # 제거할 메뉴가 있고, 추가할 메뉴가 없는 경우 (순수 제거 의도)
+            if remove_menu.get("category") and remove_menu.get("menu_id") and remove_menu.get("menu_name"):
+                add_menu = cart_action.get("add_menu", {})
+                if not add_menu.get("category") or not add_menu.get("menu_id"):
+                    is_remove_from_cart_intent = True
+                    remove_menu_info = remove_menu
+    
+    # LLM 감지 실패 시, 규칙 기반 폴백 (장바구니/카트 키워드 필수)
+    if not is_remove_from_cart_intent:
+        is_remove_from_cart_intent = has_remove_keyword and bool(_TURN_PATTERNS["cart"].search(t))
+    
+    if is_remove_from_cart_intent:
+        # LLM으로 파싱된 정보 사용 또는 메뉴 파싱
+        if remove_menu_info:
+            parsed_category = remove_menu_info.get("category")
+            menu_id = remove_menu_info.get("menu_id")
+            menu_name = remove_menu_info.get("menu_name")
+        else:
+            # 규칙 기반 감지인 경우 메뉴 파싱 (정확한 메뉴명이면 LLM 생략)
+            parsed = (
+                _parse_menu_item_exact(text)
+                or await _parse_menu_item_llm(text, category)
+                or _parse_menu_item(category, text)
+            )
+            if not parsed:
+                return "어떤 메뉴를 장바구니에서 빼드릴까요? 메뉴 이름을 말씀해 주세요."
+            parsed_category, menu_id, menu_name = parsed
+        
+        # 장바구니에서 제거 플래그 설정
+        ctx.remove_from_cart = True
+        ctx.remove_menu_category = parsed_category
+        ctx.remove_menu_id = menu_id
+        ctx.remove_menu_name = menu_name
+        ctx.category = parsed_category
+        ctx.menu_id = menu_id
+        ctx.menu_name = menu_name
+        ctx.temp = None
+        ctx.size = None
+        ctx.options = _default_options()
+        ctx.step = "menu_item"
+        
+        # target_element_id 생성 및 context에 저장
+        target_element_id = _menu_id_to_target_element_id(menu_id)
+        ctx.target_element_id = target_element_id
+        
+        # 응답 텍스트 생성
+        resp_text = f"{menu_name}를 장바구니에서 제거하겠습니다."
         
-        # LLM 파싱 시도, 실패 시 규칙 기반 폴백
-        temp = _parse_temp_llm(text) or _parse_temp(text)
-
-        if temp is None:
-            return "따뜻하게 드실지, 차갑게 드실지 말씀해 주세요. 예: '아이스로 주세요'."
-        ctx["temp"] = temp
-        ctx["step"] = "size"
-        how = "아이스" if temp == "ice" else "뜨겁게"
-        return f"{how}로 준비할게요. 사이즈는 작은 사이즈, 중간 사이즈, 큰 사이즈 중에서 선택해 주세요."
-
-
-    # 5) 사이즈 선택
-    if step == "size":
-        # 이전 버튼 클릭 체크
-        t = text.replace(" ", "").lower()
-        is_back = any(x in t for x in ["이전", "뒤로", "취소", "돌아가", "back", "prev"])
-        
-        if is_back:
-            # 온도 선택이 필요한 카테고리인 경우
-            if category in ("coffee", "tea"):
-                ctx["step"] = "temp"
-                return "온도를 다시 선택해주세요."
-            # 에이드는 온도 선택 없이 사이즈만 선택하므로 메뉴 선택으로
-            else:
-                ctx["step"] = "menu_item"
-                return "주문을 다시 진행해주세요."
-        
-        # LLM 파싱 시도, 실패 시 규칙 기반 폴백
-        size = _parse_size_llm(text) or _parse_size(text)
-        if size is None:
-            return "사이즈를 다시 말씀해 주세요. 작은 사이즈, 중간 사이즈, 큰 사이즈 중 하나를 선택해 주세요."
-        ctx["size"] = size
-
-        # 사이즈를 한국어로 변환
-        size_map = {
-            "tall": "톨",
-            "grande": "그란데",
-            "venti": "벤티",
-            "small": "작은사이즈",
-            "medium": "중간사이즈",
-            "large": "큰사이즈",
-        }
-        size_name = size_map.get(size, "사이즈")
-
-        if category == "coffee":
-            ctx["step"] = "options"
-            return f"{size_name}를 선택하였습니다. 옵션을 선택해주세요."
-        if category == "ade":
-            ctx["step"] = "options"
-            return f"{size_name}를 선택하였습니다. 옵션을 선택해주세요."
-        if category == "tea":
-            ctx["step"] = "confirm"
-            return _order_summary_sentence(ctx)
-        if category == "dessert":
-            ctx["step"] = "confirm"
-            return _order_summary_sentence(ctx)
-
-    # 6) 옵션 선택
-    if step == "options":
-        # 이전 버튼 클릭 체크
-        t = text.replace(" ", "").lower()
-        is_back = any(x in t for x in ["이전", "뒤로", "취소", "돌아가", "back", "prev"])
-        
-        if is_back:
-            ctx["step"] = "size"
-            return "사이즈를 다시 선택해주세요."
-        
-        options = ctx.get("options", {})
-        # LLM 파싱 시도, 실패 시 규칙 기반 폴백
+        return resp_text
+    
+    # 정확한 메뉴명이 하나만 있으면 바로 사용, 아니면 LLM 파싱 시도 후 규칙 기반(별칭 포함) 폴백
+    # (장바구니 액션을 이미 파싱했다면 추가 메뉴를 그대로 쓰고 메뉴 LLM은 다시 호출하지 않음)
+    if cart_action is not None:
+        parsed = _cart_menu_tuple(cart_action.get("add_menu")) or _parse_menu_item(category, text)
+    else:
+        parsed = (
+            _parse_menu_item_exact(text)
+            or await _parse_menu_item_llm(text, category)
+            or _parse_menu_item(category, text)
+        )
+    if not parsed:
+        log.debug("[메뉴 파싱 실패] category=%s, text=%r", category, text)
+        return "죄송해요, 잘 못 들었어요. 다시 한 번 메뉴를 말씀해 주세요."
+    parsed_category, menu_id, menu_name = parsed
+    log.debug("[메뉴 파싱 성공] category=%s, menu_id=%s, menu_name=%s", parsed_category, menu_id, menu_name)
+    ctx.category = parsed_category
+    ctx.menu_id = menu_id
+    ctx.menu_name = menu_name
+    # 같은 발화에 온도/사이즈가 함께 있으면("아이스 아메리카노 톨 사이즈로") 미리 채우고 해당 단계를 건너뜀
+    ctx.temp = _parse_temp(text) if parsed_category in ("coffee", "tea") else None
+    ctx.size = _parse_size(text) if parsed_category != "dessert" else None
+    ctx.options = _default_options()
+
+    # 카테고리별로 다음 단계 분기
+    category = parsed_category
+    
+    # 메뉴 선택과 함께 장바구니 추가 의도가 있는지 체크 ("담아줘", "담아달라" 등)
+    is_add_to_cart_intent = bool(_TURN_PATTERNS["add"].search(t))
+    
+    if category in ("coffee", "tea"):
+        if ctx.temp is None:
+            ctx.step = "temp"
+            return f"{menu_name}를 선택하셨어요. 따뜻하게 드실까요, 차갑게 드실까요?"
+        how = "아이스" if ctx.temp == "ice" else "뜨겁게"
+        if ctx.size is None:
+            ctx.step = "size"
+            return f"{menu_name}를 {how}로 준비할게요. 사이즈는 작은 사이즈, 중간 사이즈, 큰 사이즈 중에서 선택해 주세요."
+        return _after_size_reply(ctx, f"{menu_name}를 {how}로 준비할게요.")
+    if category == "ade":
+        if ctx.size is not None:
+            return _after_size_reply(ctx, f"{menu_name}를 선택하셨어요.")
+        ctx.step = "size"
+        return f"{menu_name}를 선택하셨어요. 사이즈는 작은 사이즈, 중간 사이즈, 큰 사이즈 중에서 선택해 주세요."
+    # 디저트는 온도/사이즈 선택이 없으므로, "담아줘" 같은 의도가 있으면 바로 장바구니에 추가
+    if is_add_to_cart_intent:
+        ctx.add_to_cart = True
+        ctx.step = "menu_item"
+        return _cart_added_sentence(ctx)
+    ctx.step = "confirm"
+    return _order_summary_sentence(ctx)
+
+
+async def _step_temp(ctx: SessionCtx, text: str, t: str) -> str:
+    """온도 선택 단계."""
+    # 이전 버튼 클릭 체크
+    is_back = bool(_TURN_PATTERNS["back"].search(t))
+    
+    if is_back:
+        ctx.step = "menu_item"
+        return "주문을 다시 진행해주세요."
+    
+    # 규칙 기반 키워드 매칭 우선, 실패 시에만 LLM 호출
+    temp = _parse_temp(text) or await _parse_temp_llm(text)
+
+    if temp is None:
+        return "따뜻하게 드실지, 차갑게 드실지 말씀해 주세요. 예: '아이스로 주세요'."
+    ctx.temp = temp
+    how = "아이스" if temp == "ice" else "뜨겁게"
+    # 메뉴를 고를 때 사이즈까지 말했으면 사이즈 단계는 건너뜀
+    if ctx.size is not None:
+        return _after_size_reply(ctx, f"{how}로 준비할게요.")
+    ctx.step = "size"
+    return f"{how}로 준비할게요. 사이즈는 작은 사이즈, 중간 사이즈, 큰 사이즈 중에서 선택해 주세요."
+
+
+async def _step_size(ctx: SessionCtx, text: str, t: str) -> str:
+    """사이즈 선택 단계."""
+    category = ctx.category
+    # 이전 버튼 클릭 체크
+    is_back = bool(_TURN_PATTERNS["back"].search(t))
+    
+    if is_back:
+        # 온도 선택이 필요한 카테고리인 경우
+        if category in ("coffee", "tea"):
+            # 사이즈 단계를 거쳐 되돌아왔으므로 이전 사이즈는 지워 온도 선택 뒤 사이즈를 다시 묻게 함
+            # (ctx.size가 남아 있으면 _step_temp가 메뉴 발화에서 미리 정한 사이즈로 보고 건너뜀)
+            ctx.size = None
+            ctx.step = "temp"
+            return "온도를 다시 선택해주세요."
+        # 에이드는 온도 선택 없이 사이즈만 선택하므로 메뉴 선택으로
+        else:
+            ctx.step = "menu_item"
+            return "주문을 다시 진행해주세요."
+    
+    # 규칙 기반 키워드 매칭 우선, 실패 시에만 LLM 호출
+    size = _parse_size(text) or await _parse_size_llm(text)
+    if size is None:
+        return "사이즈를 다시 말씀해 주세요. 작은 사이즈, 중간 사이즈, 큰 사이즈 중 하나를 선택해 주세요."
+    ctx.size = size
+
+    # 사이즈를 한국어로 변환
+    size_map = {
+        "tall": "톨",
+        "grande": "그란데",
+        "venti": "벤티",
+        "small": "작은사이즈",
+        "medium": "중간사이즈",
+        "large": "큰사이즈",
+    }
+    size_name = size_map.get(size, "사이즈")
+    return _after_size_reply(ctx, f"{size_name}를 선택하였습니다.")
+
+
+async def _step_options(ctx: SessionCtx, text: str, t: str) -> str:
+    """옵션 선택 단계. 옵션이 정해지면 장바구니에 담고 메뉴판으로 돌아감."""
+    category = ctx.category
+    # 이전 버튼 클릭 체크
+    is_back = bool(_TURN_PATTERNS["back"].search(t))
+    
+    if is_back:
+        ctx.step = "size"
+        return "사이즈를 다시 선택해주세요."
+    
+    options = ctx.options
+    # 키워드만으로 확실한 발화('디카페인으로', '샷 두 번 추가')는 규칙으로 바로 처리
+    rule_options = _parse_options_rule(category, text, options)
+    if rule_options is not None:
+        ctx.options = rule_options
+    else:
+        # 애매한 발화만 LLM 파싱 시도, 실패 시 규칙 기반 폴백
         try:
-            parsed_options = _parse_options_llm(category, text, options)
-            ctx["options"] = parsed_options
+            ctx.options = await _parse_options_llm(category, text, options)
         except Exception as e:
-            print(f"[options 파싱] LLM 실패, 규칙 기반 사용: {e}")
-            ctx["options"] = _parse_options(category, text, options)
-        # 옵션 선택 후 메뉴 정보는 유지하고 메뉴판으로 돌아감
-        # 메뉴 + 온도 + 사이즈 + 옵션까지 확정되었으므로 장바구니에 추가
-        ctx["add_to_cart"] = True
-        ctx["step"] = "menu_item"
-        return _cart_added_sentence(ctx)
+            log.warning("[options 파싱] LLM 실패, 규칙 기반 사용: %s", e)
+            ctx.options = _parse_options(category, text, options)
+    # 옵션 선택 후 메뉴 정보는 유지하고 메뉴판으로 돌아감
+    # 메뉴 + 온도 + 사이즈 + 옵션까지 확정되었으므로 장바구니에 추가
+    ctx.add_to_cart = True
+    ctx.step = "menu_item"
+    return _cart_added_sentence(ctx)
 
-    # 7) 주문 확인
-    if step == "confirm":
-        # 이전 버튼 클릭 체크
-        t = text.replace(" ", "").lower()
-        is_back = any(x in t for x in ["이전", "뒤로", "취소", "돌아가", "back", "prev"])
-        
-        if is_back:
-            ctx["step"] = "menu_item"
-            return "주문을 계속 진행해주세요."
-        
-        # 장바구니에 담아줘 인식
-        is_add_to_cart = any(x in t for x in ["장바구니", "담아", "담아줘", "담아주", "추가", "넣어", "넣어줘"])
-        
-        # 결제하기 버튼 클릭 또는 결제 관련 키워드 체크
-        is_payment_intent = any(x in t for x in ["결제하기", "결제", "결제할게요", "결제하겠어요", "결제하겠습니다"])
-        
-        print(f"받은 텍스트: {text}")
-        print(f"전처리 후: {t}")
-        print(f"is_payment_intent: {is_payment_intent}")
-        print(f"is_add_to_cart: {is_add_to_cart}")
-        
-        yn = _yes_no(text)
-        
-        # 결제 의도가 명확하면 결제 수단 파싱 시도
-        if is_payment_intent:
-            # LLM으로 결제 수단 파싱 시도
-            pay = _parse_payment_llm(text) or _parse_payment(text)
-            
-            if pay:
-                # 결제 수단이 명확하면 바로 해당 단계로
-                ctx["payment_method"] = pay
-                if pay == "card":
-                    ctx["step"] = "card"
-                    return "카드를 삽입해주세요."
-                elif pay == "coupon":
-                    ctx["step"] = "coupon"
-                    return "아래 바코드기에 핸드폰을 대고 인식시켜주세요."
-                else:
-                    # 그 외 결제 수단은 바로 완료
-                    ctx["step"] = "done"
-                    spoken_pay = {
-                        "pay": "간편결제",
-                        "kakaopay": "카카오페이",
-                        "samsungpay": "삼성페이",
-                        "cash": "현금",
-                    }.get(pay, "선택하신 결제 수단")
-                    return f"{spoken_pay}로 결제 도와드릴게요. 주문이 완료되었습니다. 감사합니다."
+
+async def _step_confirm(ctx: SessionCtx, text: str, t: str) -> str:
+    """주문 확인 단계."""
+    # 이전 버튼 클릭 체크
+    is_back = bool(_TURN_PATTERNS["back"].search(t))
+    
+    if is_back:
+        ctx.step = "menu_item"
+        return "주문을 계속 진행해주세요."
+    
+    # 장바구니에 담아줘 인식
+    is_add_to_cart = bool(_TURN_PATTERNS["confirm_add"].search(t))
+    
+    # 결제하기 버튼 클릭 또는 결제 관련 키워드 체크
+    is_payment_intent = bool(_TURN_PATTERNS["payment"].search(t))
+    
+    log.debug(
+        "[options] 받은 텍스트: %r, 전처리 후: %r, is_payment_intent: %s, is_add_to_cart: %s",
+        text, t, is_payment_intent, is_add_to_cart,
+    )
+    
+    yn = _yes_no(text)
+    
+    # 결제 의도가 명확하면 결제 수단 파싱 시도
+    if is_payment_intent:
+        # 규칙 기반으로 결제 수단 파싱, 실패 시에만 LLM 호출
+        pay = _parse_payment(text) or await _parse_payment_llm(text)
+        
+        if pay:
+            # 결제 수단이 명확하면 바로 해당 단계로
+            ctx.payment_method = pay
+            if pay == "card":
+                ctx.step = "card"
+                return "카드를 삽입해주세요."
+            elif pay == "coupon":
+                ctx.step = "coupon"
+                return "아래 바코드기에 핸드폰을 대고 인식시켜주세요."
             else:
-                # 결제 수단이 불명확하면 payment 단계로
-                ctx["step"] = "payment"
-                return "결제 수단을 선택해 주세요. 카드결제, 간편결제, 쿠폰 결제 등으로 말씀해 주세요."
-        
-        # "네", "맞아요", "장바구니에 담아줘" 등의 표현으로 장바구니 추가
-        if yn == "yes" or is_add_to_cart:
-            ctx["add_to_cart"] = True
-            ctx["step"] = "menu_item"
-            return _cart_added_sentence(ctx)
-        
-        if yn == "no":
-            # 메뉴부터 다시
-            ctx["category"] = None
-            ctx["menu_id"] = None
-            ctx["menu_name"] = None
-            ctx["temp"] = None
-            ctx["size"] = None
-            ctx["options"] = {
-                "extra_shot": 0,
-                "syrup": False,
-                "decaf": None,
-                "sweetness": None,
-            }
-            ctx["step"] = "menu_item"
-            return "알겠습니다. 다시 원하시는 메뉴를 말씀해 주세요."
-        return "주문이 맞으면 '네', 다시 선택하시려면 '아니요'라고 말씀해 주세요."
-
-    # 8) 결제 수단
-    if step == "payment":
-        # 이전 버튼 클릭 체크
-        t = text.replace(" ", "").lower()
-        is_back = any(x in t for x in ["이전", "뒤로", "취소", "돌아가", "back", "prev"])
-        
-        if is_back:
-            ctx["step"] = "menu_item"
-            return "주문을 계속 진행해주세요."
-        
-        # 결제 수단 관련 UI 도움말 질문 처리
-        # "쿠폰 사용하려면 뭐 눌러야해?", "카드 결제 어떻게 해?", "쿠폰 어디 눌러야 해?" 등
-        is_payment_help_question = any(keyword in t for keyword in [
-            "어디", "어떻게", "뭐", "무엇", "어떤", "방법", "어디에", "어디서", "어떡해", "어떻게해"
-        ]) and any(payment_keyword in t for payment_keyword in [
-            "쿠폰", "카드", "결제", "현금", "페이", "카카오"
-        ])
-        
-        if is_payment_help_question:
-            # 쿠폰 관련 질문
-            if "쿠폰" in t:
-                return "쿠폰결제를 눌러주세요."
-            # 카드 관련 질문
-            if "카드" in t:
-                return "카드결제를 눌러주세요."
-            # 현금 관련 질문
-            if "현금" in t:
-                return "현금결제를 눌러주세요."
-            # 카카오페이 관련 질문
-            if "카카오" in t or "페이" in t:
-                return "간편결제를 눌러주세요."
-            # 일반적인 결제 수단 질문
-            return "카드결제, 간편결제, 쿠폰 결제 중에서 선택해주세요."
-        
-        # LLM 파싱 시도, 실패 시 규칙 기반 폴백
-        pay = _parse_payment_llm(text) or _parse_payment(text)
-        if pay is None:
-            return "결제 수단을 다시 말씀해 주세요. 카드결제, 간편결제, 쿠폰 결제 등으로 말씀해 주세요."
-        ctx["payment_method"] = pay
-        
-        # 카드 결제인 경우 card 단계로
-        if pay == "card":
-            ctx["step"] = "card"
-            return "카드를 삽입해주세요."
-        
-        # 쿠폰 결제인 경우 coupon 단계로
-        if pay == "coupon":
-            ctx["step"] = "coupon"
-            return "아래 바코드기에 핸드폰을 대고 인식시켜주세요."
-        
-        # 그 외 결제 수단은 바로 완료
-        ctx["step"] = "done"
-        spoken_pay = {
-            "pay": "간편결제",
-            "kakaopay": "카카오페이",
-            "samsungpay": "삼성페이",
-        }.get(pay, "선택하신 결제 수단")
-        return f"{spoken_pay}로 결제 도와드릴게요. 주문이 완료되었습니다. 감사합니다."
-
-    # 9) 카드 삽입 및 결제 완료
-    if step == "card":
-        # 카드 삽입 완료 확인 (예: "카드 넣었어요", "완료", "결제됐어요" 등)
-        t = text.replace(" ", "").lower()
-        is_complete = any(x in t for x in ["완료", "됐", "넣었", "삽입", "결제", "다됐"])
-        
-        if is_complete:
-            ctx["step"] = "done"
-            return "결제가 완료되었습니다. 카드를 제거해주세요."
+                # 그 외 결제 수단은 바로 완료
+                ctx.step = "done"
+                spoken_pay = {
+                    "pay": "간편결제",
+                    "kakaopay": "카카오페이",
+                    "samsungpay": "삼성페이",
+                    "cash": "현금",
+                }.get(pay, "선택하신 결제 수단")
+                return f"{spoken_pay}로 결제 도와드릴게요. 주문이 완료되었습니다. 감사합니다."
+        else:
+            # 결제 수단이 불명확하면 payment 단계로
+            ctx.step = "payment"
+            return "결제 수단을 선택해 주세요. 카드결제, 간편결제, 쿠폰 결제 등으로 말씀해 주세요."
+    
+    # "네", "맞아요", "장바구니에 담아줘" 등의 표현으로 장바구니 추가
+    if yn == "yes" or is_add_to_cart:
+        ctx.add_to_cart = True
+        ctx.step = "menu_item"
+        return _cart_added_sentence(ctx)
+    
+    if yn == "no":
+        # 메뉴부터 다시
+        ctx.category = None
+        ctx.menu_id = None
+        ctx.menu_name = None
+        ctx.temp = None
+        ctx.size = None
+        ctx.options = _default_options()
+        ctx.step = "menu_item"
+        return "알겠습니다. 다시 원하시는 메뉴를 말씀해 주세요."
+    return "주문이 맞으면 '네', 다시 선택하시려면 '아니요'라고 말씀해 주세요."
+
+
+async def _step_payment(ctx: SessionCtx, text: str, t: str) -> str:
+    """결제 수단 선택 단계."""
+    # 이전 버튼 클릭 체크
+    is_back = bool(_TURN_PATTERNS["back"].search(t))
+    
+    if is_back:
+        ctx.step = "menu_item"
+        return "주문을 계속 진행해주세요."
+    
+    # 결제 수단 관련 UI 도움말 질문 처리
+    # "쿠폰 사용하려면 뭐 눌러야해?", "카드 결제 어떻게 해?", "쿠폰 어디 눌러야 해?" 등
+    is_payment_help_question = bool(
+        _TURN_PATTERNS["help_question"].search(t) and _TURN_PATTERNS["payment_word"].search(t)
+    )
+    
+    if is_payment_help_question:
+        # 쿠폰 관련 질문
+        if "쿠폰" in t:
+            return "쿠폰결제를 눌러주세요."
+        # 카드 관련 질문
+        if "카드" in t:
+            return "카드결제를 눌러주세요."
+        # 현금 관련 질문
+        if "현금" in t:
+            return "현금결제를 눌러주세요."
+        # 카카오페이 관련 질문
+        if "카카오" in t or "페이" in t:
+            return "간편결제를 눌러주세요."
+        # 일반적인 결제 수단 질문
+        return "카드결제, 간편결제, 쿠폰 결제 중에서 선택해주세요."
+    
+    # 규칙 기반 키워드 매칭 우선, 실패 시에만 LLM 호출
+    pay = _parse_payment(text) or await _parse_payment_llm(text)
+    if pay is None:
+        return "결제 수단을 다시 말씀해 주세요. 카드결제, 간편결제, 쿠폰 결제 등으로 말씀해 주세요."
+    ctx.payment_method = pay
+    
+    # 카드 결제인 경우 card 단계로
+    if pay == "card":
+        ctx.step = "card"
         return "카드를 삽입해주세요."
     
-    # 10) 쿠폰 인식 및 결제 완료
-    if step == "coupon":
-        # 쿠폰 인식 완료 확인 (예: "완료", "인식됐어요", "스캔 완료" 등)
-        t = text.replace(" ", "").lower()
-        is_complete = any(x in t for x in ["완료", "됐", "인식", "스캔", "결제", "다됐"])
-        
-        if is_complete:
-            ctx["step"] = "done"
-            return "쿠폰 결제가 완료되었습니다. 주문이 완료되었습니다. 감사합니다."
+    # 쿠폰 결제인 경우 coupon 단계로
+    if pay == "coupon":
+        ctx.step = "coupon"
         return "아래 바코드기에 핸드폰을 대고 인식시켜주세요."
+    
+    # 그 외 결제 수단은 바로 완료
+    ctx.step = "done"
+    spoken_pay = {
+        "pay": "간편결제",
+        "kakaopay": "카카오페이",
+        "samsungpay": "삼성페이",
+    }.get(pay, "선택하신 결제 수단")
+    return f"{spoken_pay}로 결제 도와드릴게요. 주문이 완료되었습니다. 감사합니다."
+
+
+async def _step_card(ctx: SessionCtx, text: str, t: str) -> str:
+    """카드 삽입 및 결제 완료 단계."""
+    # 카드 삽입 완료 확인 (예: "카드 넣었어요", "완료", "결제됐어요" 등)
+    is_complete = bool(_TURN_PATTERNS["card_complete"].search(t))
+    
+    if is_complete:
+        ctx.step = "done"
+        return "결제가 완료되었습니다. 카드를 제거해주세요."
+    return "카드를 삽입해주세요."
+
+
+async def _step_coupon(ctx: SessionCtx, text: str, t: str) -> str:
+    """쿠폰 인식 및 결제 완료 단계."""
+    # 쿠폰 인식 완료 확인 (예: "완료", "인식됐어요", "스캔 완료" 등)
+    is_complete = bool(_TURN_PATTERNS["coupon_complete"].search(t))
+    
+    if is_complete:
+        ctx.step = "done"
+        return "쿠폰 결제가 완료되었습니다. 주문이 완료되었습니다. 감사합니다."
+    return "아래 바코드기에 핸드폰을 대고 인식시켜주세요."
+
+
+async def _step_done(ctx: SessionCtx, text: str, t: str) -> str:
+    """주문 완료 후 새 주문: 세션 초기화."""
+    ctx.reset()
+    return "안녕하세요. AI음성 키오스크 말로입니다. 주문을 도와드릴게요."
+
+
+# 대화 단계 -> 단계 처리 함수
+_STEP_HANDLERS: Dict[str, Callable[[SessionCtx, str, str], Awaitable[str]]] = {
+    "greeting": _step_greeting,
+    "dine_type": _step_dine_type,
+    "menu_item": _step_menu_item,
+    "temp": _step_temp,
+    "size": _step_size,
+    "options": _step_options,
+    "confirm": _step_confirm,
+    "payment": _step_payment,
+    "card": _step_card,
+    "coupon": _step_coupon,
+    "done": _step_done,
+}
+
 
-    # 10) 주문 완료 후 새 주문
-    if step == "done":
-        ctx.update(_new_session_ctx())
-        return "안녕하세요. AI음성 키오스크 말로입니다. 주문을 도와드릴게요."
+async def _handle_turn(ctx: SessionCtx, user_text: str, t: str | None = None) -> str:
+    """
+    대화 턴 처리. /session/text와 /session/voice 모두 이 함수를 사용합니다.
+    t: 호출 측에서 이미 계산한 _compact(user_text)가 있으면 그대로 재사용.
+    """
+    log.debug("[_handle_turn] 호출: text=%r, step=%s, category=%s", user_text, ctx.step, ctx.category)
+    text = (user_text or "").strip()
+    # 키워드 판별용 텍스트는 턴마다 한 번만 계산해 모든 단계 분기에서 공유
+    if t is None:
+        t = _compact(text)
+    step = ctx.step
+
+    # 일반 질문 감지 → OpenAI로 답변 (UI 위치 질문은 상위에서 이미 처리)
+    # 인사 단계는 감지 없이 바로 처리하고, 단계 규칙이 바로 맞는 발화(예: '포장', '네')도 정규식 감지를 건너뛴다.
+    if step != "greeting" and not _step_fast_path(step, text) and looks_like_general_question(text):
+        resp_text, _ = await answer_general_question(text)
+        return resp_text
+
+    handler = _STEP_HANDLERS.get(step)
+    if handler is not None:
+        return await handler(ctx, text, t)
 
     # 비정상 상태 → 초기화
-    ctx.update(_new_session_ctx())
+    ctx.reset()
     return "안녕하세요. AI음성 키오스크 말로입니다. 주문을 도와드릴게요."
 
 
+def _pay_from_menu_item(ctx: SessionCtx) -> str:
+    """메뉴 선택 중 결제 의도: 주문 내역이 있으면 확인 단계로, 없으면 메뉴 선택 요청."""
+    if ctx.menu_name and ctx.category:
+        ctx.step = "confirm"
+        return "주문내역을 확인하고 결제를 진행해주세요."
+    return "주문하실 메뉴를 먼저 선택해 주세요."
+
+
+def _pay_from_confirm(ctx: SessionCtx) -> str:
+    """주문 확인 중 결제 의도: 결제 수단 선택으로."""
+    ctx.step = "payment"
+    return "결제 수단을 선택해 주세요. 카드결제, 간편결제, 쿠폰 결제 등으로 말씀해 주세요."
+
+
+# 결제 의도가 들어왔을 때 단계별 전이 (없는 단계는 일반 턴 처리)
+_PAYMENT_TRANSITIONS: Dict[str, Callable[[SessionCtx], str]] = {
+    "menu_item": _pay_from_menu_item,
+    "confirm": _pay_from_confirm,
+}
+
+
+async def _handle_payment_intent(ctx: SessionCtx, user_text: str, t: str) -> str:
+    """/session/text, /session/voice 공통 결제 의도 처리."""
+    transition = _PAYMENT_TRANSITIONS.get(ctx.step)
+    if transition is not None:
+        return transition(ctx)
+    return await _handle_turn(ctx, user_text, t)
+
 
 # ───────────────────────────────────────────────
 # FastAPI 엔드포인트들
 # ───────────────────────────────────────────────
+async def _warmup_whisper() -> None:
+    """Whisper API 클라이언트 초기화 및 더미 오디오로 실제 API 호출."""
+    try:
+        # 전역 클라이언트 미리 생성 (whisper_client.py의 전역 캐시 사용)
+        await asyncio.to_thread(make_whisper_client)
+        print("[Startup] ✓ Whisper API 클라이언트 생성 완료 (전역 캐시에 저장됨)")
+
+        # 더미 오디오 파일 생성 (1초 무음 WAV, 16kHz, mono, 16bit PCM)
+        # 무음 PCM은 0 바이트뿐이라 pydub 없이 wave 모듈로 바로 기록
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
+            dummy_wav_path = tmp.name
+        with wave.open(dummy_wav_path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(b"\x00\x00" * 16000)
+
+        try:
+            # 더미 오디오로 실제 STT API 호출 (첫 호출 지연을 여기서 처리)
+            print("[Startup] Whisper API 첫 호출 중... (이 과정이 첫 요청의 지연을 방지합니다)")
+            test_result = await asyncio.get_running_loop().run_in_executor(
+                _STT_POOL, partial(transcribe_file, dummy_wav_path, language="ko")
+            )
+            print(f"[Startup] ✓ Whisper STT 워밍업 완료 (결과: '{test_result[:50] if test_result else '(빈 오디오)'}')")
+        except Exception as e:
+            print(f"[Startup] ⚠ Whisper STT 워밍업 실패: {e}")
+            print("[Startup] 첫 요청이 느릴 수 있습니다.")
+        finally:
+            # 더미 파일 정리
+            try:
+                os.remove(dummy_wav_path)
+            except OSError:
+                pass
+    except Exception as e:
+        print(f"[Startup] ⚠ Whisper 클라이언트 초기화 실패: {e}")
+        print("[Startup] 첫 요청이 느릴 수 있습니다.")
+
+
+async def _warmup_tts() -> None:
+    """TTS 첫 호출 워밍업 + 고정 안내 문구 미리 합성."""
+    try:
+        # 간단한 텍스트로 실제 TTS API 호출 (첫 호출 지연을 여기서 처리)
+        print("[Startup] TTS API 첫 호출 중... (이 과정이 첫 요청의 지연을 방지합니다)")
+        loop = asyncio.get_running_loop()
+        test_tts_path = await loop.run_in_executor(_TTS_POOL, partial(synthesize, "테스트", out_path="warmup_test.mp3"))
+        if os.path.exists(test_tts_path):
+            print(f"[Startup] ✓ TTS 워밍업 완료 (캐시 파일: {os.path.basename(test_tts_path)})")
+            # 테스트 파일은 캐시로 남겨둠 (나중에 재사용 가능)
+        else:
+            print("[Startup] ⚠ TTS 테스트 파일 생성 실패")
+    except Exception as e:
+        print(f"[Startup] ⚠ TTS 워밍업 실패: {e}")
+        print("[Startup] 첫 요청이 느릴 수 있습니다.")
+
+    # 고정 안내 문구 TTS 미리 합성 (문구끼리도 동시에 진행)
+    try:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(_TTS_POOL, synthesize, t) for t in CANNED_RESPONSES))
+        print(f"[Startup] ✓ 고정 안내 문구 TTS {len(CANNED_RESPONSES)}개 준비 완료")
+    except Exception as e:
+        print(f"[Startup] ⚠ 고정 안내 문구 TTS 준비 실패: {e}")
+
+
+async def _warmup_menu() -> None:
+    """메뉴 설정 로드."""
+    try:
+        menu_cfg, opt_cfg = await asyncio.to_thread(load_configs)
+        print(f"[Startup] ✓ 메뉴 설정 로드 완료 (메뉴 {len(menu_cfg)}개)")
+    except Exception as e:
+        print(f"[Startup] ⚠ 메뉴 설정 로드 실패: {e}")
+
+
 @app.on_event("startup")
 async def warmup():
     """
     서버 시작 시 STT/TTS 모델 및 관련 리소스를 미리 로딩하여
     첫 번째 요청의 응답 속도를 향상시킵니다.
+    서로 독립적인 워밍업 단계는 동시에 실행합니다.
     """
     print("[Startup] 서버 워밍업 시작...")
     
     try:
-        # 1. ffmpeg 경로 확인
-        if _FFMPEG_PATH:
+        # 1. ffmpeg 경로 확인 (한 번 실행해 보고 결과를 캐시, 이후 요청은 이 값만 확인)
+        global _FFMPEG_OK
+        _FFMPEG_OK = await asyncio.to_thread(_probe_ffmpeg)
+        if _FFMPEG_OK:
             print(f"[Startup] ✓ ffmpeg 경로 확인: {_FFMPEG_PATH}")
+        elif _FFMPEG_PATH:
+            print(f"[Startup] ⚠ ffmpeg 실행 확인 실패: {_FFMPEG_PATH}. 오디오 변환이 실패할 수 있습니다.")
         else:
             print("[Startup] ⚠ ffmpeg 경로를 찾을 수 없습니다. 오디오 변환이 실패할 수 있습니다.")
         
         # 2. TTS 디렉토리 생성
         os.makedirs(TTS_DIR, exist_ok=True)
         print(f"[Startup] ✓ TTS 캐시 디렉토리 준비: {TTS_DIR}")
-        
-        # 3. Whisper API 클라이언트 초기화 및 실제 API 호출로 워밍업
-        try:
-            # 전역 클라이언트 미리 생성 (whisper_client.py의 전역 캐시 사용)
-            whisper_client = make_whisper_client()
-            print("[Startup] ✓ Whisper API 클라이언트 생성 완료 (전역 캐시에 저장됨)")
-            
-            # 더미 오디오 파일 생성 (1초 무음 WAV)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                dummy_wav_path = tmp.name
-                # pydub로 간단한 무음 오디오 생성 (1초, 16kHz, mono)
-                dummy_audio = AudioSegment.silent(duration=1000, frame_rate=16000)
-                dummy_audio.export(dummy_wav_path, format="wav")
-            
-            try:
-                # 더미 오디오로 실제 STT API 호출 (첫 호출 지연을 여기서 처리)
-                print("[Startup] Whisper API 첫 호출 중... (이 과정이 첫 요청의 지연을 방지합니다)")
-                test_result = transcribe_file(dummy_wav_path, language="ko")
-                print(f"[Startup] ✓ Whisper STT 워밍업 완료 (결과: '{test_result[:50] if test_result else '(빈 오디오)'}')")
-            except Exception as e:
-                print(f"[Startup] ⚠ Whisper STT 워밍업 실패: {e}")
-                print("[Startup] 첫 요청이 느릴 수 있습니다.")
-            finally:
-                # 더미 파일 정리
-                try:
-                    os.remove(dummy_wav_path)
-                except OSError:
-                    pass
-        except Exception as e:
-            print(f"[Startup] ⚠ Whisper 클라이언트 초기화 실패: {e}")
-            print("[Startup] 첫 요청이 느릴 수 있습니다.")
-        
-        # 4. TTS 클라이언트 초기화 및 실제 API 호출로 워밍업
-        try:
-            # 간단한 텍스트로 실제 TTS API 호출 (첫 호출 지연을 여기서 처리)
-            print("[Startup] TTS API 첫 호출 중... (이 과정이 첫 요청의 지연을 방지합니다)")
-            test_tts_path = synthesize("테스트", out_path="warmup_test.mp3")
-            if os.path.exists(test_tts_path):
-                print(f"[Startup] ✓ TTS 워밍업 완료 (캐시 파일: {os.path.basename(test_tts_path)})")
-                # 테스트 파일은 캐시로 남겨둠 (나중에 재사용 가능)
-            else:
-                print("[Startup] ⚠ TTS 테스트 파일 생성 실패")
-        except Exception as e:
-            print(f"[Startup] ⚠ TTS 워밍업 실패: {e}")
-            print("[Startup] 첫 요청이 느릴 수 있습니다.")
-        
-        # 5. OpenAI GPT 클라이언트 확인
-        try:
-            # 간단한 테스트 호출 (실제 API 호출 없이 클라이언트만 확인)
-            if gpt_client:
-                print("[Startup] ✓ OpenAI GPT 클라이언트 준비 완료")
-        except Exception as e:
-            print(f"[Startup] ⚠ OpenAI GPT 클라이언트 확인 실패: {e}")
-        
-        # 6. 메뉴 설정 로드
-        try:
-            menu_cfg, opt_cfg = load_configs()
-            print(f"[Startup] ✓ 메뉴 설정 로드 완료 (메뉴 {len(menu_cfg)}개)")
-        except Exception as e:
-            print(f"[Startup] ⚠ 메뉴 설정 로드 실패: {e}")
+
+        # 3. OpenAI GPT 클라이언트 확인 (실제 API 호출 없이 클라이언트만 확인)
+        if gpt_client:
+            print("[Startup] ✓ OpenAI GPT 클라이언트 준비 완료")
+
+        # 4. Whisper / TTS / 메뉴 설정 워밍업 동시 실행 (각 단계는 내부에서 예외 처리)
+        await asyncio.gather(_warmup_whisper(), _warmup_tts(), _warmup_menu())
         
         print("[Startup] 워밍업 완료! 서버가 요청을 받을 준비가 되었습니다.")
         
@@ -2427,13 +2630,21 @@ async def warmup():
         print("[Startup] 서버는 계속 실행되지만 첫 요청이 느릴 수 있습니다.")
 
 
+@app.on_event("shutdown")
+async def close_http_clients():
+    """서버 종료 시 OpenAI HTTP 커넥션 풀과 STT/TTS 스레드풀 정리."""
+    await _OPENAI_HTTP.aclose()
+    _STT_POOL.shutdown(wait=False)
+    _TTS_POOL.shutdown(wait=False)
+
+
 @app.get("/health")
-def health():
+async def health():
     return {"ok": True}
 
 
 @app.get("/version")
-def version():
+async def version():
     return {"version": app.version, "stt": "openai-whisper-1", "tts": "google-tts"}
 
 
@@ -2444,14 +2655,14 @@ def config_menu():
 
 
 @app.post("/session/start", response_model=StartOut)
-def session_start():
+async def session_start():
     sid, ctx = _ensure_session()
     # step을 명시적으로 "greeting"으로 설정
-    ctx["step"] = "greeting"
+    ctx.step = "greeting"
     # _handle_turn을 호출하여 greeting 단계 응답 받기
-    resp_text = _handle_turn(ctx, "")
+    resp_text = await _handle_turn(ctx, "")
 
-    tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
+    tts_path = _schedule_synthesis(resp_text, sid)
     backend_payload = _build_backend_payload(ctx)
     return {
         "session_id": sid,
@@ -2463,209 +2674,107 @@ def session_start():
     }
 
 
-@app.post("/session/text")
-def session_text(payload: TextIn):
-    sid, ctx = _ensure_session(payload.session_id)
-
+async def _process_utterance(
+    sid: str,
+    ctx: SessionCtx,
+    user_text: str | None,
+    is_help: bool = False,
+    tag: str = "/session/text",
+) -> dict:
+    """
+    /session/text, /session/voice 공통 턴 처리 (무음/턴 수 가드 → 이전·결제 의도 → UI 도움말 → 일반 질문 → 주문 흐름).
+    is_help: 프론트에서 UI 도움말 모드를 명시한 경우. tag: 디버그 로그용 엔드포인트 이름.
+    """
     # 무음 처리
-    maybe = _reprompt_if_empty(payload.text)
+    maybe = _reprompt_if_empty(user_text)
     if maybe:
-        tts_path = synthesize(maybe, out_path=f"response_{sid}.mp3")
-        response = {
-            "stt_text": payload.text,
-            "response_text": maybe,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": None,
-        }
-        # 세션에 최근 응답 저장
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
+        return _turn_response(sid, ctx, user_text, maybe)
 
     # 턴 수 가드
     guard = _maybe_close_if_too_long(sid, ctx)
     if guard:
-        # 세션에 최근 응답 저장
-        ctx["last_response"] = {
-            "stt_text": payload.text,
-            "response_text": guard["response_text"],
-            "tts_path": guard.get("tts_path"),
-            "tts_url": _make_tts_url(guard.get("tts_path")) if guard.get("tts_path") else None,
-            "context": guard.get("context"),
-            "backend_payload": guard.get("backend_payload"),
-            "target_element_id": None,
-            "processed_at": _now(),
-        }
         return guard
 
-    text = (payload.text or "").strip()
+    text = (user_text or "").strip()
 
+    log.debug("[POST %s] 입력: %r, step=%s, category=%s", tag, text, ctx.step, ctx.category)
+    
     # 1) 이전/뒤로 의도 체크 (UI 도움말 체크보다 우선)
     # 각 step에서 이전 단계로 이동하도록 _handle_turn()에서 처리
-    t = text.replace(" ", "").lower()
-    is_back_intent = any(x in t for x in [
-        "이전", "뒤로", "돌아가", "취소", "back", "prev"
-    ])
+    t = _compact(text)
+    is_back_intent = bool(_TURN_PATTERNS["back"].search(t))
     
     if is_back_intent:
         # _handle_turn()에서 각 step에 맞게 이전 단계로 이동 처리
-        resp_text = _handle_turn(ctx, payload.text)
-        tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-        SESS_META[sid] = _now()
-        response = {
-            "stt_text": payload.text,
-            "response_text": resp_text,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": None,
-        }
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
+        resp_text = await _handle_turn(ctx, user_text, t)
+        return _turn_response(sid, ctx, user_text, resp_text)
 
     # 2) 결제 의도 체크 (UI 도움말 체크보다 우선)
     # step이 menu_item이면 confirm으로, confirm이면 payment로 이동
-    is_payment_intent = any(x in t for x in [
-        "결제하기", "결제", "결제할게요", "결제하겠어요", "결제하겠습니다",
-        "결제할게", "결제하자", "결제해줘", "결제해주세요"
-    ])
+    is_payment_intent = bool(_TURN_PATTERNS["payment"].search(t))
     
     if is_payment_intent:
-        current_step = ctx.get("step")
-        if current_step == "menu_item":
-            # 주문 내역이 있는지 확인
-            if ctx.get("menu_name") and ctx.get("category"):
-                ctx["step"] = "confirm"
-                resp_text = "주문내역을 확인하고 결제를 진행해주세요."
-            else:
-                resp_text = "주문하실 메뉴를 먼저 선택해 주세요."
-        elif current_step == "confirm":
-            ctx["step"] = "payment"
-            resp_text = "결제 수단을 선택해 주세요. 카드결제, 간편결제, 쿠폰 결제 등으로 말씀해 주세요."
-        else:
-            # 다른 step에서는 일반 처리
-            resp_text = _handle_turn(ctx, payload.text)
-            tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-            SESS_META[sid] = _now()
-            response = {
-                "stt_text": payload.text,
-                "response_text": resp_text,
-                "tts_path": tts_path,
-                "tts_url": _make_tts_url(tts_path) or None,
-                "context": _ctx_snapshot(ctx),
-                "backend_payload": _build_backend_payload(ctx),
-                "target_element_id": None,
-            }
-            ctx["last_response"] = {**response, "processed_at": _now()}
-            return response
-        
-        tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-        SESS_META[sid] = _now()
-        response = {
-            "stt_text": payload.text,
-            "response_text": resp_text,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": None,
-        }
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
+        resp_text = await _handle_payment_intent(ctx, user_text, t)
+        return _turn_response(sid, ctx, user_text, resp_text)
     
     # 3) 프론트에서 is_help=True를 보냈거나, UI 도움말로 보이는 발화면 → UI 모드 (일반 질문보다 먼저 체크)
     # 위치 질문("어디", "어딨어")이 있으면 메뉴명이 있어도 UI 도움말로 처리
     # 메뉴명 + 액션("장바구니에 담아줘", "하나 주세요")이 있으면 메뉴 선택으로 처리
-    is_ui_help = looks_like_ui_help(text)
-    print(f"[DEBUG /session/text] is_ui_help: {is_ui_help}, text: '{text}'")
+    # 단계 규칙이 바로 맞는 발화는 UI 도움말/일반 질문 감지를 건너뛰고 주문 흐름으로 보냄
+    fast_path = _step_fast_path(ctx.step, text)
+    is_ui_help = not fast_path and looks_like_ui_help(text)
+    log.debug("[%s] is_ui_help: %s, text: %r", tag, is_ui_help, text)
     is_menu_with_action = False
     
     # UI 도움말이 아니고 menu_item step이면 메뉴 파싱 시도
-    if not is_ui_help and ctx.get("step") == "menu_item":
-        test_parsed = _parse_menu_item(ctx.get("category"), text)
+    if not is_ui_help and ctx.step == "menu_item":
+        test_parsed = _parse_menu_item(ctx.category, text)
         if test_parsed:
             is_menu_with_action = True  # 메뉴가 파싱되면 메뉴 선택 의도
-            print(f"[DEBUG /session/text] is_menu_with_action: True (메뉴 파싱 성공)")
+            log.debug("[%s] is_menu_with_action: True (메뉴 파싱 성공)", tag)
     
-    print(f"[DEBUG /session/text] 최종 조건: is_ui_help={is_ui_help}, is_menu_with_action={is_menu_with_action}, payload.is_help={payload.is_help}")
+    log.debug("[%s] 최종 조건: is_ui_help=%s, is_menu_with_action=%s, is_help=%s", tag, is_ui_help, is_menu_with_action, is_help)
     
-    if payload.is_help or (is_ui_help and not is_menu_with_action):
-        print(f"[DEBUG /session/text] classify_ui_target 호출!")
+    if is_help or (is_ui_help and not is_menu_with_action):
+        log.debug("[%s] classify_ui_target 호출", tag)
         # LLM이 UI 요소 위치를 판단하고 메뉴 파싱도 함께 처리
-        current_step = ctx.get("step")
-        ui_info = classify_ui_target(text, current_step)
+        current_step = ctx.step
+        ui_info = await classify_ui_target(text, current_step)
         resp_text = ui_info.get(
             "answer_text",
             "어느 버튼을 찾으시는지 다시 한번 말씀해 주세요."
         )
         target_element_id = ui_info.get("target_element_id")
 
-        tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-        SESS_META[sid] = _now()
-
-        response = {
-            "stt_text": payload.text,
-            "response_text": resp_text,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),           # 주문 상태는 유지
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": target_element_id,  # 프론트에서 하이라이트 용도로 사용
-        }
-        # 세션에 최근 응답 저장
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
+        return _turn_response(sid, ctx, user_text, resp_text, target_element_id)
 
     # 4) 일반 질문/요청 처리 (텍스트 크기 등) - UI 도움말 체크 이후
-    if looks_like_general_question(text):
-        resp_text, ui_action = answer_general_question(text)
-        tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-        SESS_META[sid] = _now()
-        response = {
-            "stt_text": payload.text,
-            "response_text": resp_text,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": None,
-            "ui_action": ui_action,  # 텍스트 크기 조절 등 UI 액션
-        }
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
+    if not fast_path and looks_like_general_question(text):
+        resp_text, ui_action = await answer_general_question(text)
+        return _turn_response(sid, ctx, user_text, resp_text, ui_action=ui_action)
 
     # 5) 그 외에는 기존 주문/일반 질문 흐름 사용
-    print(f"[POST /session/text] 입력: '{payload.text}', step={ctx.get('step')}, category={ctx.get('category')}")
+    log.debug("[POST %s] _handle_turn 호출: text=%r, step=%s, category=%s", tag, user_text, ctx.step, ctx.category)
     
     # target_element_id 초기화 (이전 응답의 target_element_id가 남아있을 수 있음)
-    ctx["target_element_id"] = None
+    ctx.target_element_id = None
     
-    resp_text = _handle_turn(ctx, payload.text)
-    tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-    SESS_META[sid] = _now()
+    resp_text = await _handle_turn(ctx, user_text, t)
 
     # context에서 target_element_id 가져오기 (장바구니 제거 등의 경우 설정됨)
-    target_element_id = ctx.get("target_element_id")
-
-    response = {
-        "stt_text": payload.text,
-        "response_text": resp_text,
-        "tts_path": tts_path,
-        "tts_url": _make_tts_url(tts_path) or None,
-        "context": _ctx_snapshot(ctx),
-        "backend_payload": _build_backend_payload(ctx),
-        "target_element_id": target_element_id,
-    }
-    # 세션에 최근 응답 저장
-    ctx["last_response"] = {**response, "processed_at": _now()}
+    response = _turn_response(sid, ctx, user_text, resp_text, ctx.target_element_id)
     # target_element_id 초기화 (다음 요청을 위해)
-    ctx["target_element_id"] = None
+    ctx.target_element_id = None
     return response
 
 
+@app.post("/session/text")
+async def session_text(payload: TextIn):
+    sid, ctx = _ensure_session(payload.session_id)
+
+    return await _process_utterance(sid, ctx, payload.text, payload.is_help)
+
+
 @app.post("/session/voice")
 async def session_voice(session_id: str, audio: UploadFile = File(...)):
     sid, ctx = _ensure_session(session_id)
@@ -2675,264 +2784,95 @@ async def session_voice(session_id: str, audio: UploadFile = File(...)):
     if suffix not in ACCEPTED_EXT:
         raise HTTPException(status_code=400, detail=f"허용되지 않은 형식: {suffix}")
 
-    # 업로드 파일 임시 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(await audio.read())
-        tmp_path = tmp.name
+    # 업로드 파일은 이미 SpooledTemporaryFile이므로 별도 임시 파일 없이 바로 변환
+    loop = asyncio.get_running_loop()
+    wav_buf, cleanup_bufs = await loop.run_in_executor(_STT_POOL, _ensure_wav, audio.file, suffix)
 
-    cleanup_paths: list[str] = [tmp_path]
     try:
-        wav_path, cleanup_paths = _ensure_wav(tmp_path)
-    except HTTPException:
-        # 변환 실패 시에도 원본 파일 제거 필요
-        try:
-            os.remove(tmp_path)
-        except OSError:
-            pass
-        raise
-
-    try:
-        user_text = transcribe_file(wav_path, language="ko")
+        user_text = await loop.run_in_executor(_STT_POOL, _transcribe_wav, wav_buf)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"STT 실패: {e}")
     finally:
-        _cleanup_temp_files(cleanup_paths)
-
-    # 무음 처리
-    maybe = _reprompt_if_empty(user_text)
-    if maybe:
-        tts_path = synthesize(maybe, out_path=f"response_{sid}.mp3")
-        response = {
-            "stt_text": user_text,
-            "response_text": maybe,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": None,
-        }
-        # 세션에 최근 응답 저장
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
-
-    # 턴 수 가드
-    guard = _maybe_close_if_too_long(sid, ctx)
-    if guard:
-        # 세션에 최근 응답 저장
-        ctx["last_response"] = {
-            "stt_text": user_text,
-            "response_text": guard["response_text"],
-            "tts_path": guard.get("tts_path"),
-            "tts_url": _make_tts_url(guard.get("tts_path")) if guard.get("tts_path") else None,
-            "context": guard.get("context"),
-            "backend_payload": guard.get("backend_payload"),
-            "target_element_id": None,
-            "processed_at": _now(),
-        }
-        return guard
-
-    text = (user_text or "").strip()
+        _cleanup_temp_files(cleanup_bufs)
 
-    # 음성에서도 UI 도움말 발화면 같은 로직 적용
-    print(f"[POST /session/voice] STT 결과: '{text}', step={ctx.get('step')}, category={ctx.get('category')}")
-    
-    # 1) 이전/뒤로 의도 체크 (UI 도움말 체크보다 우선)
-    # 각 step에서 이전 단계로 이동하도록 _handle_turn()에서 처리
-    t = text.replace(" ", "").lower()
-    is_back_intent = any(x in t for x in [
-        "이전", "뒤로", "돌아가", "취소", "back", "prev"
-    ])
-    
-    if is_back_intent:
-        # _handle_turn()에서 각 step에 맞게 이전 단계로 이동 처리
-        resp_text = _handle_turn(ctx, user_text)
-        tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-        SESS_META[sid] = _now()
-        response = {
-            "stt_text": user_text,
-            "response_text": resp_text,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": None,
-        }
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
-
-    # 2) 결제 의도 체크 (UI 도움말 체크보다 우선)
-    # step이 menu_item이면 confirm으로, confirm이면 payment로 이동
-    t = text.replace(" ", "").lower()
-    is_payment_intent = any(x in t for x in [
-        "결제하기", "결제", "결제할게요", "결제하겠어요", "결제하겠습니다",
-        "결제할게", "결제하자", "결제해줘", "결제해주세요"
-    ])
-    
-    if is_payment_intent:
-        current_step = ctx.get("step")
-        if current_step == "menu_item":
-            # 주문 내역이 있는지 확인
-            if ctx.get("menu_name") and ctx.get("category"):
-                ctx["step"] = "confirm"
-                resp_text = "주문내역을 확인하고 결제를 진행해주세요."
-            else:
-                resp_text = "주문하실 메뉴를 먼저 선택해 주세요."
-        elif current_step == "confirm":
-            ctx["step"] = "payment"
-            resp_text = "결제 수단을 선택해 주세요. 카드결제, 간편결제, 쿠폰 결제 등으로 말씀해 주세요."
-        else:
-            # 다른 step에서는 일반 처리
-            resp_text = _handle_turn(ctx, user_text)
-            tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-            SESS_META[sid] = _now()
-            response = {
-                "stt_text": user_text,
-                "response_text": resp_text,
-                "tts_path": tts_path,
-                "tts_url": _make_tts_url(tts_path) or None,
-                "context": _ctx_snapshot(ctx),
-                "backend_payload": _build_backend_payload(ctx),
-                "target_element_id": None,
-            }
-            ctx["last_response"] = {**response, "processed_at": _now()}
-            return response
-        
-        tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-        SESS_META[sid] = _now()
-        response = {
-            "stt_text": user_text,
-            "response_text": resp_text,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": None,
-        }
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
-    
-    # 3) 위치 질문("어디", "어딨어")이 있으면 메뉴명이 있어도 UI 도움말로 처리 (일반 질문보다 먼저 체크)
-    # 메뉴명 + 액션("장바구니에 담아줘", "하나 주세요")이 있으면 메뉴 선택으로 처리
-    is_ui_help = looks_like_ui_help(text)
-    print(f"[DEBUG /session/voice] is_ui_help: {is_ui_help}, text: '{text}'")
-    is_menu_with_action = False
-    
-    # UI 도움말이 아니고 menu_item step이면 메뉴 파싱 시도
-    if not is_ui_help and ctx.get("step") == "menu_item":
-        test_parsed = _parse_menu_item(ctx.get("category"), text)
-        if test_parsed:
-            is_menu_with_action = True  # 메뉴가 파싱되면 메뉴 선택 의도
-            print(f"[DEBUG /session/voice] is_menu_with_action: True (메뉴 파싱 성공)")
-    
-    print(f"[DEBUG /session/voice] 최종 조건: is_ui_help={is_ui_help}, is_menu_with_action={is_menu_with_action}")
-    
-    if is_ui_help and not is_menu_with_action:
-        print(f"[DEBUG /session/voice] classify_ui_target 호출!")
-        # LLM이 UI 요소 위치를 판단하고 메뉴 파싱도 함께 처리
-        current_step = ctx.get("step")
-        ui_info = classify_ui_target(text, current_step)
-        resp_text = ui_info.get(
-            "answer_text",
-            "어느 버튼을 찾으시는지 다시 한번 말씀해 주세요."
-        )
-        target_element_id = ui_info.get("target_element_id")
-
-        tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-        SESS_META[sid] = _now()
-
-        response = {
-            "stt_text": user_text,
-            "response_text": resp_text,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": target_element_id,
-        }
-        # 세션에 최근 응답 저장
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
-
-    # 4) 일반 질문/요청 처리 (텍스트 크기 등) - UI 도움말 체크 이후
-    if looks_like_general_question(text):
-        resp_text, ui_action = answer_general_question(text)
-        tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-        SESS_META[sid] = _now()
-        response = {
-            "stt_text": user_text,
-            "response_text": resp_text,
-            "tts_path": tts_path,
-            "tts_url": _make_tts_url(tts_path) or None,
-            "context": _ctx_snapshot(ctx),
-            "backend_payload": _build_backend_payload(ctx),
-            "target_element_id": None,
-            "ui_action": ui_action,  # 텍스트 크기 조절 등 UI 액션
-        }
-        ctx["last_response"] = {**response, "processed_at": _now()}
-        return response
-
-    # 5) 그 외에는 기존 주문/일반 질문 흐름 사용
-    print(f"[POST /session/voice] _handle_turn 호출: text='{user_text}', step={ctx.get('step')}, category={ctx.get('category')}")
-    
-    # target_element_id 초기화 (이전 응답의 target_element_id가 남아있을 수 있음)
-    ctx["target_element_id"] = None
-    
-    resp_text = _handle_turn(ctx, user_text)
-    tts_path = synthesize(resp_text, out_path=f"response_{sid}.mp3")
-    SESS_META[sid] = _now()
-
-    # context에서 target_element_id 가져오기 (장바구니 제거 등의 경우 설정됨)
-    target_element_id = ctx.get("target_element_id")
-
-    response = {
-        "stt_text": user_text,
-        "response_text": resp_text,
-        "tts_path": tts_path,
-        "tts_url": _make_tts_url(tts_path) or None,
-        "context": _ctx_snapshot(ctx),
-        "backend_payload": _build_backend_payload(ctx),
-        "target_element_id": target_element_id,
-    }
-    # 세션에 최근 응답 저장
-    ctx["last_response"] = {**response, "processed_at": _now()}
-    # target_element_id 초기화 (다음 요청을 위해)
-    ctx["target_element_id"] = None
-    return response
+    return await _process_utterance(sid, ctx, user_text, tag="/session/voice")
 
 
 @app.get("/session/state")
-def session_state(session_id: str):
+async def session_state(session_id: str):
     """
     세션 상태 조회. 최근 처리 결과도 포함.
     """
-    if session_id not in SESSIONS or _expired(SESS_META.get(session_id, 0)):
+    now = _now()
+    if session_id not in SESSIONS or _expired(SESS_META.get(session_id, 0), now):
         raise HTTPException(status_code=404, detail="세션 없음")
     ctx = SESSIONS[session_id]
-    SESS_META[session_id] = _now()
+    _touch_session(session_id, now)
     return _ctx_snapshot(ctx)
 
 
 @app.get("/session/result")
-def session_result(session_id: str):
+async def session_result(session_id: str):
     """
     최근 처리된 결과 조회 (HTTP POST /session/voice 또는 /session/text로 처리된 결과).
     last_response가 있으면 반환하고, 없으면 null 반환.
     """
-    if session_id not in SESSIONS or _expired(SESS_META.get(session_id, 0)):
+    now = _now()
+    if session_id not in SESSIONS or _expired(SESS_META.get(session_id, 0), now):
         raise HTTPException(status_code=404, detail="세션 없음")
     ctx = SESSIONS[session_id]
-    SESS_META[session_id] = _now()
+    _touch_session(session_id, now)
     
-    last_response = ctx.get("last_response")
+    last_response = ctx.last_response
     if last_response:
         return last_response
     return None
 
 
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def _stream_tts_parts(parts: list["asyncio.Future[str]"]):
+    """문장별 mp3를 합성이 끝나는 순서대로 기다려 차례로 내려보냄."""
+    for part in parts:
+        path = await asyncio.shield(part)
+        yield await asyncio.to_thread(_read_file, path)
+
+
 @app.get("/tts/{filename}")
-def get_tts_file(filename: str):
-    """생성된 TTS mp3를 내려주는 엔드포인트."""
-    path = _tts_path_from_name(filename)
-    return FileResponse(path, media_type="audio/mpeg", filename=filename)
+async def get_tts_file(filename: str, request: Request):
+    """
+    생성된 TTS mp3를 내려주는 엔드포인트. 파일명 stem(md5)을 ETag로 사용.
+    턴 응답 직후라 아직 합성 중인 파일이면 합성이 끝날 때까지 기다렸다가 내려준다.
+    여러 문장 응답은 끝난 문장부터 스트리밍한다.
+    """
+    parts = _PENDING_TTS_PARTS.get(filename)
+    if parts is not None:
+        # 여러 문장 합성 중: 첫 문장이 준비되는 대로 스트리밍 시작 (내용은 최종 파일과 동일)
+        # 뒤 문장이 실패하면 응답이 중간에 끊기므로 이 응답은 캐시하지 않게 한다 (완성 파일만 장기 캐시).
+        try:
+            await asyncio.shield(parts[0])
+        except Exception:
+            raise HTTPException(status_code=502, detail="음성 합성에 실패했습니다.")
+        return StreamingResponse(
+            _stream_tts_parts(parts),
+            media_type="audio/mpeg",
+            headers={"Cache-Control": _TTS_STREAM_CACHE_CONTROL},
+        )
+    pending = _PENDING_TTS.get(filename)
+    if pending is not None:
+        try:
+            await asyncio.shield(pending)
+        except Exception:
+            raise HTTPException(status_code=502, detail="음성 합성에 실패했습니다.")
+    etag = f'"{filename[:-4]}"'
+    headers = {"ETag": etag, "Cache-Control": _TTS_CACHE_CONTROL}
+    # 파일명이 곧 내용 해시라 ETag가 맞으면 디스크를 보지 않고 바로 304
+    if request.headers.get("if-none-match") == etag and _TTS_NAME_RE.fullmatch(filename):
+        return Response(status_code=304, headers=headers)
+    path, st = _tts_path_from_name(filename)
+    return FileResponse(path, media_type="audio/mpeg", filename=filename, stat_result=st, headers=headers)
 
 
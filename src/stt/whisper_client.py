@@ -1,13 +1,24 @@
 from __future__ import annotations
-import os, time
+import os, time, logging
+from typing import BinaryIO
 from dotenv import load_dotenv
 from openai import OpenAI
 
 load_dotenv()
+log = logging.getLogger(__name__)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_PROJECT = os.getenv("OPENAI_PROJECT")  # proj_... (개인 키면 없어도 됨)
 
+# 키오스크 도메인 어휘 (Whisper prompt로 전달해 메뉴/주문 용어 쪽으로 디코딩을 유도)
+WHISPER_PROMPT = os.getenv(
+    "WHISPER_PROMPT",
+    "매장, 포장, 아메리카노, 에스프레소, 카페 라떼, 카푸치노, 레몬에이드, 자몽에이드, "
+    "청포도 에이드, 오렌지 에이드, 캐모마일 티, 얼그레이 티, 유자차, 녹차, 치즈케이크, "
+    "티라미수, 초코 브라우니, 크루아상, 마카롱, 따뜻하게, 아이스, 샷 추가, 시럽, 디카페인, "
+    "카드, 쿠폰, 카카오페이",
+)
+
 # 전역 Whisper 클라이언트 (서버 시작 시 미리 생성하여 재사용)
 _whisper_client_cache = None
 
@@ -18,8 +29,10 @@ def _retry(fn, n=3, delay=1.0):
             return fn()
         except Exception as e:
             err = e
-            print(f"[Retry {i+1}/{n}] {e}")
-            time.sleep(delay * (2**i))
+            log.warning("[Retry %d/%d] %s", i + 1, n, e)
+            # 마지막 시도 실패 후에는 기다리지 않고 바로 예외 전달
+            if i < n - 1:
+                time.sleep(delay * (2**i))
     raise err
 
 def _make_client():
@@ -41,16 +54,27 @@ def _make_client():
     
     return _whisper_client_cache
 
-def transcribe_file(path: str, language: str = "ko") -> str:
+def transcribe_file(path: str, language: str = "ko", prompt: str | None = WHISPER_PROMPT) -> str:
     if not os.path.isfile(path):
         raise FileNotFoundError(f"Audio not found: {path}")
+    with open(path, "rb") as f:
+        return transcribe_fileobj(f, filename=os.path.basename(path), language=language, prompt=prompt)
+
+def transcribe_fileobj(
+    fileobj: BinaryIO,
+    filename: str = "audio.wav",
+    language: str = "ko",
+    prompt: str | None = WHISPER_PROMPT,
+) -> str:
+    """파일 객체(메모리 버퍼 포함)를 그대로 Whisper에 전달. filename 확장자로 포맷을 알린다."""
     client = _make_client()  # 전역 클라이언트 재사용
     def call():
-        with open(path, "rb") as f:
-            resp = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=f,
-                language=language,
-            )
+        fileobj.seek(0)  # 재시도 시 처음부터 다시 전송
+        resp = client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(filename, fileobj),
+            language=language,
+            **({"prompt": prompt} if prompt else {}),
+        )
         return resp.text.strip()
     return _retry(call)
@@ -1,12 +1,16 @@
 from __future__ import annotations
 import os
 import hashlib
+import logging
+import threading
 import time
+import uuid
 from dotenv import load_dotenv
 from google.cloud import texttospeech
 
 load_dotenv()
 GCP = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+log = logging.getLogger(__name__)
 
 _CACHE_DIR = ".cache_tts"
 MAX_TTS_CHARS = 280  # 너무 긴 문장은 비용/시간 방지를 위해 자름
@@ -18,6 +22,41 @@ def _hash_key(text: str, lang: str, voice: str, speaking_rate: float, pitch: flo
     return h.hexdigest()
 
 
+def _prepare_text(text: str) -> str:
+    """합성/캐시 키에 쓰는 텍스트: 앞뒤 공백 제거, 너무 길면 자름."""
+    txt = text.strip()
+    if len(txt) > MAX_TTS_CHARS:
+        txt = txt[:MAX_TTS_CHARS] + "..."
+    return txt
+
+
+def tts_cache_path(
+    text: str,
+    lang: str = "ko-KR",
+    voice: str = "ko-KR-Standard-A",
+    speaking_rate: float = 1.0,
+    pitch: float = 0.0,
+) -> str:
+    """같은 인자로 synthesize()를 호출했을 때 저장될 캐시 파일 경로 (합성 없이 계산만)."""
+    key = _hash_key(_prepare_text(text), lang, voice, speaking_rate, pitch)
+    return os.path.abspath(os.path.join(_CACHE_DIR, f"{key}.mp3"))
+
+
+# 전역 TTS 클라이언트 (gRPC 채널을 재사용하도록 한 번만 생성, 스레드 간 공유 가능)
+_tts_client_cache = None
+_tts_client_lock = threading.Lock()
+
+
+def _get_client() -> texttospeech.TextToSpeechClient:
+    """TTS 클라이언트 생성. 전역 캐시를 사용하여 재사용."""
+    global _tts_client_cache
+    if _tts_client_cache is None:
+        with _tts_client_lock:
+            if _tts_client_cache is None:
+                _tts_client_cache = texttospeech.TextToSpeechClient()
+    return _tts_client_cache
+
+
 def _retry(fn, n: int = 2, delay: float = 0.6):
     """간단 재시도 래퍼 (지수 백오프)"""
     last = None
@@ -51,19 +90,16 @@ def synthesize(
     if not (GCP and os.path.isfile(GCP)):
         raise RuntimeError("GOOGLE_APPLICATION_CREDENTIALS not set to a valid JSON path")
 
-    txt = text.strip()
-    if len(txt) > MAX_TTS_CHARS:
-        txt = txt[:MAX_TTS_CHARS] + "..."
+    txt = _prepare_text(text)
 
     # 1) 캐시 조회
     os.makedirs(_CACHE_DIR, exist_ok=True)
-    key = _hash_key(txt, lang, voice, speaking_rate, pitch)
-    cached_path = os.path.abspath(os.path.join(_CACHE_DIR, f"{key}.mp3"))
+    cached_path = tts_cache_path(txt, lang, voice, speaking_rate, pitch)
     if os.path.exists(cached_path):
         return cached_path  # 캐시 적중
 
     # 2) 합성 (재시도 포함)
-    client = texttospeech.TextToSpeechClient()
+    client = _get_client()
     ssml = texttospeech.SynthesisInput(text=txt)
     v = texttospeech.VoiceSelectionParams(language_code=lang, name=voice)
     cfg = texttospeech.AudioConfig(
@@ -72,9 +108,14 @@ def synthesize(
         pitch=pitch,
     )
 
+    started = time.perf_counter()
     resp = _retry(lambda: client.synthesize_speech(input=ssml, voice=v, audio_config=cfg))
+    log.debug("[TTS] 합성 %.0fms (%d자)", (time.perf_counter() - started) * 1000, len(txt))
 
-    with open(cached_path, "wb") as f:
+    # 같은 문구를 동시에 합성하거나 다른 요청이 읽는 중이어도 반쯤 쓴 파일이 보이지 않도록 임시 파일에 쓰고 교체
+    tmp = f"{cached_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
         f.write(resp.audio_content)
+    os.replace(tmp, cached_path)
 
     return cached_path
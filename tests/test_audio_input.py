@@ -0,0 +1,107 @@
+# tests/test_audio_input.py
+# 업로드 오디오를 Whisper에 넘기기 전 처리(WAV 판별/변환, 무음 판별) 테스트. 메모리 WAV는 wave 모듈로 만든다.
+import io
+import wave
+
+import src.server.app as server
+
+
+def _wav_bytes(frames: bytes = b"\x00\x00" * 160, sampwidth: int = 2) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(sampwidth)
+        w.setframerate(16000)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+def test_riff_upload_with_other_extension_is_passed_through(monkeypatch):
+    def fail_convert(*args):
+        raise AssertionError("ffmpeg를 실행하면 안 됨")
+
+    monkeypatch.setattr(server, "_ffmpeg_to_wav", fail_convert)
+    src = io.BytesIO(_wav_bytes())
+    wav_buf, cleanup = server._ensure_wav(src, ".m4a")
+
+    assert wav_buf is src
+    assert cleanup == []
+    assert src.tell() == 0
+
+
+def test_non_riff_wav_is_converted(monkeypatch):
+    converted = []
+
+    def fake_convert(src, suffix, wav_buf):
+        converted.append(suffix)
+        wav_buf.write(_wav_bytes())
+
+    monkeypatch.setattr(server, "_FFMPEG_OK", True)
+    monkeypatch.setattr(server, "_ffmpeg_to_wav", fake_convert)
+    src = io.BytesIO(b"ID3\x04\x00" + b"\x00" * 64)  # 확장자만 .wav인 mp3
+    wav_buf, cleanup = server._ensure_wav(src, ".wav")
+
+    assert converted == [".wav"]
+    assert wav_buf is not src
+    assert cleanup == [wav_buf]
+    assert wav_buf.read(4) == b"RIFF"
+    server._cleanup_temp_files(cleanup)
+
+
+def test_short_upload_is_not_wav():
+    src = io.BytesIO(b"RIFF\x00\x00")
+    assert server._is_wav_data(src) is False
+    assert src.tell() == 0
+
+
+def test_sniff_rewinds_upload():
+    src = io.BytesIO(b"\x00\x00\x00\x20ftypM4A " + b"\x00" * 32)
+    assert server._is_wav_data(src) is False
+    assert src.tell() == 0
+
+    src = io.BytesIO(_wav_bytes())
+    assert server._is_wav_data(src) is True
+    assert src.tell() == 0
+
+
+def _pcm16(*samples: int) -> bytes:
+    return b"".join(s.to_bytes(2, "little", signed=True) for s in samples)
+
+
+def test_all_zero_wav_is_silent():
+    buf = io.BytesIO(_wav_bytes(_pcm16(*[0] * 1600)))
+    assert server._is_silent_wav(buf) is True
+    assert buf.tell() == 0
+
+
+def test_peak_at_threshold_is_not_silent():
+    peak = server._SILENCE_PEAK
+    for sample in (peak, -peak):
+        buf = io.BytesIO(_wav_bytes(_pcm16(0, 0, sample, 0)))
+        assert server._is_silent_wav(buf) is False
+        assert buf.tell() == 0
+
+
+def test_non_16bit_and_invalid_wav_are_passed_through(monkeypatch):
+    calls = []
+    monkeypatch.setattr(server, "transcribe_fileobj", lambda buf, **kwargs: calls.append(buf) or "아메리카노")
+
+    eight_bit = io.BytesIO(_wav_bytes(b"\x80" * 1600, sampwidth=1))
+    assert server._is_silent_wav(eight_bit) is False
+    assert eight_bit.tell() == 0
+    assert server._transcribe_wav(eight_bit) == "아메리카노"
+
+    invalid = io.BytesIO(b"RIFF\x00\x00\x00\x00WAVEjunk")
+    assert server._is_silent_wav(invalid) is False
+    assert invalid.tell() == 0
+    assert server._transcribe_wav(invalid) == "아메리카노"
+
+    assert calls == [eight_bit, invalid]
+
+
+def test_silent_wav_skips_whisper(monkeypatch):
+    def fail_transcribe(*args, **kwargs):
+        raise AssertionError("무음이면 Whisper를 부르면 안 됨")
+
+    monkeypatch.setattr(server, "transcribe_fileobj", fail_transcribe)
+    assert server._transcribe_wav(io.BytesIO(_wav_bytes(_pcm16(*[3] * 1600)))) == ""
@@ -0,0 +1,30 @@
+# tests/test_dialog_steps.py
+# 단계 처리 함수(_step_*)를 LLM 없이 규칙으로 처리되는 발화로 직접 호출하는 테스트.
+import asyncio
+
+from src.server.app import SessionCtx, _compact, _step_size, _step_temp
+
+
+def _run(step_fn, ctx, text):
+    return asyncio.run(step_fn(ctx, text, _compact(text)))
+
+
+def test_temp_skips_size_prefilled_from_menu_utterance():
+    # "아메리카노 톨 사이즈" 처럼 메뉴와 함께 사이즈를 말한 경우
+    ctx = SessionCtx(step="temp", category="coffee", menu_id="COFFEE_AMERICANO", menu_name="아메리카노", size="tall")
+    _run(_step_temp, ctx, "아이스로 주세요")
+    assert ctx.temp == "ice"
+    assert ctx.step == "options"
+
+
+def test_back_from_size_asks_size_again():
+    # options → 이전 → size → 이전 → temp 로 되돌아온 뒤 온도를 고르면 사이즈를 다시 물어야 함
+    ctx = SessionCtx(step="size", category="coffee", menu_id="COFFEE_AMERICANO", menu_name="아메리카노",
+                     temp="hot", size="venti")
+    _run(_step_size, ctx, "이전")
+    assert ctx.step == "temp"
+    assert ctx.size is None
+
+    _run(_step_temp, ctx, "아이스로 주세요")
+    assert ctx.temp == "ice"
+    assert ctx.step == "size"
@@ -4,6 +4,10 @@ from src.server.app import (
     _parse_temp,
     _parse_size,
     _parse_menu_item,
+    _parse_menu_item_exact,
+    _parse_payment,
+    _parse_options_rule,
+    _classify_ui_target_rule,
 )
 
 
@@ -60,3 +64,42 @@ def test_parse_menu_item_dessert():
     assert _parse_menu_item("dessert", "티라미수") == ("DESSERT_TIRAMISU", "티라미수")
     assert _parse_menu_item("dessert", "초코 브라우니") == ("DESSERT_BROWNIE", "초코 브라우니")
     assert _parse_menu_item("dessert", "크루아상") == ("DESSERT_CROISSANT", "크루아상")
+
+
+def test_parse_menu_item_exact():
+    assert _parse_menu_item_exact("아이스 아메리카노 주세요") == ("coffee", "COFFEE_AMERICANO", "아메리카노")
+    assert _parse_menu_item_exact("치즈케이크 하나") == ("dessert", "DESSERT_CHEESECAKE", "치즈케이크")
+    # 별칭만 맞거나 메뉴가 여러 개면 None (LLM으로 넘김)
+    assert _parse_menu_item_exact("아메 주세요") is None
+    assert _parse_menu_item_exact("아메리카노 말고 카페 라떼") is None
+
+
+def test_parse_payment():
+    assert _parse_payment("카드로 할게요") == "card"
+    assert _parse_payment("쿠폰 사용할게") == "coupon"
+    assert _parse_payment("카카오로 결제") == "kakaopay"
+    assert _parse_payment("간편결제 할래요") == "pay"
+    assert _parse_payment("잘 모르겠어요") is None
+
+
+def test_parse_options_rule():
+    base = {"extra_shot": 0, "syrup": False, "decaf": None, "sweetness": None}
+    assert _parse_options_rule("coffee", "디카페인으로 해주세요", base)["decaf"] is True
+    assert _parse_options_rule("coffee", "샷 두 번 추가해줘", base)["extra_shot"] == 2
+    assert _parse_options_rule("ade", "연하게 해줘", base)["sweetness"] == "low"
+    # 규칙으로 확실하지 않으면 None (LLM으로 넘김)
+    assert _parse_options_rule("coffee", "시럽 많이", base) is None
+    assert _parse_options_rule("ade", "디카페인", base) is None
+    assert _parse_options_rule("ade", "연하게 달게", base) is None
+
+
+def test_classify_ui_target_rule():
+    assert _classify_ui_target_rule("유자차는 어디 있나요?", None)["target_element_id"] == "menu_item_tea_yuja"
+    # 받침 있는 메뉴명은 '은', 없는 메뉴명은 '는'
+    assert _classify_ui_target_rule("크루아상 어디 있어?", None)["answer_text"].startswith("크루아상은 ")
+    assert _classify_ui_target_rule("마카롱 어디 있어?", None)["answer_text"].startswith("마카롱은 ")
+    assert _classify_ui_target_rule("유자차 어디 있어?", None)["answer_text"].startswith("유자차는 ")
+    assert _classify_ui_target_rule("뒤로 가려면 뭐 눌러야 해?", "size")["target_element_id"] == "size_prev_button"
+    # 후보가 여러 개이거나 규칙에 없으면 None (LLM으로 넘김)
+    assert _classify_ui_target_rule("아메리카노 장바구니 어디", "menu_item") is None
+    assert _classify_ui_target_rule("다음으로 가려면 어떻게 해?", "confirm") is None
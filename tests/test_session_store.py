@@ -0,0 +1,56 @@
+# tests/test_session_store.py
+# 세션 저장소(SESSIONS / SESS_META)의 만료 세션 정리 테스트. _now()를 고정 시계로 바꿔 검증한다.
+from collections import OrderedDict
+
+import pytest
+
+import src.server.app as server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server, "_now", lambda: now[0])
+    monkeypatch.setattr(server, "SESSIONS", {})
+    monkeypatch.setattr(server, "SESS_META", OrderedDict())
+    return now
+
+
+def test_expired_session_removed_from_both_stores(clock):
+    old, _ = server._ensure_session()
+    clock[0] += server.SESSION_TTL + 1
+    new, _ = server._ensure_session()
+
+    assert old not in server.SESSIONS
+    assert old not in server.SESS_META
+    assert new in server.SESSIONS
+    assert list(server.SESS_META) == [new]
+
+
+def test_eviction_stops_at_first_live_session(clock):
+    expired, _ = server._ensure_session()
+    clock[0] += server.SESSION_TTL // 2
+    live, _ = server._ensure_session()
+    # 살아 있는 세션 뒤에 있는 항목은 (만료됐더라도) 이번 정리에서 보지 않음
+    server.SESSIONS["stale"] = server.SessionCtx()
+    server.SESS_META["stale"] = 0.0
+
+    clock[0] += server.SESSION_TTL // 2 + 1
+    server._ensure_session(live)
+
+    assert expired not in server.SESSIONS and expired not in server.SESS_META
+    assert live in server.SESSIONS
+    assert "stale" in server.SESSIONS and "stale" in server.SESS_META
+
+
+def test_touch_moves_session_to_end(clock):
+    first, ctx = server._ensure_session()
+    second, _ = server._ensure_session()
+    assert list(server.SESS_META) == [first, second]
+
+    clock[0] += 1
+    sid, same_ctx = server._ensure_session(first)
+
+    assert sid == first and same_ctx is ctx
+    assert list(server.SESS_META) == [second, first]
+    assert server.SESS_META[first] == clock[0]
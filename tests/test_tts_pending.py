@@ -0,0 +1,126 @@
+# tests/test_tts_pending.py
+# 백그라운드 TTS 합성(_schedule_synthesis)과 /tts/{filename} 대기/스트리밍 분기 테스트.
+# Google TTS 대신 문장 텍스트를 그대로 파일에 쓰는 가짜 synthesize를 사용한다.
+import asyncio
+import hashlib
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import src.server.app as server
+
+
+class _Request:
+    headers = {}
+
+
+@pytest.fixture
+def tts(tmp_path, monkeypatch):
+    env = SimpleNamespace(calls=[], fail=set(), delay={})
+
+    def fake_cache_path(text, *args, **kwargs):
+        key = hashlib.md5(text.strip().encode("utf-8")).hexdigest()
+        return os.path.join(str(tmp_path), f"{key}.mp3")
+
+    def fake_synthesize(text, out_path=None, *args, **kwargs):
+        env.calls.append(text)
+        time.sleep(env.delay.get(text, 0))
+        if text in env.fail:
+            raise RuntimeError("tts down")
+        path = fake_cache_path(text)
+        with open(path, "wb") as f:
+            f.write(text.encode("utf-8"))
+        return path
+
+    monkeypatch.setattr(server, "tts_cache_path", fake_cache_path)
+    monkeypatch.setattr(server, "synthesize", fake_synthesize)
+    monkeypatch.setattr(server, "TTS_DIR", str(tmp_path))
+    server._tts_abs_path.cache_clear()
+    yield env
+    server._tts_abs_path.cache_clear()
+    server._PENDING_TTS.clear()
+    server._PENDING_TTS_PARTS.clear()
+
+
+def _schedule(text):
+    path = server._schedule_synthesis(text, "sid")
+    name = os.path.basename(path)
+    return path, name, server._PENDING_TTS[name]
+
+
+def test_multi_sentence_joined_in_order(tts):
+    text = "첫 문장입니다. 둘째 문장입니다. 셋째 문장입니다."
+    tts.delay["첫 문장입니다."] = 0.05  # 첫 문장이 가장 늦게 끝나도 순서는 유지
+
+    async def run():
+        path, name, fut = _schedule(text)
+        await fut
+        return path, name, await server.get_tts_file(name, _Request())
+
+    path, name, resp = asyncio.run(run())
+    with open(path, "rb") as f:
+        assert f.read() == "첫 문장입니다.둘째 문장입니다.셋째 문장입니다.".encode("utf-8")
+    assert not server._PENDING_TTS and not server._PENDING_TTS_PARTS
+    # 완성 파일만 장기 캐시
+    assert resp.headers["cache-control"] == server._TTS_CACHE_CONTROL
+    assert resp.headers["etag"] == f'"{name[:-4]}"'
+
+
+def test_shared_sentence_synthesized_once(tts):
+    shared = "따뜻하게 드실까요, 차갑게 드실까요?"
+    tts.delay[shared] = 0.05
+
+    async def run():
+        _, _, fut_a = _schedule(f"아메리카노 담았습니다. {shared}")
+        _, _, fut_b = _schedule(f"카페 라떼 담았습니다. {shared}")
+        return await asyncio.gather(fut_a, fut_b)
+
+    path_a, path_b = asyncio.run(run())
+    assert tts.calls.count(shared) == 1
+    with open(path_a, "rb") as f:
+        assert f.read().endswith(shared.encode("utf-8"))
+    with open(path_b, "rb") as f:
+        assert f.read().endswith(shared.encode("utf-8"))
+
+
+def test_first_part_failure_returns_502(tts):
+    tts.fail.add("첫 문장입니다.")
+
+    async def run():
+        path, name, fut = _schedule("첫 문장입니다. 둘째 문장입니다.")
+        with pytest.raises(HTTPException) as exc:
+            await server.get_tts_file(name, _Request())
+        await asyncio.gather(fut, return_exceptions=True)
+        return path, exc.value
+
+    path, exc = asyncio.run(run())
+    assert exc.status_code == 502
+    assert not os.path.exists(path)
+    assert not server._PENDING_TTS and not server._PENDING_TTS_PARTS
+
+
+def test_later_part_failure_truncates_uncached_stream(tts):
+    tts.fail.add("둘째 문장입니다.")
+    tts.delay["둘째 문장입니다."] = 0.05
+
+    async def run():
+        path, name, fut = _schedule("첫 문장입니다. 둘째 문장입니다.")
+        resp = await server.get_tts_file(name, _Request())
+        chunks = []
+        with pytest.raises(RuntimeError):
+            async for chunk in resp.body_iterator:
+                chunks.append(chunk)
+        await asyncio.gather(fut, return_exceptions=True)
+        return path, resp, chunks
+
+    path, resp, chunks = asyncio.run(run())
+    # 잘린 응답이 캐시되지 않아야 함
+    assert resp.headers["cache-control"] == "no-store"
+    assert "etag" not in resp.headers
+    assert chunks == ["첫 문장입니다.".encode("utf-8")]
+    # 합친 파일은 만들어지지 않음
+    assert not os.path.exists(path)
+    assert not server._PENDING_TTS and not server._PENDING_TTS_PARTS